@@ -7,31 +7,63 @@ __date__ = ""
 __version__ = "1.1.0"
 __copyright__ = "The University of Queensland, 2019"
 
+import argparse
 import math
+from collections import deque
 import tkinter as tk
 
-from typing import Tuple, List
+from typing import Tuple, List, Callable
 
 import pymunk
 
-from game.block import Block, MysteryBlock
+from game.block import Block, MysteryBlock, BLOCK_FACTORIES
 from game.entity import Entity, BoundaryWall
-from game.mob import Mob, CloudMob, Fireball
-from game.item import DroppedItem, Coin
+from game.mob import Mob, CloudMob, Fireball, MOB_FACTORIES
+from game.item import DroppedItem, Coin, ITEM_FACTORIES
+from game.registry import WORLD
 from game.view import GameView, ViewRenderer
-from game.world import World
+from game.controls import InputState
+from game.simulation import SimulationThread, StaticGridView
+from game.world import World, CollisionRule
 from tkinter import messagebox
 from tkinter import filedialog
 from game.util import get_collision_direction
-import time
 from PIL import Image
 from PIL import ImageTk
 
-from level import load_world, WorldBuilder
+from config import load_config, ConfigError
+from level import load_world, WorldBuilder, LevelGraph, END_LEVEL
+from editor import LevelEditor
 from player import Player
 
 BLOCK_SIZE = 2 ** 4
 MAX_WINDOW_SIZE = (1080, math.inf)
+# The time in milliseconds between checks for changes to the level file
+WATCH_INTERVAL = 500
+
+# Keys controlling the player, see InputState
+LEFT_KEYS = frozenset({'a', 'Left'})
+RIGHT_KEYS = frozenset({'d', 'Right'})
+JUMP_KEYS = frozenset({'w', 'Up', 'space'})
+DUCK_KEYS = frozenset({'s', 'Down'})
+# The change in the player's horizontal velocity per step while a movement key is held
+MOVE_ACCELERATION = 20
+# The vertical speed of the player when jumping (upwards) or ducking (downwards)
+JUMP_VELOCITY = 150
+
+# The simulation time in seconds before a switch recovers the bricks it removed
+SWITCH_RECOVERY_TIME = 10
+# The simulation time in seconds a star makes the player invincible for
+INVINCIBILITY_TIME = 10
+# The simulation time in seconds between fireballs thrown by the bigger player
+FIRE_COOLDOWN = 1
+# The simulation time in seconds a bounce block is drawn bouncing after it is hit
+BOUNCE_TIME = 0.12
+# The simulation time in seconds a squished mushroom is drawn before it is removed
+SQUISH_TIME = 0.1
+
+# The configuration used when a chosen configuration file cannot be loaded
+DEFAULT_CONFIG = 'config_default.txt'
 
 GOAL_SIZES = {
     "flag": (0.2, 9),
@@ -61,82 +93,86 @@ MOBS = {
     '@': 'mushroom'
 }
 
+# Blocks without any state or behaviour, stored in the world's static block grid
+STATIC_BLOCKS = {'brick', 'brick_base', 'cube'}
+# The symbols of the static blocks, which are built together, see create_static_blocks
+STATIC_SYMBOLS = [symbol for symbol, block_id in BLOCKS.items() if block_id in STATIC_BLOCKS]
+
 step_count=1
 count=0
 
-def create_block(world: World, block_id: str, x: int, y: int, *args):
-    """Create a new block instance and add it to the world based on the block_id.
+def block_builder(block_id: str) -> Callable:
+    """Returns the world builder callback adding blocks of a block id to a world.
+
+    The block's factory (see BLOCK_FACTORIES) is resolved once, here, rather
+    than for each block built.
 
     Parameters:
-        world (World): The world where the block should be added to.
-        block_id (str): The block identifier of the block to create.
-        x (int): The x coordinate of the block.
-        y (int): The y coordinate of the block.
+        block_id (str): The block identifier of the blocks to create.
     """
-    block_id = BLOCKS[block_id]
-    if block_id == "mystery_empty":
-        block = MysteryBlock()
-    elif block_id == "mystery_coin":
-        block = MysteryBlock(drop="coin", drop_range=(3, 6))
-    elif block_id=='tunnel':
-        block=Tunnel()
-    elif block_id=='flag':
-        block=Flagpole()
-    elif block_id=='switch':
-        block=Switch(radius=3)
-    elif block_id=='bounce_block':
-        block=Bounce()
-    else:
-        block = Block(block_id)
+    if block_id in STATIC_BLOCKS:
+        def build_static_block(world: World, symbol: str, x: int, y: int, *args):
+            world.add_static_block(block_id, x * BLOCK_SIZE, y * BLOCK_SIZE)
+        return build_static_block
+
+    create = BLOCK_FACTORIES.get_factory(block_id)
+
+    def build_block(world: World, symbol: str, x: int, y: int, *args):
+        world.add_block(create(world), x * BLOCK_SIZE, y * BLOCK_SIZE)
+    return build_block
+
 
-    world.add_block(block, x * BLOCK_SIZE, y * BLOCK_SIZE)
+def create_static_blocks(world: World, block_id: str, xs, ys, *args):
+    """Add every static block of a block_id to the world at once.
 
+    Parameters:
+        world (World): The world where the blocks should be added to.
+        block_id (str): The block identifier of the blocks to create.
+        xs (np.ndarray): The x coordinate of each block.
+        ys (np.ndarray): The y coordinate of each block.
+    """
+    world.add_static_blocks_to_grid(BLOCKS[block_id], xs, ys)
 
 
-def create_item(world: World, item_id: str, x: int, y: int, *args):
-    """Create a new item instance and add it to the world based on the item_id.
+def item_builder(item_id: str) -> Callable:
+    """Returns the world builder callback adding items of an item id to a world.
 
     Parameters:
-        world (World): The world where the item should be added to.
-        item_id (str): The item identifier of the item to create.
-        x (int): The x coordinate of the item.
-        y (int): The y coordinate of the item.
+        item_id (str): The item identifier of the items to create, see ITEM_FACTORIES.
     """
-    item_id = ITEMS[item_id]
-    if item_id == "coin":
-        item = Coin()
-    elif item_id=='star':
-        item=Star()
-    elif item_id=='flower':
-        item=Flower()
-    else:
-        item = DroppedItem(item_id)
+    create = ITEM_FACTORIES.get_factory(item_id)
 
-    world.add_item(item, x * BLOCK_SIZE, y * BLOCK_SIZE)
+    def build_item(world: World, symbol: str, x: int, y: int, *args):
+        world.add_item(create(world), x * BLOCK_SIZE, y * BLOCK_SIZE)
+    return build_item
 
 
-def create_mob(world: World, mob_id: str, x: int, y: int, *args):
-    """Create a new mob instance and add it to the world based on the mob_id.
+def mob_builder(mob_id: str) -> Callable:
+    """Returns the world builder callback adding mobs of a mob id to a world.
 
     Parameters:
-        world (World): The world where the mob should be added to.
-        mob_id (str): The mob identifier of the mob to create.
-        x (int): The x coordinate of the mob.
-        y (int): The y coordinate of the mob.
+        mob_id (str): The mob identifier of the mobs to create, see MOB_FACTORIES.
     """
-    mob_id = MOBS[mob_id]
-    if mob_id == "cloud":
-        mob = CloudMob()
-    elif mob_id == "fireball":
-        mob = Fireball()
-    elif mob_id =='mushroom':
-        mob=Mushroom(world)
-    elif mob_id=='fire':
-        mob=Fire()
-    else:
-        mob = Mob(mob_id, size=(1, 1))
+    create = MOB_FACTORIES.get_factory(mob_id)
+
+    def build_mob(world: World, symbol: str, x: int, y: int, *args):
+        world.add_mob(create(world), x * BLOCK_SIZE, y * BLOCK_SIZE)
+    return build_mob
+
+
+def register_entities(builder: WorldBuilder):
+    """Register the builder of each symbol of BLOCKS, ITEMS and MOBS with a world builder.
 
-    world.add_mob(mob, x * BLOCK_SIZE, y * BLOCK_SIZE)
+    Parameters:
+        builder (WorldBuilder): The world builder to register builders with.
+    """
+    for symbol, block_id in BLOCKS.items():
+        builder.register_builder(symbol, block_builder(block_id))
+    for symbol, item_id in ITEMS.items():
+        builder.register_builder(symbol, item_builder(item_id))
+    for symbol, mob_id in MOBS.items():
+        builder.register_builder(symbol, mob_builder(mob_id))
+    builder.register_batch_builders(STATIC_SYMBOLS, create_static_blocks)
 
 
 def create_unknown(world: World, entity_id: str, x: int, y: int, *args):
@@ -170,9 +206,11 @@ MOB_IMAGES = {
 #Block section
 class Switch(Block):
     """A switch block explodes and removes the bricks around radius 
-    when player hits its upside. After 10s the switch and bricks removed by it
-    recover as before.
+    when player hits its upside. After SWITCH_RECOVERY_TIME the switch and
+    bricks removed by it recover as before.
     """
+    __slots__ = ('_active', '_radius', '_position')
+
     _id='switch'
 
     def __init__(self,radius=1):
@@ -184,7 +222,6 @@ class Switch(Block):
         super().__init__() 
         self._active = True
         self._radius=radius 
-        self._time_start=0
         self._position={}
 
     def remove_bricks(self,world):
@@ -209,9 +246,9 @@ class Switch(Block):
         if get_collision_direction(player, self) != "A":
             return
         if self._active:
-            self._time_start=time.time()
             self._active = False
             self.remove_bricks(world)
+            world.schedule(SWITCH_RECOVERY_TIME, self.recover, world)
 
     def is_active(self):
         """(bool): Returns true if the block has not exploded."""
@@ -226,23 +263,27 @@ class Switch(Block):
         self._active=bool
         return self._active
 
-    def step(self,time_delta,data):
-        """Time to recover the exploded bricks.
+    def recover(self,world):
+        """Recover the exploded bricks, SWITCH_RECOVERY_TIME after exploding.
            Parameters:
-                time_delta (float): The amount of time that has passed since the last step, in seconds
-                game_data (tuple<World, Player>): Arbitrary data supplied by the app class 
+                world (World): The world the bricks were removed from.
         """
-        world, player = data
-        if time.time()-self._time_start>=10:
-            self.set_active(True)
-            for brick,position in self._position.items():
-                x,y=position
+        self.set_active(True)
+        for brick,position in self._position.items():
+            x,y=position
+            # bricks removed from the static block grid go back into it
+            if brick.get_id() in STATIC_BLOCKS:
+                world.add_static_block(brick.get_id(),x,y)
+            else:
                 world.add_block(brick,x,y)
+        self._position={}
 
 class Bounce(Block):
     """A bounce block propels the player into the air when they walk over 
        or jump on top of the block.
     """
+    __slots__ = ('_active',)
+
     _id='bounce_block'
 
     def __init__(self):
@@ -275,11 +316,14 @@ class Bounce(Block):
         else:
             player.set_velocity((0,-200))
             self.set_active(True)
+            world.schedule(BOUNCE_TIME, self.set_active, False)
 
 class Flagpole(Block):
     """When a player collides with this, immediately take the player to the next level. 
        If the player lands on top of the flag pole, their health and max health will be increased by 1.
     """
+    __slots__ = ()
+
     _id='flag'
     _cell_size=GOAL_SIZES['flag']
 
@@ -291,6 +335,8 @@ class Tunnel(Block):
     """if the player presses the down key while standing on top of this block, 
        the player will be taken to another level.
     """
+    __slots__ = ()
+
     _id='tunnel'
     _cell_size=GOAL_SIZES['tunnel']
 
@@ -303,6 +349,8 @@ class Mushroom(Mob):
     """A mushroom mob is a moving entity that collides with a block, player, or other mob
        reversing its direction.When colliding with the player it will damage the player.
     """
+    __slots__ = ('_is_dead', '_world')
+
     _id='mushroom'
 
     def __init__(self,world):
@@ -333,8 +381,9 @@ class Mushroom(Mob):
             player.set_velocity((vx+150,0))
             self.set_tempo(-tempo)
             player.change_health(-1)
-        elif get_collision_direction(player,self)=='A':
+        elif get_collision_direction(player,self)=='A' and not self._is_dead:
             self.set_dead(True)
+            world.schedule(SQUISH_TIME, self.remove)
     
     def is_dead(self):
         """(bool): return true if the mushroom is dead."""
@@ -347,12 +396,20 @@ class Mushroom(Mob):
         self._is_dead=bool
 
     def remove(self):
-        """Remove the mushroom from world."""
-        self._world.remove_mob(self)
+        """Remove the mushroom from world, unless it has already been removed
+           (e.g. by a fireball while squished)."""
+        if self.get_shape().body.space is not None:
+            self._world.remove_mob(self)
 
 class Fire(Mob):
     """Construct a fireball to eliminate enemies"""
+    __slots__ = ()
+
     _id='fire'
+    # fireballs pass through the player who throws them, and are removed on
+    # touching anything else, so are never pushed apart from it
+    _ignored_categories = ("player",)
+    _sensor = True
 
     def __init__(self,tempo=500):
         """Construct a new fireball.
@@ -364,6 +421,8 @@ class Fire(Mob):
 #Item section
 class Star(DroppedItem):
     """A item that can be picked up to let players be invincible."""
+    __slots__ = ()
+
     _id='star'
 
     def __init__(self):
@@ -378,6 +437,8 @@ class Star(DroppedItem):
 
 class Flower(DroppedItem):
     """A item that can let mario grow up."""
+    __slots__ = ()
+
     _id='flower'
 
     def __init__(self):
@@ -390,6 +451,25 @@ class Flower(DroppedItem):
         """
         player.set_name('bigger')
 
+# The factories of the game's blocks, items and mobs, as (class, *arguments), where
+# WORLD is replaced by the world each entity is created for
+BLOCK_FACTORIES.register_all({
+    'mystery_empty': (MysteryBlock,),
+    'mystery_coin': (MysteryBlock, {'drop': 'coin', 'drop_range': (3, 6)}),
+    'tunnel': (Tunnel,),
+    'flag': (Flagpole,),
+    'switch': (Switch, {'radius': 3}),
+    'bounce_block': (Bounce,),
+})
+ITEM_FACTORIES.register_all({
+    'star': (Star,),
+    'flower': (Flower,),
+})
+MOB_FACTORIES.register_all({
+    'mushroom': (Mushroom, WORLD),
+    'fire': (Fire,),
+})
+
 class SpriteSheetLoader():
     """Load one of the smaller images from a sprite sheet based on the smaller images
        location and position within the sheet."""
@@ -571,6 +651,10 @@ flower_c=iter(flower_color)
 class MarioViewRenderer(ViewRenderer):
     """A customised view renderer for a game of mario."""
 
+    def convert_image(self, image) -> ImageTk.PhotoImage:
+        """(ImageTk.PhotoImage) Returns a drawable image of a sprite sheet (PIL) image."""
+        return ImageTk.PhotoImage(image)
+
     @ViewRenderer.draw.register(Player)
     def _draw_player(self, instance: Player, shape: pymunk.Shape,
                      view: tk.Canvas, offset: Tuple[int, int]) -> List[int]:
@@ -587,7 +671,7 @@ class MarioViewRenderer(ViewRenderer):
                 if step_count % 12==0:
                     right=iter(right_walking)
                 try:
-                    image = ImageTk.PhotoImage(next(right))
+                    image = self.convert_image(next(right))
                     self._images['right']=image
                 except:
                     image = self.load_image("mario_right")
@@ -595,34 +679,34 @@ class MarioViewRenderer(ViewRenderer):
                 if step_count % 12==0:
                     left=iter(left_walking)
                 try:
-                    image = ImageTk.PhotoImage(next(left))
+                    image = self.convert_image(next(left))
                     self._images['left']=image
                 except:
                     image = self.load_image("mario_left")
             elif shape.body.velocity.x == 0 and shape.body.velocity.y != 0:
-                image=ImageTk.PhotoImage(images['character_right'][13])
+                image=self.convert_image(images['character_right'][13])
                 self._images['jump_dunk']=image
         elif instance.get_name()=='bigger':
             if shape.body.velocity.x > 0:
                 if step_count % 12==0:
                     bigger_right=iter(bigger_right_walking)
                 try:
-                    image = ImageTk.PhotoImage(next(bigger_right))
+                    image = self.convert_image(next(bigger_right))
                     self._images['bigger_right']=image
                 except:
-                    image=ImageTk.PhotoImage(images['bigger_right'][1])
+                    image=self.convert_image(images['bigger_right'][1])
                     self._images['bigger_right1']=image
             elif shape.body.velocity.x < 0:
                 if step_count % 12==0:
                     bigger_left=iter(bigger_left_walking)
                 try:
-                    image = ImageTk.PhotoImage(next(bigger_left))
+                    image = self.convert_image(next(bigger_left))
                     self._images['bigger_left']=image
                 except:
-                    image=ImageTk.PhotoImage(images['bigger_left'][1])
+                    image=self.convert_image(images['bigger_left'][1])
                     self._images['bigger_left1']=image
             elif shape.body.velocity.x == 0 and shape.body.velocity.y != 0:
-                image=ImageTk.PhotoImage(images['bigger_right'][13])
+                image=self.convert_image(images['bigger_right'][13])
                 self._images['jump_dunk']=image
 
         return [view.create_image(shape.bb.center().x + offset[0], shape.bb.center().y,
@@ -659,7 +743,7 @@ class MarioViewRenderer(ViewRenderer):
         if step_count % 10==0:
             spin=iter(spinning)
         try:
-            image = ImageTk.PhotoImage(next(spin))
+            image = self.convert_image(next(spin))
             self._images['spin']=image
         except:
             image = self.load_image("coin_item")  
@@ -675,12 +759,11 @@ class MarioViewRenderer(ViewRenderer):
         if instance.is_active():
             count+=1
             try:
-                image = ImageTk.PhotoImage(next(bounce_i))
+                image = self.convert_image(next(bounce_i))
                 self._images['bounce_i']=image
             except:
                 image = self.load_image("bounce_block")
             if count % 6==0:
-                instance.set_active(False)
                 bounce_i=iter(bounce)
         else:
             image = self.load_image("bounce_block")
@@ -696,18 +779,16 @@ class MarioViewRenderer(ViewRenderer):
         if instance.is_dead():
             count+=1
             try:
-                image = ImageTk.PhotoImage(next(m_squishing))
+                image = self.convert_image(next(m_squishing))
                 self._images[1]=image
             except:
-                image = ImageTk.PhotoImage(images['mushroom'][7])
+                image = self.convert_image(images['mushroom'][7])
                 self._images['squish']=image
             if count % 5==0:
                 m_squishing=iter(mushroom_squishing)
-                instance.set_dead(False)
-                instance.remove()
         elif instance.get_tempo()>=0 or instance.get_tempo()<0:
             try:
-                image = ImageTk.PhotoImage(next(m_walking))
+                image = self.convert_image(next(m_walking))
                 self._images['m_walk']=image
             except:
                 image = self.load_image("mushroom")
@@ -725,60 +806,109 @@ class MarioViewRenderer(ViewRenderer):
         if step_count % 8==0:
             flower_c=iter(flower_color)
         try:
-            image = ImageTk.PhotoImage(next(flower_c))
+            image = self.convert_image(next(flower_c))
             self._images['flower']=image
         except:
-            image=ImageTk.PhotoImage(images['flower'][1])
+            image=self.convert_image(images['flower'][1])
             self._images['flower']=image
 
         return [view.create_image(shape.bb.center().x + offset[0], shape.bb.center().y,
                                   image=image, tags="item")]
 
+HEALTH_BAR_WIDTH = 154
+
 class Records():
     """ A custom tkinter widget which displays the score and health of the
         player
+
+        The widget observes the player, and only marks itself as changed when
+        notified. The labels are updated by refresh, at most once per frame,
+        and only reconfigured when their displayed value changes.
     """
 
-    def __init__(self,parent=None):
+    def __init__(self,parent=None,player=None):
         """Construct a new widget to record player's score and health.
            Parameters:
                parent (tk.Tk): tkinter root widget.  
+               player (Player): The player to observe.
         """
         self.records=tk.Frame(parent).pack(side=tk.TOP,fill=tk.X)
         self.frame_health = tk.Frame(self.records,bg='black')
         self.frame_health.pack(side=tk.TOP,expand=1,pady=5,fill=tk.X)
-        self.label_health = tk.Label(self.frame_health,bg= 'green',width=154)
+        self.label_health = tk.Label(self.frame_health,bg= 'green',width=HEALTH_BAR_WIDTH)
         self.label_health.pack(side=tk.TOP,anchor=tk.W)
         self.label_score = tk.Label(self.records,text='Score: 0')
         self.label_score.pack(side=tk.TOP)
-        
 
-    def change_health(self,player):  
-        """The health bar depending on player's health.
+        self._player=None
+        self._dirty=False
+        self._invincible=False
+        #The values currently displayed by the labels
+        self._health_display=('green',HEALTH_BAR_WIDTH)
+        self._score_display='Score: 0'
+        if player is not None:
+            self.observe(player)
+
+    def observe(self,player):
+        """Display the health and score of the given player.
            Parameters:
                player (Player): The player in the game.
-        """   
+        """
+        if self._player is not None:
+            self._player.remove_observer(self._on_player_change)
+        self._player=player
+        player.add_observer(self._on_player_change)
+        self._dirty=True
+
+    def _on_player_change(self,player):
+        """Observer callback for a change in the player's health or score."""
+        self._dirty=True
+
+    def set_invincible(self,invincible):
+        """Show the health bar in yellow while the player is invincible.
+           Parameters:
+               invincible (bool): Whether the player is invincible.
+        """
+        if invincible!=self._invincible:
+            self._invincible=invincible
+            self._dirty=True
+
+    def get_health_display(self,player):
+        """The health bar colour and width depending on player's health.
+           Parameters:
+               player (Player): The player in the game.
+           Returns:
+               (tuple<str, int>): The colour and width of the health bar.
+        """
         width_percent= float(player.get_health()/player.get_max_health())
         if player.get_health()==player.get_max_health():
-            self.label_health.config(bg='green',width=154)
+            colour='green'
         elif width_percent>=0.5:
-            self.label_health.config(width=int(154*width_percent))
+            colour='green'
         elif width_percent>=0.25:
-            self.label_health.config(bg='orange',width=int(154*width_percent))
+            colour='orange'
         else:
-            self.label_health.config(bg='red',width=int(154*width_percent))
-    
-    def change_score(self,player):
-        """Changing the score bar if player collects coins.
-           Parameters:
-               player (Player): The player in the game. 
-        """
-        score=player.get_score()
-        self.label_score.config(text='Score: {}'.format(score))
+            colour='red'
+        if self._invincible:
+            colour='yellow'
+        return colour,int(HEALTH_BAR_WIDTH*width_percent)
+
+    def refresh(self):
+        """Update the labels if the player has changed since the last refresh."""
+        if not self._dirty or self._player is None:
+            return
+        self._dirty=False
+
+        health_display=self.get_health_display(self._player)
+        if health_display!=self._health_display:
+            colour,width=health_display
+            self.label_health.config(bg=colour,width=width)
+            self._health_display=health_display
 
-    def invincible_health(self):
-        """Callback if player collects a star."""
-        self.label_health.config(bg='yellow')
+        score_display='Score: {}'.format(self._player.get_score())
+        if score_display!=self._score_display:
+            self.label_score.config(text=score_display)
+            self._score_display=score_display
 
 class HighScore():
     """A tkinter widget to show and store the high scores for each level in a file."""
@@ -910,161 +1040,372 @@ class HighScore():
                     count+=1
             return '\n'.join(temp_list)    
 
-class MarioApp:
-    """High-level app class for Mario, a 2d platformer"""
+class MarioGame:
+    """The rules of Mario, without a window: how keys move the player and what
+    happens when things in its world collide.
+
+    MarioApp plays the game with tkinter, and MarioEnv (see env) plays it for
+    learning agents, so both play by the same rules. Subclasses set the game's
+    world, player and state, and decide what happens when the player reaches a
+    goal, enters a tunnel or loses (see _reach_goal, _enter_tunnel and _lose).
+    """
+
+    _world: World
+    _player: Player
+    # the fastest the player can move horizontally
+    _max_velocity: float
+    # whether a star has made the player invincible, and the timer ending it
+    _invincible: bool = False
+    _invincibility = None
+    # whether a switch has been pressed, and whether the player has ducked into a tunnel
+    _switch_pressed: bool = False
+    _tunnel: bool = False
+    # whether the bigger player can throw a fireball
+    _fire_ready: bool = True
+
+    def _step_world(self):
+        """Step the world, then throw a fireball if the player can."""
+        self._world.step((self._world, self._player))
+        if self._player.get_name()=='bigger' and self._fire_ready:
+            self._fire()
+
+    def _move_player(self, held, pressed):
+        """Apply held and pressed keys to the player.
+
+        Held movement keys accelerate the player by MOVE_ACCELERATION per step,
+        up to the configured max_velocity. Jumping and ducking happen once per
+        key press.
+        """
+        direction = (not held.isdisjoint(RIGHT_KEYS)) - (not held.isdisjoint(LEFT_KEYS))
+        if not (direction or pressed):
+            return
+
+        vx, vy = self._player.get_velocity()
+        if direction:
+            vx = max(-self._max_velocity, min(vx + direction * MOVE_ACCELERATION,
+                                              self._max_velocity))
+        if not pressed.isdisjoint(JUMP_KEYS):
+            vy = self._jump()
+        if not pressed.isdisjoint(DUCK_KEYS):
+            vy = self._duck()
+        self._player.set_velocity((vx, vy))
+
+    def _jump(self) -> float:
+        """(float) Returns the vertical velocity of the player when jumping."""
+        return -JUMP_VELOCITY
+
+    def _duck(self) -> float:
+        """(float) Returns the vertical velocity of the player when ducking."""
+        self._tunnel=True
+        return JUMP_VELOCITY
+
+    def _fire(self):
+        """Throw a fireball in the direction the player is moving, then wait
+        FIRE_COOLDOWN before throwing another."""
+        x,y=self._player.get_position()
+        vx,vy=self._player.get_velocity()
+        if vx>=0:
+            fire=Fire()
+            self._world.add_mob(fire,x+30,y)
+        elif vx<0:
+            fire=Fire(tempo=-500)
+            self._world.add_mob(fire,x-30,y)
+        self._fire_ready=False
+        self._world.schedule(FIRE_COOLDOWN, self._reload_fire)
+
+    def _reload_fire(self):
+        """Let the player throw another fireball."""
+        self._fire_ready=True
+
+    def _end_invincibility(self):
+        """End the invincibility given by a star, INVINCIBILITY_TIME after it was collected."""
+        self._invincible=False
+        self._invincibility=None
+        self._show_invincible(False)
+
+    def get_collision_rules(self) -> List[CollisionRule]:
+        """(list<CollisionRule>) Returns the collision rules installed in every world of the game."""
+        return [
+            CollisionRule("player", "item", on_begin=self._handle_player_collide_item),
+            CollisionRule("player", "block", on_begin=self._handle_player_collide_block,
+                          on_separate=self._handle_player_separate_block),
+            CollisionRule("player", "mob", on_begin=self._handle_player_collide_mob),
+            CollisionRule("mob", "block", on_begin=self._handle_mob_collide_block),
+            CollisionRule("mob", "mob", on_begin=self._handle_mob_collide_mob),
+        ]
+
+    def _handle_mob_collide_block(self, mob: Mob, block: Block, data,
+                                  arbiter: pymunk.Arbiter) -> bool:
+        if mob.get_id() == "fireball":
+            if block.get_id() == "brick":
+                self._world.remove_block(block)
+            self._world.remove_mob(mob)
+
+        elif mob.get_id()=='mushroom':
+            if get_collision_direction(mob,block)=='L' or get_collision_direction(mob,block)=='R':
+                tempo=mob.get_tempo()
+                mob.set_tempo(-tempo)
+        elif mob.get_id()=='fire':
+            self._world.remove_mob(mob)
+        return True
+
+    def _handle_mob_collide_mob(self, mob1: Mob, mob2: Mob, data,
+                                arbiter: pymunk.Arbiter) -> bool:
+        if mob1.get_id() == "fireball" or mob2.get_id() == "fireball":
+            self._world.remove_mob(mob1)
+            self._world.remove_mob(mob2)
+        elif mob1.get_id()=='fire' :
+            self._world.remove_mob(mob1)
+            self._world.remove_mob(mob2)
+        elif mob2.get_id()=='fire':
+            self._world.remove_mob(mob1)
+            self._world.remove_mob(mob2)
+        elif mob1.get_id()=='mushroom' or mob2.get_id()=='mushroom':
+            tempo1=mob1.get_tempo()
+            mob1.set_tempo(-tempo1)
+            tempo2=mob2.get_tempo()
+            mob2.set_tempo(-tempo2)
+        
+        return False
+
+    def _handle_player_collide_item(self, player: Player, dropped_item: DroppedItem,
+                                    data, arbiter: pymunk.Arbiter) -> bool:
+        """Callback to handle collision between the player and a (dropped) item. If the player has sufficient space in
+        their to pick up the item, the item will be removed from the game world.
+
+        Parameters:
+            player (Player): The player that was involved in the collision
+            dropped_item (DroppedItem): The (dropped) item that the player collided with
+            data (dict): data that was added with this collision handler (see data parameter in
+                         World.add_collision_handler)
+            arbiter (pymunk.Arbiter): Data about a collision
+                                      (see http://www.pymunk.org/en/latest/pymunk.html#pymunk.Arbiter)
+                                      NOTE: you probably won't need this
+        Return:
+             bool: False (always ignore this type of collision)
+                   (more generally, collision callbacks return True iff the collision should be considered valid; i.e.
+                   returning False makes the world ignore the collision)
+        """
+
+        dropped_item.collect(self._player)
+        self._world.remove_item(dropped_item)
+        if dropped_item.get_id()=='star':
+            self._invincible=True
+            self._show_invincible(True)
+            # another star restarts the invincibility
+            if self._invincibility is not None:
+                self._invincibility.cancel()
+            self._invincibility=self._world.schedule(INVINCIBILITY_TIME, self._end_invincibility)
+        return False
+
+    def _handle_player_collide_block(self, player: Player, block: Block, data,
+                                     arbiter: pymunk.Arbiter) -> bool:
+        if block.get_id()=='flag':
+            self._reach_goal(player)
+            if get_collision_direction(player, block) == "A":
+                player = Player(player.get_max_health()+1)
+                player.change_health(1)
+
+        elif block.get_id()=='tunnel':
+            if get_collision_direction(player, block) == "A":
+                if self._tunnel==True:
+                    self._enter_tunnel(player)
+
+        elif block.get_id()=='switch':
+            block.on_hit(arbiter, (self._world, player))
+            if block.is_active()==False:
+                self._switch_pressed=True
+                return False
+        else:
+            block.on_hit(arbiter, (self._world, player))    
+        return True
+
+    def _handle_player_collide_mob(self, player: Player, mob: Mob, data,
+                                   arbiter: pymunk.Arbiter) -> bool:
+        if self._invincible==True:
+            self._world.remove_mob(mob)
+        else:
+            mob.on_hit(arbiter, (self._world, player))   
+            if player.get_name()=='bigger':
+                player.set_name('mario')
+            
+        if player.get_health()==0:
+            self._lose(player)
+        return True
+
+    def _handle_player_separate_block(self, player: Player, block: Block, data,
+                                      arbiter: pymunk.Arbiter) -> bool:
+        return True
+
+    def _reach_goal(self, player: Player):
+        """Called when the player touches the flag at the goal of the level.
+
+        Parameters:
+            player (Player): The player touching the flag.
+        """
+
+    def _enter_tunnel(self, player: Player):
+        """Called when the player, having ducked, lands on a tunnel.
+
+        Parameters:
+            player (Player): The player entering the tunnel.
+        """
+
+    def _lose(self, player: Player):
+        """Called when a mob takes the player's last health point.
+
+        Parameters:
+            player (Player): The player without health.
+        """
+
+    def _show_invincible(self, invincible: bool):
+        """Called when the player becomes, or stops being, invincible.
+
+        Parameters:
+            invincible (bool): Whether the player is now invincible.
+        """
+
+
+class MarioApp(MarioGame):
+    """High-level app class for Mario, a 2d platformer, played in a tkinter window"""
 
     _world: World
 
-    def __init__(self, master: tk.Tk):
+    def __init__(self, master: tk.Tk, config_file: str = None, watch: bool = False,
+                 threaded: bool = False):
         """Construct a new game of a MarioApp game.
 
         Parameters:
             master (tk.Tk): tkinter root widget
+            config_file (str): The configuration file to load, if None the
+                               player is asked to choose one
+            watch (bool): If True, changes to the current level file are
+                          applied to the running game, see LevelEditor
+            threaded (bool): If True, the world is stepped on its own thread at a
+                             fixed rate and drawn from the frames it publishes,
+                             so slow redraws do not delay physics, see SimulationThread
         """
         
         self._master = master
+        self._watch = watch
+        self._editor = None
+        self._quick_save = None
+        # the simulation stepping the world on its own thread, if threaded; the input
+        # it has been sent, actions it has handed back to tkinter and the frame drawn
+        self._simulation = None
+        self._held = self._sent_held = frozenset()
+        self._pressed = set()
+        self._ui_actions = deque()
+        self._frame = None
+        self._static_view = None
         self._master.update_idletasks()
         #Load configuration file
-        self._config_file=filedialog.askopenfilename()
-        try:
-            self._config_dict=self.load_configuration(self._config_file)
-            self.get_config_values(self._config_dict)
-        except:
-            messagebox.showinfo('Sorry!','The file cannot be parsed.')
-
-        world_builder = WorldBuilder(BLOCK_SIZE, gravity=(0, self._gravity), fallback=create_unknown)
-        world_builder.register_builders(BLOCKS.keys(), create_block)
-        world_builder.register_builders(ITEMS.keys(), create_item)
-        world_builder.register_builders(MOBS.keys(), create_mob)
+        if config_file is None:
+            config_file=filedialog.askopenfilename()
+        self._config_file=config_file
+        self._config=self.load_configuration(self._config_file)
+        self.get_config_values(self._config)
+
+        world_builder = WorldBuilder(BLOCK_SIZE, gravity=(0, self._gravity), fallback=create_unknown,
+                                     collision_rules=self.get_collision_rules())
+        register_entities(world_builder)
  
         self._builder = world_builder
         self._player = Player(name=self._character,max_health=self._health)
+        # the timer ending the player's invincibility, and whether they can throw a fireball
+        self._invincibility=None
+        self._fire_ready=True
         self.reset_world(self._start)
         self._renderer = MarioViewRenderer(BLOCK_IMAGES, ITEM_IMAGES, MOB_IMAGES)
         size = tuple(map(min, zip(MAX_WINDOW_SIZE, self._world.get_pixel_size())))
         self._view = GameView(master, size, self._renderer)
         self._view.pack()
-        self.vx,self.vy=self._player.get_velocity()
         self.bind()
 
         self._filename = self._start 
         
         self._invincible=False
-        self._time_start=None
-        self._time_end=None
         self._switch_pressed=False
         self._tunnel=False
-        self._tunnel_dict=self.get_tunnel_dict()
-        self._list_tunnel=self.get_list_level(self._tunnel_dict)
-        self._level_dict=self.get_next_level_dict()
-        self._list_level=self.get_list_level(self._level_dict)
-        self._last_fire=time.time()
+        self._level_graph=self.create_level_graph(self._config)
 
         #file menu
         menubar = tk.Menu(self._master)
         self._master.config(menu=menubar)
         filemenu = tk.Menu(menubar)
         menubar.add_cascade(label='File', menu=filemenu)
-        filemenu.add_command(label='Load Level', command=self.load_level)
-        filemenu.add_command(label='Reset Level', command=self.reset_level)
+        filemenu.add_command(label='Load Level', command=self._paused(self.load_level))
+        filemenu.add_command(label='Reset Level', command=self._paused(self.reset_level))
+        filemenu.add_command(label='Quick Save', command=self._paused(self.quick_save),
+                             accelerator='F5')
+        filemenu.add_command(label='Quick Load', command=self._paused(self.quick_load),
+                             accelerator='F9')
         filemenu.add_command(label='High Score', command=self.high_score)
         filemenu.add_command(label='Exit', command=self.exit)
+
+        #Player's health and score
+        self._records=Records(self._master,self._player)
         
         # Wait for window to update before continuing
         master.update_idletasks()
-        self.step()
-
-        #Player's health and score       
-        self._records=Records(self._master)
+        if threaded:
+            self._simulation = SimulationThread(self._tick)
+            self._simulation.start()
+            self._present()
+        else:
+            self.step()
+        if self._watch:
+            self._watch_level()
 
     def load_configuration(self,config_file):
-        """Convert a text file into a dictionary.
+        """Load a configuration file, falling back on the default configuration
+           if the file cannot be loaded.
            Parameters:
                config_file (str): A string of text file name.
            Returns:
-               config_dict (dict): A dictionary contains information from text file. 
+               (Config): The validated configuration.
         """
-        config_dict={}
-        with open(config_file) as file:
-            for line in file:
-                line=line.strip()
-                if line.startswith('==') and line.endswith('=='):
-                    dict_key=line[2:-2]
-                    config_dict[dict_key]={}
-                else:
-                    inner_key,_,inner_value=line.partition(':')
-                    inner_key=inner_key.strip()
-                    inner_value=inner_value.strip()
-                    config_dict[dict_key][inner_key]=inner_value
-        return config_dict 
+        try:
+            return load_config(config_file)
+        except ConfigError as error:
+            messagebox.showinfo('Sorry!','The file cannot be parsed.\n{}'.format(error))
+            return load_config(DEFAULT_CONFIG)
 
-    def get_config_values(self,config_dict):
+    def get_config_values(self,config):
         """Get the information from configuration file.
            Parameters:
-               config_dict (dict): A dictionary contains information from text file. 
+               config (Config): The validated configuration.
         """
         #world values
-        self._gravity=float(config_dict['World']['gravity'])
-        self._start=config_dict['World']['start']
+        self._gravity=config.world.gravity
+        self._start=config.world.start
 
         #player values
-        self._character=config_dict['Player']['character']
-        self._x=float(config_dict['Player']['x'])
-        self._y=float(config_dict['Player']['y'])
-        self._mass=float(config_dict['Player']['mass'])
-        self._health=float(config_dict['Player']['health'])
-        self._max_velocity=float(config_dict['Player']['max_velocity'])
-
-        #other values
-        try:
-            #level1
-            self._1_tunnel=config_dict['level1.txt']['tunnel']
-            self._1_goal=config_dict['level1.txt']['goal']
-            #bonus
-            self._bonus_goal=config_dict['bonus.txt']['goal']
-            #level2
-            self._2_tunnel=config_dict['level2.txt']['tunnel']
-            self._2_goal=config_dict['level2.txt']['goal']
-            #small room
-            self._sr_goal=config_dict['small_room.txt']['goal']
-            #level3
-            self._3_goal=config_dict['level3.txt']['goal']
-        except:
-            None
-
-    def get_tunnel_dict(self):
-        """(dict): A dictionary contains information about where the players
-           go if they enter a tunnel.
-        """
-        tunnel_dict={}
-        try:
-            tunnel_dict['level1.txt']=self._1_tunnel
-            tunnel_dict['bonus.txt']=self._bonus_goal
-            tunnel_dict['level2.txt']=self._2_tunnel
-            tunnel_dict['small_room.txt']=self._sr_goal
-        except:
-            None
-        return tunnel_dict
-
-    def get_next_level_dict(self):
-        """(dict): A dictionary contains information about where the players
-           go if they collide a flag.
+        self._character=config.player.character
+        self._x=config.player.x
+        self._y=config.player.y
+        self._mass=config.player.mass
+        self._health=config.player.health
+        self._max_velocity=config.player.max_velocity
+
+    def create_level_graph(self,config):
+        """Build the level graph from the configuration, warning the player
+           about any missing level files.
+           Parameters:
+               config (Config): The validated configuration.
+           Returns:
+               (LevelGraph): The transitions between levels.
         """
-        level_dict={}
+        level_graph=LevelGraph.from_config(config)
         try:
-            level_dict['level1.txt']=self._1_goal
-            level_dict['level2.txt']=self._2_goal
-            level_dict['level3.txt']=self._3_goal
-        except:
-            None
-        return level_dict
+            level_graph.validate()
+        except FileNotFoundError as error:
+            messagebox.showinfo('Sorry!',str(error))
+        return level_graph
 
-    def get_list_level(self,dict):
-        """(List): A list of level name"""
-        list_level=[]
-        for level in dict.keys():
-            list_level.append(level)
-        return list_level        
+    def get_level_graph(self):
+        """(LevelGraph): Returns the transitions between levels."""
+        return self._level_graph
 
     def load_level(self):
         """Load to another level using file menu."""
@@ -1072,19 +1413,35 @@ class MarioApp:
         self._filename=self._filename[-10:]
         try:
             self.reset_world(self._filename)
-            self._records.change_health(self._player)
-            self._records.change_score(self._player)      
         except Exception as e:
             messagebox.showinfo('Sorry!','The file cannot find.')
 
     def reset_level(self):
         """Reset the level using file menu."""
         self.reset_world(self._filename)
-        self._records.change_health(self._player)
-        self._records.change_score(self._player) 
+
+    def quick_save(self):
+        """Save the state of the game, to be returned to by quick_load."""
+        self._quick_save = (self._world, self._filename, self._world.snapshot(),
+                            (self._invincible, self._invincibility, self._switch_pressed,
+                             self._tunnel, self._fire_ready))
+
+    def quick_load(self):
+        """Return the game to the state saved by quick_save, if any."""
+        if self._quick_save is None:
+            return
+
+        world, self._filename, snapshot, state = self._quick_save
+        self._world = world
+        world.restore(snapshot)
+        (self._invincible, self._invincibility, self._switch_pressed,
+         self._tunnel, self._fire_ready) = state
+        self._show_invincible(self._invincible)
 
     def exit(self):
         """Exit the game."""
+        if self._simulation is not None:
+            self._simulation.stop()
         self._master.destroy()
 
     def high_score(self):
@@ -1096,253 +1453,268 @@ class MarioApp:
            Parameters:
                new_level (str): A string of text file name.
         """
+        previous = getattr(self, '_world', None)
         self._world = load_world(self._builder, new_level)
+        self._move_timers(previous)
+        self._edit_level(new_level)
         self._world.add_player(self._player, self._x, self._y,self._mass)
         self._builder.clear()
         self._player.change_health(self._player.get_max_health())
         self._player.reset_score()
-        self._setup_collision_handlers()
 
     def bind(self):
-        """Bind all the keyboard events to their event handlers."""
-        if self.vx>=self._max_velocity or self.vx<=-self._max_velocity:
-            self._master.bind('<a>',lambda e:self._move(-self._max_velocity,self.vy))
-            self._master.bind('<Left>',lambda e:self._move(-self._max_velocity,self.vy))
-            self._master.bind('<d>',lambda e:self._move(self._max_velocity,self.vy))
-            self._master.bind('<Right>',lambda e:self._move(self._max_velocity,self.vy))
+        """Track the keyboard state, which is applied to the player once per step."""
+        self._input = InputState(self._master)
+        self._master.bind('<F5>', lambda e: self._paused(self.quick_save)())
+        self._master.bind('<F9>', lambda e: self._paused(self.quick_load)())
+
+    def _paused(self, action: Callable) -> Callable:
+        """(Callable) Returns a function calling action, which uses the world, while
+        the simulation thread (if any) is paused."""
+        def call(*args):
+            if self._simulation is None:
+                return action(*args)
+            with self._simulation.paused():
+                return action(*args)
+        return call
+
+    def _call_ui(self, action: Callable, *args):
+        """Call action(*args), which uses tkinter (e.g. shows a dialog), from the tkinter thread.
+
+        When the world is stepped on its own thread, the simulation is held
+        until the action has been called by _present, even if other actions
+        pause and resume it meanwhile.
+        """
+        if self._simulation is None:
+            action(*args)
         else:
-            self._master.bind('<a>',lambda e:self._move(self.vx-100,self.vy))
-            self._master.bind('<Left>',lambda e:self._move(self.vx-100,self.vy))
-            self._master.bind('<d>',lambda e:self._move(self.vx+100,self.vy))
-            self._master.bind('<Right>',lambda e:self._move(self.vx+100,self.vy))
-        self._master.bind('<w>',lambda e:self._jump())
-        self._master.bind('<Up>',lambda e:self._jump())
-        self._master.bind('<space>',lambda e:self._jump())
-        self._master.bind('<s>',lambda e:self._duck())
-        self._master.bind('<Down>',lambda e:self._duck())
+            self._simulation.hold()
+            self._ui_actions.append((action, args))
 
     def redraw(self):
         """Redraw all the entities in the game canvas."""
-        self._view.delete(tk.ALL)
+        self._view.clear()
+        self._view.draw_static_layer(self._world)
         self._view.draw_entities(self._world.get_all_things())
 
-    def scroll(self):
+    def scroll(self, x_position: float = None, world_width: float = None):
         """Scroll the view along with the player in the center unless
         they are near the left or right boundaries
+
+        Entities are drawn in world coordinates, so scrolling only moves the
+        visible part of the view's scroll region.
+
+        Parameters:
+            x_position (float): The x coordinate of the player, defaults to their
+                                position in the world
+            world_width (float): The width of the world in pixels, defaults to
+                                 that of the world
         """
-        x_position = self._player.get_position()[0]
+        if x_position is None:
+            x_position = self._player.get_position()[0]
+        if world_width is None:
+            world_width = self._world.get_pixel_size()[0]
         half_screen = self._master.winfo_width() / 2
-        world_size = self._world.get_pixel_size()[0] - half_screen
+        world_size = world_width - half_screen
 
         # Left side
         if x_position <= half_screen:
-            self._view.set_offset((0, 0))
+            self._view.scroll_to(0)
 
         # Between left and right sides
         elif half_screen <= x_position <= world_size:
-            self._view.set_offset((half_screen - x_position, 0))
+            self._view.scroll_to(x_position - half_screen)
 
         # Right side
         elif x_position >= world_size:
-            self._view.set_offset((half_screen - world_size, 0))
+            self._view.scroll_to(world_size - half_screen)
 
     def step(self):
         """Step the world physics and redraw the canvas."""
-        data = (self._world, self._player)
-        self._world.step(data)
-        self.scroll()
+        self._apply_input()
+        self._step_world()
         self.redraw()
+        self.scroll()
+        self._records.refresh()
         self._master.after(10, self.step)
-        #Player invincible timing
-        if self._invincible == True:
-            self._time_end=time.time()
-            if self._time_end-self._time_start>=10:
-                self._invincible=False
-                self._records.change_health(self._player)
-        if self._player.get_name()=='bigger':
-            if time.time()-self._last_fire>=1:
-                x,y=self._player.get_position()
-                vx,vy=self._player.get_velocity()
-                if vx>=0:
-                    fire=Fire()
-                    self._world.add_mob(fire,x+30,y)
-                elif vx<0:
-                    fire=Fire(tempo=-500)
-                    self._world.add_mob(fire,x-30,y)
-                self._last_fire=time.time()
-                
-    def _move(self, dx, dy):
-        """Set velocity for player.
-           Parameters:
-               dx (int): Velocity in the x direction
-               dy (int): Velocity in the y direction
-        """
-        self._player.set_velocity((dx,dy))
 
-    def _jump(self):
-        """Set velocity for player."""
-        self._player.set_velocity((self.vx, self.vy-150))
-        
-    def _duck(self):
-        """Set velocity for player."""
-        self._player.set_velocity((self.vx, self.vy+150))
-        self._tunnel=True
+    def _tick(self) -> World:
+        """Step the world physics on the simulation thread, see SimulationThread.
 
-    def _fire(self):
-        pass
-    
+        Returns:
+            (World): The world stepped, which the simulation publishes a frame of.
+        """
+        held, pressed = self._held, self._pressed
+        self._pressed = set()
+        self._move_player(held, pressed)
+        self._step_world()
+        return self._world
+
+    def _receive_input(self, held, pressed):
+        """Keep the keys sampled on the tkinter thread for the next tick, on the simulation thread."""
+        self._held = held
+        self._pressed |= pressed
+
+    def _present(self):
+        """Send the keyboard input to the simulation thread, call the actions it has
+        handed back and draw its latest frame, then do so again later."""
+        error = self._simulation.get_error()
+        if error is not None:
+            raise error
+
+        held, pressed = self._input.sample()
+        if pressed or held != self._sent_held:
+            self._simulation.submit(self._receive_input, held, pressed)
+            self._sent_held = held
+
+        while self._ui_actions:
+            action, args = self._ui_actions.popleft()
+            try:
+                self._paused(action)(*args)
+            finally:
+                # the hold made when the action was handed back, see _call_ui
+                self._simulation.release()
+        # the game may have been exited by an action
+        if not self._simulation.is_running():
+            return
 
-    def _setup_collision_handlers(self):
-        self._world.add_collision_handler("player", "item", on_begin=self._handle_player_collide_item)
-        self._world.add_collision_handler("player", "block", on_begin=self._handle_player_collide_block,
-                                          on_separate=self._handle_player_separate_block)
-        self._world.add_collision_handler("player", "mob", on_begin=self._handle_player_collide_mob)
-        self._world.add_collision_handler("mob", "block", on_begin=self._handle_mob_collide_block)
-        self._world.add_collision_handler("mob", "mob", on_begin=self._handle_mob_collide_mob)
-        self._world.add_collision_handler("mob", "item", on_begin=self._handle_mob_collide_item)
+        frame = self._simulation.get_frame()
+        if frame is not None and frame is not self._frame:
+            self._draw_frame(frame)
+        self._records.refresh()
+        self._master.after(10, self._present)
 
-    def _handle_mob_collide_block(self, mob: Mob, block: Block, data,
-                                  arbiter: pymunk.Arbiter) -> bool:
-        if mob.get_id() == "fireball":
-            if block.get_id() == "brick":
-                self._world.remove_block(block)
-            self._world.remove_mob(mob)
+    def _draw_frame(self, frame):
+        """Redraw the canvas from a frame published by the simulation thread.
 
-        elif mob.get_id()=='mushroom':
-            if get_collision_direction(mob,block)=='L' or get_collision_direction(mob,block)=='R':
-                tempo=mob.get_tempo()
-                mob.set_tempo(-tempo)
-        elif mob.get_id()=='fire':
-            self._world.remove_mob(mob)
-        return True
-
-    def _handle_mob_collide_item(self, mob: Mob, block: Block, data,
-                                 arbiter: pymunk.Arbiter) -> bool:
-        return False
+        Only the frame is used, never the world, which the simulation thread may
+        be stepping or replacing meanwhile.
+        """
+        if self._frame is None or frame.generation != self._frame.generation:
+            self._static_view = StaticGridView(frame.static_grid)
+        else:
+            self._static_view.show(frame.static_grid)
+        self._frame = frame
+
+        self._view.clear()
+        self._view.draw_static_layer(self._static_view)
+        self._view.draw_entities(frame.create_entities())
+        player = frame.get_thing(self._player)
+        if player is not None:
+            self.scroll(player.get_position()[0], frame.get_pixel_size()[0])
+
+    def _apply_input(self):
+        """Apply the keys held and pressed since the last step to the player."""
+        held, pressed = self._input.sample()
+        self._move_player(held, pressed)
+
+    def _reach_goal(self, player: Player):
+        """Move on to the next level once the world has been stepped, see _reach_flag."""
+        # the level cannot change while the world is stepping
+        self._world.defer(self._call_ui, self._reach_flag, player)
+
+    def _enter_tunnel(self, player: Player):
+        """Move to the level the tunnel leads to, if any, once the world has been stepped."""
+        destination=self._level_graph.get_tunnel(self._filename)
+        if destination==END_LEVEL:
+            return
+        self._filename=destination
+        self._world.defer(self._change_level, self._filename, player)
+        self._tunnel=False
 
-    def _handle_mob_collide_mob(self, mob1: Mob, mob2: Mob, data,
-                                arbiter: pymunk.Arbiter) -> bool:
-        if mob1.get_id() == "fireball" or mob2.get_id() == "fireball":
-            self._world.remove_mob(mob1)
-            self._world.remove_mob(mob2)
-        elif mob1.get_id()=='fire' :
-            self._world.remove_mob(mob1)
-            self._world.remove_mob(mob2)
-        elif mob2.get_id()=='fire':
-            self._world.remove_mob(mob1)
-            self._world.remove_mob(mob2)
-        elif mob1.get_id()=='mushroom' or mob2.get_id()=='mushroom':
-            tempo1=mob1.get_tempo()
-            mob1.set_tempo(-tempo1)
-            tempo2=mob2.get_tempo()
-            mob2.set_tempo(-tempo2)
-        
-        return False
+    def _lose(self, player: Player):
+        """Ask whether to restart once the world has been stepped, see _game_over."""
+        self._world.defer(self._call_ui, self._game_over)
+
+    def _show_invincible(self, invincible: bool):
+        """Show whether the player is invincible in the records."""
+        self._records.set_invincible(invincible)
+
+    def _reach_flag(self, player: Player):
+        """Record the player's score and move on to the goal of the current level."""
+        HighScore(self._filename).get_name(self._filename,player)
+        messagebox.showinfo('Congradulations','We will record you!')
+        self._filename=self._level_graph.get_goal(self._filename)
+        if self._filename==END_LEVEL:
+            messagebox.showinfo('Congratulations!','You have finished the game.')
+            self.exit()
+            return
+        self._change_level(self._filename, player)
 
-    def _handle_player_collide_item(self, player: Player, dropped_item: DroppedItem,
-                                    data, arbiter: pymunk.Arbiter) -> bool:
-        """Callback to handle collision between the player and a (dropped) item. If the player has sufficient space in
-        their to pick up the item, the item will be removed from the game world.
+    def _change_level(self, filename: str, player: Player,
+                      x: float = BLOCK_SIZE, y: float = BLOCK_SIZE):
+        """Replace the world with the level in filename, keeping the player.
 
         Parameters:
-            player (Player): The player that was involved in the collision
-            dropped_item (DroppedItem): The (dropped) item that the player collided with
-            data (dict): data that was added with this collision handler (see data parameter in
-                         World.add_collision_handler)
-            arbiter (pymunk.Arbiter): Data about a collision
-                                      (see http://www.pymunk.org/en/latest/pymunk.html#pymunk.Arbiter)
-                                      NOTE: you probably won't need this
-        Return:
-             bool: False (always ignore this type of collision)
-                   (more generally, collision callbacks return True iff the collision should be considered valid; i.e.
-                   returning False makes the world ignore the collision)
+            filename (str): The level file to load.
+            player (Player): The player to add to the new level.
+            x (float): The x coordinate to add the player at.
+            y (float): The y coordinate to add the player at.
         """
+        previous = self._world
+        self._world = load_world(self._builder, filename)
+        self._move_timers(previous)
+        self._edit_level(filename)
+        self._world.add_player(player, x, y)
+        self._builder.clear()
 
-        dropped_item.collect(self._player)
-        self._world.remove_item(dropped_item)
-        if dropped_item.get_id()=='coin':
-            self._records.change_score(player)
-        elif dropped_item.get_id()=='star':
-            self._records.invincible_health()
-            self._invincible=True 
-            self._time_start=time.time()
-        return False
-
-    def _handle_player_collide_block(self, player: Player, block: Block, data,
-                                     arbiter: pymunk.Arbiter) -> bool:
-        if block.get_id()=='flag':
-            HighScore(self._filename).get_name(self._filename,player)
-            messagebox.showinfo('Congradulations','We will record you!')
-            if self._filename in self._list_level:
-                self._filename=self._level_dict[self._filename]
-                if self._filename=='END':
-                    messagebox.showinfo('Congratulations!','You have finished the game.')
-                    self.exit()
-            else:
-                temp=list(self._filename)
-                temp[5]=str(int(temp[5])+1)
-                self._filename=''.join(temp)  
-            self._world = load_world(self._builder, self._filename)
-            self._world.add_player(player, BLOCK_SIZE, BLOCK_SIZE)
-            self._builder.clear()
-            self._setup_collision_handlers()
-            if get_collision_direction(player, block) == "A":
-                player = Player(player.get_max_health()+1)
-                player.change_health(1)
+    def _move_timers(self, previous: World):
+        """Schedule the app's timers on the world which has just replaced the previous
+        world, for the time they had left on it.
 
-        elif block.get_id()=='tunnel':
-            if get_collision_direction(player, block) == "A":
-                if self._tunnel==True:
-                    if self._filename in self._list_tunnel:
-                        self._filename=self._tunnel_dict[self._filename]
-                    else:
-                        temp=list(self._filename)
-                        temp[5]=str(int(temp[5])+1)
-                        self._filename=''.join(temp)
-                    self._world = load_world(self._builder, self._filename)
-                    self._world.add_player(player, BLOCK_SIZE, BLOCK_SIZE)
-                    self._builder.clear()
-                    self._setup_collision_handlers()
-                    self._tunnel=False
-           
-        elif block.get_id()=='switch':
-            block.on_hit(arbiter, (self._world, player))
-            if block.is_active()==False:
-                self._switch_pressed=True
-                return False
-        else:
-            block.on_hit(arbiter, (self._world, player))    
-        return True
+        Parameters:
+            previous (World): The replaced world, or None if there was none.
+        """
+        if self._invincibility is not None and self._invincibility.is_active():
+            remaining = self._invincibility.get_due() - previous.get_time()
+            self._invincibility = self._world.schedule(remaining, self._end_invincibility)
+        # the cooldown timer is never called on a world which is no longer stepped
+        self._fire_ready = True
+
+    def _edit_level(self, filename: str):
+        """Start watching the level file the world was just built from, if watching."""
+        if self._watch:
+            self._editor = LevelEditor(self._builder, self._world, filename)
+
+    def _watch_level(self):
+        """Apply any changes made to the current level file, then check again later.
+
+        If the level has grown beyond the size of the world, the level is
+        rebuilt instead, keeping the player where they are.
+        """
+        self._master.after(WATCH_INTERVAL, self._watch_level)
+        editor = self._editor
+        if editor is None or editor.get_world() is not self._world:
+            return
 
-    def _handle_player_collide_mob(self, player: Player, mob: Mob, data,
-                                   arbiter: pymunk.Arbiter) -> bool:
-        if self._invincible==True:
-            self._world.remove_mob(mob)
-        elif mob.get_id()=='fire':
-            return False
+        try:
+            self._paused(editor.check)()
+        except ValueError:
+            self._paused(self._change_level)(self._filename, self._player,
+                                             *self._player.get_position())
+
+    def _game_over(self):
+        """Ask the player whether to restart the level, otherwise exit."""
+        ans=messagebox.askyesno('GameOver','Would you like to restar?')
+        if ans==True:
+            self.reset_level()
         else:
-            mob.on_hit(arbiter, (self._world, player))   
-            self._records.change_health(player)
-            if player.get_name()=='bigger':
-                player.set_name('mario')
-            
-        if player.get_health()==0:
-            ans=messagebox.askyesno('GameOver','Would you like to restar?')
-            if ans==True:
-                self.reset_level()
-            else:
-                self.exit()      
-        return True
-
-    def _handle_player_separate_block(self, player: Player, block: Block, data,
-                                      arbiter: pymunk.Arbiter) -> bool:
-        return True
+            self.exit()
 
 def main():
+    parser = argparse.ArgumentParser(description='Mario, a 2d platformer')
+    parser.add_argument('--config', help='the configuration file to load, '
+                                         'chosen in a file dialog if not given')
+    parser.add_argument('--watch', action='store_true',
+                        help='apply changes to the current level file while playing')
+    parser.add_argument('--threaded', action='store_true',
+                        help='step the physics on its own thread, at a fixed rate')
+    args = parser.parse_args()
+
     # create window for game
     root = tk.Tk()
     root.title('Mario')
-    app = MarioApp(root)
+    app = MarioApp(root, config_file=args.config, watch=args.watch, threaded=args.threaded)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""Benchmarks for the CSSE1001 Game Engine
+
+Each module in this package can be run from the repository root, e.g.
+    python -m benchmarks.memory
+
+The benchmarks build worlds headlessly (without opening a tkinter window) so
+they can be run on machines without a display.
+"""
@@ -0,0 +1,69 @@
+"""
+Benchmark of the physics broadphase and solver options of World.
+
+Compares the default bounding box tree with a spatial hash, and the effect of
+the solver iterations and collision slop, on the bundled levels and on
+synthetic wide and crowded levels.
+
+    python -m benchmarks.broadphase
+"""
+
+import os
+import random
+import tempfile
+
+from benchmarks.common import build_world, write_wide_level, timed
+from benchmarks.mobs import build_crowded_world
+
+STEPS = 200
+
+OPTIONS = {
+    "tree": {},
+    "hash": {"spatial_hash": True},
+    "tree, 5 iterations": {"iterations": 5},
+    "hash, 5 iterations": {"spatial_hash": True, "iterations": 5},
+    "hash, slop 0.5": {"spatial_hash": True, "collision_slop": 0.5},
+}
+
+
+def run(world, player):
+    data = (world, player)
+    for _ in range(STEPS):
+        world.step(data)
+
+
+def level_world(filename):
+    """(callable) Returns a function building the level in filename with the given options"""
+    return lambda **options: build_world(filename, **options)
+
+
+def crowded_world(mobs):
+    """(callable) Returns a function building a world crowded with mobs with the given options"""
+    return lambda **options: build_crowded_world(mobs, batch_mobs=True, **options)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        wide = os.path.join(directory, "wide.txt")
+        write_wide_level("level1.txt", wide, 20)
+
+        levels = {
+            "level1.txt": level_world("level1.txt"),
+            "level2.txt": level_world("level2.txt"),
+            "level1.txt x20": level_world(wide),
+            "1000 mobs": crowded_world(1000),
+        }
+
+        print("milliseconds per step")
+        print(f"{'level':<16}" + "".join(f"{name:>20}" for name in OPTIONS))
+        for name, build in levels.items():
+            results = []
+            for options in OPTIONS.values():
+                random.seed(0)
+                world, player = build(**options)
+                results.append(timed(run, world, player))
+            print(f"{name:<16}" + "".join(f"{result / STEPS * 1000:>20.3f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark of building worlds from large generated levels, comparing adding
+each entity's shape to the physics space as it is built with inserting every
+shape at once (WorldBuilder.build(bulk=True), see World.bulk_add), and the
+same bulk build with the cyclic garbage collector left running, to show the
+gain of pausing it on its own.
+
+    python -m benchmarks.build
+"""
+
+import contextlib
+import os
+import tempfile
+from unittest import mock
+
+import level
+from generator import generate_level, write_level
+from level import load_world
+
+from benchmarks.common import create_builder, timed
+
+WIDTHS = (2000, 8000, 32000)
+
+
+def build_each(builder):
+    world = builder.build(bulk=False)
+    # otherwise the shapes of static blocks are only added on the first step
+    world._update_static_shapes()
+    return world
+
+
+def build_collecting(builder):
+    """Build in bulk without pausing the garbage collector"""
+    with mock.patch.object(level, "_paused_gc", contextlib.nullcontext):
+        return builder.build(bulk=True)
+
+
+def main():
+    print(f"{'columns':>8}{'things':>10}{'per entity ms':>16}{'bulk, gc on ms':>16}{'bulk ms':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width in WIDTHS:
+            filename = os.path.join(directory, f"level_{width}.txt")
+            # dense with entities that are not static blocks, which have their own shapes
+            write_level(filename, generate_level(width, mob_density=0.1, coin_density=0.3,
+                                                 mystery_frequency=0.2, bounce_frequency=0.1,
+                                                 seed=width))
+
+            # the builder keeps the level's entities, so can build the level again
+            builder = create_builder(batch_mobs=True)
+            things = sum(1 for _ in load_world(builder, filename).get_all_things())
+            each = timed(build_each, builder, repeat=3)
+            collecting = timed(build_collecting, builder, repeat=3)
+            bulk = timed(builder.build, True, repeat=3)
+            print(f"{width:>8}{things:>10}{each * 1e3:>16.1f}{collecting * 1e3:>16.1f}"
+                  f"{bulk * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
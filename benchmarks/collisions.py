@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of the overhead of World collision callbacks.
+
+Steps a world of mobs walking on a floor, with a no-op pre_solve callback for
+mob/block collisions, which is called for every contact on every step. The
+per-callback overhead is the extra step time divided by the number of calls,
+and is compared for:
+    - the previous wrapper, which built a list of the colliding things and
+      looked up its data through the pymunk handler's data dictionary
+    - the wrapper installed by a CollisionRule
+
+    python -m benchmarks.collisions
+"""
+
+import app
+from game.world import World, CollisionRule
+from player import Player
+
+from benchmarks.common import timed
+
+STEPS = 200
+MOBS = 500
+
+
+def legacy_wrap(world, callback):
+    """Wrap a callback as World did before collision rules were added"""
+    def wrapped_callback(arbiter, space, data):
+        thing_a, thing_b = [s.object for s in arbiter.shapes]
+        if thing_a is None:
+            shape_a, shape_b = arbiter.shapes
+            thing_a = world._resolve_static_shape(shape_a, shape_b.bb.center().x)
+        elif thing_b is None:
+            shape_a, shape_b = arbiter.shapes
+            thing_b = world._resolve_static_shape(shape_b, shape_a.bb.center().x)
+        return callback(thing_a, thing_b, data['data'], arbiter)
+
+    return wrapped_callback
+
+
+def build_world(handler, counter):
+    """Build a world of walking mobs with the given kind of mob/block handler.
+
+    Parameters:
+        handler (str): None, "legacy" or "rule"
+        counter (list<int>): Incremented by each callback
+    """
+    def on_pre_solve(mob, block, data, arbiter):
+        counter[0] += 1
+        return True
+
+    rules = []
+    if handler == "rule":
+        rules.append(CollisionRule("mob", "block", on_pre_solve=on_pre_solve))
+
+    columns, rows = MOBS * 2 + 20, 10
+    world = World((columns, rows), app.BLOCK_SIZE, batch_mobs=True, collision_rules=rules)
+    if handler == "legacy":
+        pymunk_handler = world._space.add_collision_handler(world._collision_types["mob"],
+                                                            world._collision_types["block"])
+        pymunk_handler.data['data'] = None
+        pymunk_handler.pre_solve = legacy_wrap(world, on_pre_solve)
+
+    for column in range(columns):
+        world.add_static_block_to_grid("brick_base", column, rows - 1)
+    for index in range(MOBS):
+        world.add_mob(app.Mushroom(world), (index * 2 + 10) * app.BLOCK_SIZE,
+                      (rows - 2) * app.BLOCK_SIZE)
+    world.add_player(Player("mario"), app.BLOCK_SIZE // 2, (rows - 2) * app.BLOCK_SIZE)
+    return world
+
+
+def run(world):
+    data = (world, next(thing for thing in world.get_all_things() if isinstance(thing, Player)))
+    for _ in range(STEPS):
+        world.step(data)
+
+
+def main():
+    counter = [0]
+    baseline = timed(run, build_world(None, counter), repeat=3)
+
+    print(f"{'handler':<10}{'calls/step':>12}{'ms/step':>10}{'us/callback':>14}")
+    print(f"{'none':<10}{0:>12}{baseline / STEPS * 1000:>10.3f}{'':>14}")
+    for handler in ("legacy", "rule"):
+        counter[0] = 0
+        world = build_world(handler, counter)
+        elapsed = timed(run, world, repeat=3)
+        calls = counter[0] / 3
+        overhead = (elapsed - baseline) / calls * 1e6 if calls else 0
+        print(f"{handler:<10}{calls / STEPS:>12.0f}{elapsed / STEPS * 1000:>10.3f}{overhead:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared helpers for constructing game worlds in the benchmarks.
+"""
+
+import time
+
+import app
+from level import load_world, WorldBuilder
+from player import Player
+
+
+def create_builder(gravity: float = 300, **world_options) -> WorldBuilder:
+    """Construct a world builder with the same builders as MarioApp.
+
+    Parameters:
+        gravity (float): The vertical gravity of built worlds.
+        **world_options: Additional keyword arguments for the built worlds.
+    """
+    builder = WorldBuilder(app.BLOCK_SIZE, gravity=(0, gravity), fallback=app.create_unknown,
+                           **world_options)
+    app.register_entities(builder)
+    return builder
+
+
+def build_world(filename: str, gravity: float = 300, **world_options):
+    """Build the level in filename and add a player to it.
+
+    Returns:
+        (tuple<World, Player>): The built world and its player.
+    """
+    builder = create_builder(gravity, **world_options)
+    world = load_world(builder, filename)
+    player = Player("mario", max_health=5)
+    world.add_player(player, app.BLOCK_SIZE, app.BLOCK_SIZE)
+    return world, player
+
+
+def write_wide_level(source: str, destination: str, copies: int):
+    """Write a level made of 'copies' horizontal repeats of the source level.
+
+    Parameters:
+        source (str): The level file to repeat.
+        destination (str): The file to write the wide level into.
+        copies (int): The number of times to repeat the source level.
+    """
+    with open(source) as file:
+        lines = [line.rstrip('\n') for line in file]
+
+    width = max(len(line) for line in lines)
+    with open(destination, 'w') as file:
+        for line in lines:
+            file.write(line.ljust(width) * copies + '\n')
+
+
+def timed(function, *args, repeat: int = 1):
+    """(float) Returns the best wall time in seconds of calling function(*args)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,85 @@
+"""
+Benchmark of filtering out collisions between things that never interact.
+
+Steps a world of mobs walking along a floor covered in coins, with the
+collision rules of MarioApp counting every callback. It compares:
+    - the world before shape filter masks were added, where mobs and items
+      collide, and a mob/item callback ignores every such collision
+    - the default world, where the shapes of mobs and items are masked out of
+      each other's filters (see IGNORED_CATEGORY_PAIRS), so their collisions
+      never leave pymunk's broadphase
+
+    python -m benchmarks.filters
+"""
+
+import app
+from game.item import Coin
+from game.world import World, CollisionRule, STEP_SIZE
+from player import Player
+
+from benchmarks.common import timed
+
+STEPS = 200
+MOBS = 300
+COLUMNS = 1200
+ROWS = 10
+
+
+def counted(counter, key, result):
+    """(callable) Returns a collision callback counting its calls under key"""
+    def callback(thing_a, thing_b, data, arbiter):
+        counter[key] = counter.get(key, 0) + 1
+        return result
+
+    return callback
+
+
+def build_world(filtered, counter):
+    """Build a world of mobs walking over coins.
+
+    Parameters:
+        filtered (bool): If False, mobs and items are not filtered out of each
+                         other's collisions, and are ignored by a callback instead
+        counter (dict<str: int>): The number of calls of each callback
+    """
+    rules = [
+        CollisionRule("player", "item", on_begin=counted(counter, "player/item", False)),
+        CollisionRule("player", "block", on_begin=counted(counter, "player/block", True)),
+        CollisionRule("player", "mob", on_begin=counted(counter, "player/mob", True)),
+        CollisionRule("mob", "block", on_begin=counted(counter, "mob/block", True)),
+        CollisionRule("mob", "mob", on_begin=counted(counter, "mob/mob", False)),
+        CollisionRule("mob", "item", on_begin=counted(counter, "mob/item", False)),
+    ]
+
+    world = World((COLUMNS, ROWS), app.BLOCK_SIZE, batch_mobs=True, collision_rules=rules,
+                  ignored_pairs=None if filtered else ())
+    floor = ROWS - 1
+    with world.bulk_add():
+        for column in range(COLUMNS):
+            world.add_static_block_to_grid("brick_base", column, floor)
+            world.add_item(Coin("coin"), *world.grid_to_xy_centre(column, floor - 1))
+        for index in range(MOBS):
+            world.add_mob(app.Mushroom(world), *world.grid_to_xy_centre(index * 4 + 2, floor - 2))
+    world.add_player(Player("mario"), app.BLOCK_SIZE // 2, app.BLOCK_SIZE // 2)
+    return world
+
+
+def run(world):
+    data = (world, next(thing for thing in world.get_all_things() if isinstance(thing, Player)))
+    for _ in range(STEPS):
+        world.step(data)
+
+
+def main():
+    print(f"{'world':<12}{'calls/step':>12}{'mob/item':>10}{'calls/s':>10}{'ms/step':>10}")
+    for name, filtered in (("unfiltered", False), ("filtered", True)):
+        counter = {}
+        elapsed = timed(run, build_world(filtered, counter))
+        calls = sum(counter.values())
+        # calls per second of simulated time
+        print(f"{name:<12}{calls / STEPS:>12.1f}{counter.get('mob/item', 0) / STEPS:>10.1f}"
+              f"{calls / (STEPS * STEP_SIZE):>10.0f}{elapsed / STEPS * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
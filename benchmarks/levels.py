@@ -0,0 +1,60 @@
+"""
+Benchmark of parsing, building and stepping generated levels of increasing
+width and mob density, to show how the engine scales with level size and
+entity count.
+
+    python -m benchmarks.levels
+"""
+
+import os
+import tempfile
+
+import app
+from game.mob import Mob
+from generator import generate_level, write_level
+from level import load_world, parse_level
+from player import Player
+
+from benchmarks.common import create_builder, timed
+
+STEPS = 100
+
+WIDTHS = (150, 500, 2000, 8000)
+MOB_DENSITIES = (0.02, 0.1, 0.3)
+
+
+def build(filename):
+    world = load_world(create_builder(batch_mobs=True), filename)
+    player = Player("mario", max_health=5)
+    world.add_player(player, app.BLOCK_SIZE, app.BLOCK_SIZE)
+    return world, player
+
+
+def run(world, player):
+    data = (world, player)
+    for _ in range(STEPS):
+        world.step(data)
+
+
+def main():
+    print(f"{'columns':>8}{'mob density':>14}{'things':>10}{'mobs':>8}"
+          f"{'parse ms':>10}{'build ms':>10}{'ms/step':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width in WIDTHS:
+            for density in MOB_DENSITIES:
+                filename = os.path.join(directory, f"level_{width}_{density}.txt")
+                write_level(filename, generate_level(width, mob_density=density, seed=width))
+
+                parse_time = timed(parse_level, filename, repeat=3)
+                build_time = timed(build, filename, repeat=3)
+                world, player = build(filename)
+                things = list(world.get_all_things())
+                mobs = sum(isinstance(thing, Mob) for thing in things)
+                step_time = timed(run, world, player) / STEPS
+
+                print(f"{width:>8}{density:>14}{len(things):>10}{mobs:>8}"
+                      f"{parse_time * 1e3:>10.2f}{build_time * 1e3:>10.1f}{step_time * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
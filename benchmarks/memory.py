@@ -0,0 +1,139 @@
+"""
+Memory benchmark for game entities.
+
+Reports the footprint of a single instance of each entity class, next to that
+of an equivalent class without __slots__ (see unslotted), which stores the
+same attributes in a per-instance __dict__ as the entities did before
+__slots__ were declared.
+
+Also reports the memory allocated while building the bundled and synthetic
+wide levels, after building a level once so that one-time allocations (e.g.
+imports and caches) are not counted, next to an estimate without __slots__:
+the same total plus the difference in footprint of each of the level's things.
+
+    python -m benchmarks.memory
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+import types
+from collections import Counter
+
+import app
+from game.block import Block, MysteryBlock
+from game.item import Coin
+from game.mob import Mob, CloudMob, Fireball
+from player import Player
+
+from benchmarks.common import build_world, write_wide_level
+
+SAMPLES = 10000
+
+# The class of each entity, and the arguments it is constructed with
+ENTITIES = [
+    (Block, ("brick",), {}),
+    (MysteryBlock, (), {"drop": "coin", "drop_range": (3, 6)}),
+    (app.Switch, (), {"radius": 3}),
+    (app.Bounce, (), {}),
+    (app.Flagpole, (), {}),
+    (app.Tunnel, (), {}),
+    (Mob, ("mob",), {"size": (1, 1)}),
+    (CloudMob, (), {}),
+    (Fireball, (), {}),
+    (app.Mushroom, (None,), {}),
+    (app.Fire, (), {}),
+    (Coin, (), {}),
+    (app.Star, (), {}),
+    (app.Flower, (), {}),
+    (Player, (), {}),
+]
+
+# The classes without __slots__ equivalent to each class, see unslotted
+_UNSLOTTED = {object: object}
+
+
+def unslotted(cls: type) -> type:
+    """(type) Returns a copy of a class, and of each of its bases, without __slots__
+
+    Methods using super() are rebound to the copy, so instances of the copy are
+    constructed exactly as instances of the class are.
+    """
+    copy = _UNSLOTTED.get(cls)
+    if copy is not None:
+        return copy
+
+    slots = cls.__dict__.get("__slots__", ())
+    if isinstance(slots, str):
+        slots = (slots,)
+    namespace = {name: value for name, value in cls.__dict__.items()
+                 if name not in slots and name not in ("__slots__", "__dict__", "__weakref__")}
+    copy = _UNSLOTTED[cls] = type(cls.__name__, tuple(unslotted(base) for base in cls.__bases__),
+                                  namespace)
+
+    # the implicit __class__ cell of super() refers to the original class
+    cell = types.CellType(copy)
+    for name, value in namespace.items():
+        function = value.__func__ if isinstance(value, (classmethod, staticmethod)) else value
+        if not isinstance(function, types.FunctionType) or "__class__" not in function.__code__.co_freevars:
+            continue
+        closure = tuple(cell if free == "__class__" else old
+                        for free, old in zip(function.__code__.co_freevars, function.__closure__))
+        rebound = types.FunctionType(function.__code__, function.__globals__, function.__name__,
+                                     function.__defaults__, closure)
+        rebound.__kwdefaults__ = function.__kwdefaults__
+        setattr(copy, name, type(value)(rebound) if function is not value else rebound)
+    return copy
+
+
+def measure(function, *args):
+    """(tuple<object, int>) Returns the result of function(*args) and the bytes it allocated."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def entity_footprint(cls: type, args: tuple, kwargs: dict) -> float:
+    """(float) Returns the average number of bytes allocated per entity."""
+    entities, size = measure(lambda: [cls(*args, **kwargs) for _ in range(SAMPLES)])
+    # exclude the list holding the entities
+    return (size - sys.getsizeof(entities)) / SAMPLES
+
+
+def main():
+    # the bytes saved per entity of each class by __slots__
+    savings = {}
+    print(f"{'entity':<14}{'bytes':>10}{'no slots':>10}{'saved':>8}")
+    for cls, args, kwargs in ENTITIES:
+        slotted = entity_footprint(cls, args, kwargs)
+        baseline = entity_footprint(unslotted(cls), args, kwargs)
+        savings[cls] = baseline - slotted
+        print(f"{cls.__name__:<14}{slotted:>10.1f}{baseline:>10.1f}{savings[cls]:>8.1f}")
+
+    print()
+    print(f"{'level':<24}{'things':>8}{'KiB':>12}{'no slots (est.)':>18}")
+    # build once, so one-time allocations are not counted in the first level
+    build_world("level1.txt")
+    with tempfile.TemporaryDirectory() as directory:
+        levels = ["level1.txt", "level2.txt"]
+        for copies in (10, 50):
+            wide = os.path.join(directory, f"level1_x{copies}.txt")
+            write_wide_level("level1.txt", wide, copies)
+            levels.append(wide)
+
+        for level in levels:
+            (world, player), size = measure(build_world, level)
+            counts = Counter(type(thing) for thing in world.get_all_things())
+            baseline = size + sum(savings.get(cls, 0) * count for cls, count in counts.items())
+            print(f"{os.path.basename(level):<24}{sum(counts.values()):>8}{size / 1024:>12.1f}"
+                  f"{baseline / 1024:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
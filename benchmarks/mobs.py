@@ -0,0 +1,96 @@
+"""
+Benchmark of stepping worlds crowded with mobs, comparing per-mob stepping
+with the batched NumPy mob update (World(batch_mobs=True)).
+
+Reports the time of the mob update alone and of a whole World.step. The
+batch only speeds up the mob update from about a hundred mobs, and the whole
+step stays dominated by pymunk, so it gains little even with thousands of
+mobs (e.g. 8.8 ms each against 8.1 ms batched with 1000) and loses with the
+tens of mobs of a level. MarioApp therefore leaves batching off.
+
+    python -m benchmarks.mobs
+"""
+
+import random
+
+import app
+from game.mob import Mob, CloudMob
+from game.world import World
+from player import Player
+
+from benchmarks.common import timed
+
+STEPS = 200
+
+
+def build_crowded_world(mobs: int, batch_mobs: bool, **world_options):
+    """Build a flat world containing 'mobs' mushrooms and clouds.
+
+    Parameters:
+        mobs (int): The number of mobs in the world.
+        batch_mobs (bool): Whether the world steps mobs in a batch.
+        **world_options: Additional keyword arguments for the world.
+
+    Returns:
+        (tuple<World, Player>): The built world and its player.
+    """
+    columns, rows = mobs + 20, 20
+    world = World((columns, rows), app.BLOCK_SIZE, batch_mobs=batch_mobs, **world_options)
+    for column in range(columns):
+        world.add_static_block_to_grid("brick_base", column, rows - 1)
+
+    player = Player("mario", max_health=5)
+    world.add_player(player, app.BLOCK_SIZE // 2, (rows - 2) * app.BLOCK_SIZE)
+
+    for index in range(mobs):
+        x = (index + 10) * app.BLOCK_SIZE
+        if index % 4:
+            world.add_mob(app.Mushroom(world), x, (rows - 2) * app.BLOCK_SIZE)
+        else:
+            world.add_mob(CloudMob(), x, 2 * app.BLOCK_SIZE)
+    return world, player
+
+
+def run(world, player):
+    data = (world, player)
+    for _ in range(STEPS):
+        world.step(data)
+
+
+def update_each(mobs, player):
+    data = (None, player)
+    for _ in range(STEPS):
+        for mob in mobs:
+            mob.step(0, data)
+
+
+def update_batch(batch, player):
+    data = (None, player)
+    for _ in range(STEPS):
+        batch.step(0, data)
+
+
+def main():
+    print("milliseconds per step")
+    print(f"{'mobs':>6}{'update each':>14}{'update batch':>14}{'step each':>14}{'step batch':>14}")
+    for count in (10, 100, 500, 1000, 5000):
+        world, player = build_crowded_world(count, batch_mobs=False)
+        # keep clouds out of firing range so no mobs are spawned
+        mobs = [mob for mob in world.get_all_things() if isinstance(mob, Mob)]
+        each = timed(update_each, mobs, player)
+
+        world, player = build_crowded_world(count, batch_mobs=True)
+        batched = timed(update_batch, world._mob_batch, player)
+
+        steps = []
+        for batch_mobs in (False, True):
+            random.seed(0)
+            world, player = build_crowded_world(count, batch_mobs)
+            steps.append(timed(run, world, player))
+
+        results = [each, batched] + steps
+        print(f"{count:>6}" + "".join(f"{result / STEPS * 1000:>14.3f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of headless (software) rendering of frames with game.software.
+
+Steps the bundled levels, rendering every step into the frame buffer, and
+reports the time to render and to write the frame sequence to disk.
+
+    python -m benchmarks.render [directory]
+
+Frames are written to a temporary directory unless one is given.
+"""
+
+import sys
+import tempfile
+import time
+
+import app
+from game.software import SoftwareImages, FrameRenderer, FrameWriter
+
+from benchmarks.common import build_world
+
+FRAMES = 200
+FRAME_SIZE = (1080, 240)
+
+
+class HeadlessRenderer(SoftwareImages, app.MarioViewRenderer):
+    """The game's view renderer, drawing PIL images instead of tkinter images"""
+
+
+def render_level(filename, directory):
+    """Render and write FRAMES frames of a level, following the player.
+
+    Returns:
+        (tuple<float, float>): The seconds spent rendering, and writing, frames.
+    """
+    world, player = build_world(filename)
+    renderer = FrameRenderer(HeadlessRenderer(app.BLOCK_IMAGES, app.ITEM_IMAGES, app.MOB_IMAGES),
+                             FRAME_SIZE)
+    player.set_velocity((120, 0))
+    data = (world, player)
+
+    rendering = writing = 0
+    with FrameWriter(directory, prefix=filename.replace('.txt', '_')) as writer:
+        for _ in range(FRAMES):
+            world.step(data)
+            left = max(player.get_position()[0] - FRAME_SIZE[0] / 2, 0)
+
+            start = time.perf_counter()
+            frame = renderer.render(world, left)
+            rendering += time.perf_counter() - start
+
+            start = time.perf_counter()
+            writer.write(frame)
+            writing += time.perf_counter() - start
+
+        start = time.perf_counter()
+    writing += time.perf_counter() - start
+    return rendering, writing
+
+
+def main(directory=None):
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = directory or temporary
+        print(f"{'level':<12}{'render ms/frame':>18}{'write ms/frame':>18}")
+        for filename in ("level1.txt", "level2.txt"):
+            rendering, writing = render_level(filename, directory)
+            print(f"{filename:<12}{rendering / FRAMES * 1000:>18.3f}{writing / FRAMES * 1000:>18.3f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
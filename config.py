@@ -0,0 +1,208 @@
+"""Loading and validation of game configuration files.
+
+A configuration file is made up of sections. Each section starts with a
+==Name== header line, followed by 'key : value' lines, e.g.
+
+    ==World==
+    gravity : 300
+    start : level1.txt
+
+The World and Player sections are required. Every other section describes a
+level, named after its level file, and may give the level reached through the
+level's tunnel and goal (flag).
+"""
+
+__version__ = "1.1.0"
+
+import os
+from typing import Dict, NamedTuple, Optional
+
+
+class ConfigError(Exception):
+    """Raised when a configuration file cannot be parsed or is invalid."""
+
+
+class WorldConfig(NamedTuple):
+    """The ==World== section of a configuration file."""
+    gravity: float
+    start: str
+
+
+class PlayerConfig(NamedTuple):
+    """The ==Player== section of a configuration file."""
+    character: str
+    x: float
+    y: float
+    mass: float
+    health: float
+    max_velocity: float
+
+
+class LevelConfig(NamedTuple):
+    """A per-level section of a configuration file."""
+    tunnel: Optional[str] = None
+    goal: Optional[str] = None
+
+
+# The schema of the required sections, their fields and field types are
+# given by the annotations of each NamedTuple
+SECTIONS = {
+    "World": WorldConfig,
+    "Player": PlayerConfig,
+}
+
+
+class Config:
+    """A parsed and validated configuration file."""
+
+    def __init__(self, world: WorldConfig, player: PlayerConfig,
+                 levels: Dict[str, LevelConfig]):
+        """Construct a new configuration.
+
+        Parameters:
+            world (WorldConfig): The world section.
+            player (PlayerConfig): The player section.
+            levels (dict<str: LevelConfig>): The level sections, keyed by level file.
+        """
+        self.world = world
+        self.player = player
+        self.levels = levels
+
+    def get_level(self, level: str) -> LevelConfig:
+        """(LevelConfig) Returns the section of the given level file.
+
+        Levels without a section have neither a tunnel nor a goal.
+        """
+        return self.levels.get(level, LevelConfig())
+
+    def __repr__(self):
+        return f"Config({self.world!r}, {self.player!r}, {self.levels!r})"
+
+
+def parse_config(text: str, filename: str = "<config>") -> Dict[str, Dict[str, str]]:
+    """Parse the sections of a configuration file, without validating them.
+
+    Parameters:
+        text (str): The contents of the configuration file.
+        filename (str): The name of the file, used in error messages.
+
+    Returns:
+        (dict<str: dict<str: str>>): The key/value pairs of each section.
+
+    Raises:
+        ConfigError: If the text is not in the configuration file format.
+    """
+    sections = {}
+    section = None
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith('==') and line.endswith('==') and len(line) > 4:
+            name = line[2:-2].strip()
+            if name in sections:
+                raise ConfigError(f"{filename}:{number}: duplicate section {name!r}")
+            section = sections[name] = {}
+            continue
+
+        key, separator, value = line.partition(':')
+        key = key.strip()
+        if section is None:
+            raise ConfigError(f"{filename}:{number}: {key!r} is not within a section")
+        if not separator or not key:
+            raise ConfigError(f"{filename}:{number}: expected 'key : value', not {line!r}")
+        section[key] = value.strip()
+
+    return sections
+
+
+def _convert_section(name: str, values: Dict[str, str], schema) -> NamedTuple:
+    """Convert the values of a section to the field types of its schema.
+
+    Parameters:
+        name (str): The name of the section.
+        values (dict<str: str>): The raw values of the section.
+        schema (type): The NamedTuple class describing the section.
+
+    Raises:
+        ConfigError: If a field is unknown, missing or has an invalid value.
+    """
+    fields = schema.__annotations__
+    unknown = values.keys() - fields.keys()
+    if unknown:
+        raise ConfigError(f"Unknown keys in section {name!r}: {', '.join(sorted(unknown))}")
+
+    converted = {}
+    for field, field_type in fields.items():
+        if field not in values:
+            if field not in schema._field_defaults:
+                raise ConfigError(f"Missing key {field!r} in section {name!r}")
+            continue
+
+        # Optional[str] fields are plain strings
+        convert = field_type if field_type in (float, int) else str
+        try:
+            converted[field] = convert(values[field])
+        except ValueError:
+            raise ConfigError(f"{field!r} in section {name!r} must be a {convert.__name__}, "
+                              f"not {values[field]!r}") from None
+
+    return schema(**converted)
+
+
+def validate_config(sections: Dict[str, Dict[str, str]]) -> Config:
+    """Validate parsed sections against the configuration schema.
+
+    Parameters:
+        sections (dict<str: dict<str: str>>): The sections from parse_config.
+
+    Raises:
+        ConfigError: If any section is missing or invalid.
+    """
+    for name in SECTIONS:
+        if name not in sections:
+            raise ConfigError(f"Missing section {name!r}")
+
+    world = _convert_section("World", sections["World"], WorldConfig)
+    player = _convert_section("Player", sections["Player"], PlayerConfig)
+    levels = {name: _convert_section(name, values, LevelConfig)
+              for name, values in sections.items() if name not in SECTIONS}
+
+    return Config(world, player, levels)
+
+
+# Configurations that have already been loaded, keyed by file path and modification time
+_cache = {}
+
+
+def load_config(filename: str) -> Config:
+    """Load, parse and validate a configuration file.
+
+    The result is cached until the file is modified.
+
+    Parameters:
+        filename (str): The configuration file to load.
+
+    Raises:
+        ConfigError: If the file cannot be read or is invalid.
+    """
+    path = os.path.abspath(filename)
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+        config = _cache.get(key)
+        if config is None:
+            with open(path) as file:
+                text = file.read()
+    except OSError as error:
+        raise ConfigError(f"Unable to read {filename!r}: {error.strerror}") from None
+
+    if config is None:
+        config = validate_config(parse_config(text, filename))
+
+        # forget any older versions of this file
+        for cached in [cached for cached in _cache if cached[0] == path]:
+            del _cache[cached]
+        _cache[key] = config
+
+    return config
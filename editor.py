@@ -0,0 +1,178 @@
+"""Live reloading of level files while the game is running.
+
+A LevelEditor watches the level file a world was built from. When the file is
+modified, the old and new levels are compared cell by cell, and only the
+entities of the changed cells are removed from or added to the running world.
+The player, and any entity in an unchanged cell, is left as it is.
+"""
+
+__version__ = "1.1.0"
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from game.block import Block
+from game.entity import BoundaryWall, Entity
+from game.world import World
+from level import WorldBuilder, load_level
+from player import Player
+
+# A changed cell of a level: (column, row, old character, new character)
+Change = Tuple[int, int, str, str]
+
+
+def diff_levels(old: str, new: str) -> List[Change]:
+    """Compare two level strings cell by cell.
+
+    Parameters:
+        old (str): The previous level string, see load_level.
+        new (str): The current level string.
+
+    Returns:
+        (list<tuple<int, int, str, str>>): The (column, row, old, new) characters
+                                           of each cell that differs.
+    """
+    old_lines = old.split('\n')
+    new_lines = new.split('\n')
+
+    changes = []
+    for row in range(max(len(old_lines), len(new_lines))):
+        old_line = old_lines[row] if row < len(old_lines) else ''
+        new_line = new_lines[row] if row < len(new_lines) else ''
+        if old_line == new_line:
+            continue
+
+        for column in range(max(len(old_line), len(new_line))):
+            old_character = old_line[column] if column < len(old_line) else ' '
+            new_character = new_line[column] if column < len(new_line) else ' '
+            if old_character != new_character:
+                changes.append((column, row, old_character, new_character))
+
+    return changes
+
+
+class LevelEditor:
+    """Applies changes made to a level file to the world built from it."""
+
+    def __init__(self, builder: WorldBuilder, world: World, filename: str):
+        """Construct a new editor of a world that has just been built.
+
+        The editor must be constructed before the world is first stepped, so the
+        entities of each cell of the level can be found at their starting cell.
+
+        Parameters:
+            builder (WorldBuilder): The builder used to build the world.
+            world (World): The world built from the level file.
+            filename (str): The level file the world was built from.
+        """
+        self._builder = builder
+        self._world = world
+        self._filename = filename
+        self._modified = self._get_modified()
+        self._level = load_level(filename)
+
+        # the entities spawned in each cell of the level, other than static blocks
+        self._spawned: Dict[Tuple[int, int], List[Entity]] = {}
+        self._index(self._world.get_all_things())
+
+    def get_world(self) -> World:
+        """(World) Returns the world being edited."""
+        return self._world
+
+    def _get_modified(self) -> Optional[int]:
+        """(int) Returns the modification time of the level file, or None if it cannot be read."""
+        try:
+            return os.stat(self._filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def _index(self, things):
+        """Record the cell that each spawned thing was added at."""
+        world = self._world
+        for thing in things:
+            if isinstance(thing, (BoundaryWall, Player)):
+                continue
+            if isinstance(thing, Block):
+                # a block is added at the bottom left cell it covers (see World.add_block),
+                # which for blocks narrower than a cell (e.g. the flag) may not contain its centre
+                bb = thing.get_shape().bb
+                column, row = world.xy_to_grid(bb.left, bb.top)
+                cell = column, row - 1
+            else:
+                cell = world.xy_to_grid(*thing.get_position())
+            self._spawned.setdefault(cell, []).append(thing)
+
+    def fits(self, changes: List[Change]) -> bool:
+        """(bool) Returns True iff every changed cell lies within the world's grid."""
+        columns, rows = self._world.get_grid_size()
+        return all(0 <= column < columns and 0 <= row < rows
+                   for column, row, _, _ in changes)
+
+    def check(self) -> Optional[List[Change]]:
+        """Apply the changes made to the level file since it was last checked.
+
+        Returns:
+            (list<tuple<int, int, str, str>>): The changed cells, or None if the
+                level file has not been modified or cannot be read.
+
+        Raises:
+            ValueError: If the level no longer fits within the world, in which
+                        case the world must be rebuilt.
+        """
+        modified = self._get_modified()
+        if modified is None or modified == self._modified:
+            return None
+
+        try:
+            level = load_level(self._filename)
+        except (OSError, ValueError):
+            # the file may be part way through being written, try again later
+            return None
+
+        changes = diff_levels(self._level, level)
+        self._modified = modified
+        self._level = level
+        if not self.fits(changes):
+            raise ValueError(f"{self._filename} no longer fits within the world")
+
+        self.apply(changes)
+        return changes
+
+    def apply(self, changes: List[Change]):
+        """Replace the entities of each changed cell with the entity of its new character.
+
+        Parameters:
+            changes (list<tuple<int, int, str, str>>): The changed cells, see diff_levels.
+        """
+        world = self._world
+        remaining = set(world.get_all_things())
+
+        for column, row, old, new in changes:
+            if old != ' ':
+                self._remove_cell(column, row, remaining)
+
+        added = [(column, row, new) for column, row, _, new in changes if new != ' ']
+        if not added:
+            return
+
+        for column, row, new in added:
+            self._builder.build_entity(world, new, column, row)
+
+        self._index(set(world.get_all_things()) - remaining)
+
+    def _remove_cell(self, column: int, row: int, remaining):
+        """Remove the entities spawned at a cell, if they are still in the world."""
+        world = self._world
+        spawned = self._spawned.pop((column, row), None)
+        if spawned is not None:
+            for thing in spawned:
+                if thing in remaining:
+                    world.remove_thing(thing)
+                    remaining.discard(thing)
+            return
+
+        # static blocks are cells of the world's grid, rather than spawned things
+        block = world.get_block(*world.grid_to_xy_centre(column, row))
+        if block is not None:
+            world.remove_block(block)
+            remaining.discard(block)
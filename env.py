@@ -0,0 +1,292 @@
+"""Reinforcement learning environments for the levels of the game.
+
+MarioEnv is a Gym-style environment for a single level, with reset and step
+methods and a discrete action space. Observations are flat NumPy arrays of the
+codes of the grid cells around the player (see CELL_CODES in game.world),
+followed by the player's velocity and health.
+
+VectorEnv steps many independent environments per call, either in-process or
+split across worker processes.
+
+    env = VectorEnv([{"level": "level1.txt"}] * 8, workers=4)
+    observations = env.reset()
+    observations, rewards, dones, infos = env.step(actions)
+    env.close()
+"""
+
+__version__ = "1.1.0"
+
+import multiprocessing
+import random
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+import app
+from level import WorldBuilder, load_world
+from player import Player
+
+# The actions of a MarioEnv, as the keys they press (see MarioGame._move_player)
+ACTIONS = (
+    frozenset(),                 # nothing
+    frozenset({'Left'}),         # left
+    frozenset({'Right'}),        # right
+    frozenset({'Up'}),           # jump
+    frozenset({'Down'}),         # duck
+    frozenset({'Left', 'Up'}),   # left and jump
+    frozenset({'Right', 'Up'}),  # right and jump
+)
+
+# The reward for reaching the level's goal, and for dying
+GOAL_REWARD = 10.
+DEATH_REWARD = -10.
+
+
+class MarioEnv(app.MarioGame):
+    """A Gym-style environment of the player in a single level
+
+    The game is played by the rules of MarioApp (see MarioGame), except that
+    reaching the flag or entering a tunnel does not change the level. Each step
+    presses the keys of an action, as if they were pressed on every step the
+    action is taken, then steps the world. The reward is the player's
+    progress to the right in blocks, plus any change in score, plus GOAL_REWARD
+    on reaching the flag or DEATH_REWARD on dying, which end the episode.
+
+    The world is built once; each reset restores a snapshot of the new world.
+    """
+
+    def __init__(self, level: str = "level1.txt", view: Tuple[int, int] = (16, 12),
+                 max_steps: int = 2000, gravity: float = 300, max_velocity: float = 100,
+                 health: float = 5, seed: int = None):
+        """Construct a new environment
+
+        Parameters:
+            level (str): The level file to play
+            view (tuple<int, int>): The (columns, rows) of cells observed around the player
+            max_steps (int): The number of steps after which an episode ends
+            gravity (float): The vertical gravity of the world
+            max_velocity (float): The fastest the player can move horizontally
+            health (float): The player's maximum health
+            seed (int): The seed of the random number generator, used by mobs
+        """
+        self._view = view
+        self._max_steps = max_steps
+        self._max_velocity = max_velocity
+        self._random = random.Random(seed)
+
+        builder = WorldBuilder(app.BLOCK_SIZE, gravity=(0, gravity), fallback=app.create_unknown,
+                               collision_rules=self.get_collision_rules())
+        app.register_entities(builder)
+
+        self._world = load_world(builder, level)
+        self._player = Player("mario", max_health=health)
+        self._world.add_player(self._player, app.BLOCK_SIZE, app.BLOCK_SIZE)
+        self._start = self._world.snapshot()
+
+        self._steps = 0
+        self._reached_goal = False
+        self._last_x = 0.
+        self._last_score = 0
+
+    @property
+    def action_count(self) -> int:
+        """(int) The number of discrete actions, see ACTIONS"""
+        return len(ACTIONS)
+
+    @property
+    def observation_size(self) -> int:
+        """(int) The length of each observation"""
+        columns, rows = self._view
+        return columns * rows + 3
+
+    def seed(self, seed: int = None):
+        """Seeds the random number generator used by the world"""
+        self._random.seed(seed)
+
+    def reset(self) -> np.ndarray:
+        """(np.ndarray) Returns the player to the start of the level, and the first observation"""
+        self._world.restore(self._start)
+        self._invincible = self._switch_pressed = self._tunnel = False
+        self._invincibility = None
+        self._fire_ready = True
+        self._steps = 0
+        self._reached_goal = False
+        self._last_x = self._player.get_position()[0]
+        self._last_score = self._player.get_score()
+        return self._observe()
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, dict]:
+        """Applies an action, then steps the world
+
+        Returns:
+            (tuple<np.ndarray, float, bool, dict>): The observation, the reward,
+                whether the episode has ended and information about the step
+        """
+        player = self._player
+        keys = ACTIONS[action]
+        self._move_player(keys, keys)
+
+        # mobs (e.g. clouds) use the global random module
+        state = random.getstate()
+        random.setstate(self._random.getstate())
+        try:
+            self._step_world()
+        finally:
+            self._random.setstate(random.getstate())
+            random.setstate(state)
+        self._steps += 1
+
+        x = player.get_position()[0]
+        score = player.get_score()
+        reward = (x - self._last_x) / app.BLOCK_SIZE + score - self._last_score
+        self._last_x, self._last_score = x, score
+
+        dead = player.get_health() <= 0
+        if dead:
+            reward += DEATH_REWARD
+        if self._reached_goal:
+            reward += GOAL_REWARD
+        done = dead or self._reached_goal or self._steps >= self._max_steps
+
+        info = {"steps": self._steps, "score": score, "goal": self._reached_goal}
+        return self._observe(), reward, done, info
+
+    def _observe(self) -> np.ndarray:
+        """(np.ndarray) Returns the observation of the cells around the player"""
+        world = self._world
+        player = self._player
+        columns, rows = self._view
+        column, row = world.xy_to_grid(*player.get_position())
+        left, top = column - columns // 2, row - rows // 2
+
+        grid = world.get_cell_codes(left, top, columns, rows)
+
+        vx, vy = player.get_velocity()
+        return np.concatenate((grid.ravel(),
+                               np.array((vx, vy, player.get_health()), dtype=np.float32)))
+
+    def _reach_goal(self, player: Player):
+        """Ends the episode, instead of moving on to the next level"""
+        self._reached_goal = True
+
+
+def _step_envs(envs: Sequence[MarioEnv], actions: Sequence[int]):
+    """Steps each environment, resetting those whose episode has ended
+
+    The observation of an ended episode is the first observation of the next;
+    the final observation is given in its info as "final_observation".
+    """
+    results = []
+    for env, action in zip(envs, actions):
+        observation, reward, done, info = env.step(action)
+        if done:
+            info["final_observation"] = observation
+            observation = env.reset()
+        results.append((observation, reward, done, info))
+    return results
+
+
+def _worker(connection, env_options: List[dict]):
+    """Runs the environments of a worker process, answering commands from a VectorEnv"""
+    envs = [MarioEnv(**options) for options in env_options]
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == "step":
+                connection.send(_step_envs(envs, data))
+            elif command == "reset":
+                connection.send([env.reset() for env in envs])
+            elif command == "close":
+                break
+    finally:
+        connection.close()
+
+
+class VectorEnv:
+    """Steps a batch of independent MarioEnvs per call
+
+    Environments are either stepped in this process, or split evenly across
+    worker processes which step their environments in parallel. Environments
+    are reset automatically when their episode ends.
+    """
+
+    def __init__(self, env_options: Sequence[dict], workers: int = 0):
+        """Construct the environments
+
+        Parameters:
+            env_options (sequence<dict>): The MarioEnv keyword arguments of each environment
+            workers (int): The number of worker processes, or 0 to step in this process
+        """
+        self._count = len(env_options)
+        self._envs = []
+        self._connections = []
+        self._processes = []
+
+        if not workers:
+            self._envs = [MarioEnv(**options) for options in env_options]
+            return
+
+        workers = min(workers, self._count)
+        for index in range(workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, daemon=True,
+                                              args=(worker_connection, list(env_options[index::workers])))
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def __len__(self):
+        return self._count
+
+    def _gather(self, results: List[list]) -> list:
+        """Interleaves the per-worker results back into environment order"""
+        ordered = [None] * self._count
+        workers = len(results)
+        for index, worker_results in enumerate(results):
+            ordered[index::workers] = worker_results
+        return ordered
+
+    def reset(self) -> np.ndarray:
+        """(np.ndarray) Resets every environment, returning their stacked observations"""
+        if self._envs:
+            return np.stack([env.reset() for env in self._envs])
+
+        for connection in self._connections:
+            connection.send(("reset", None))
+        return np.stack(self._gather([connection.recv() for connection in self._connections]))
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, list]:
+        """Steps every environment with its action
+
+        Returns:
+            (tuple<np.ndarray, np.ndarray, np.ndarray, list<dict>>): The stacked
+                observations, rewards and dones, and the info of each environment
+        """
+        if self._envs:
+            results = _step_envs(self._envs, actions)
+        else:
+            workers = len(self._connections)
+            for index, connection in enumerate(self._connections):
+                connection.send(("step", list(actions[index::workers])))
+            results = self._gather([connection.recv() for connection in self._connections])
+
+        observations, rewards, dones, infos = zip(*results)
+        return (np.stack(observations), np.array(rewards, dtype=np.float32),
+                np.array(dones), list(infos))
+
+    def close(self):
+        """Stops the worker processes, if any"""
+        for connection in self._connections:
+            connection.send(("close", None))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections.clear()
+        self._processes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
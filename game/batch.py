@@ -0,0 +1,220 @@
+"""
+Batched, array based stepping of mobs whose behaviour can be vectorised
+"""
+
+import random
+
+import numpy as np
+
+from game.item import Coin
+from game.mob import Mob, CloudMob, Fireball
+
+# Kinds of mob behaviour that can be stepped in a batch
+WALK = 0
+CLOUD = 1
+
+# The number of mobs a batch has room for before it must grow
+INITIAL_CAPACITY = 64
+
+
+def get_batch_kind(mob: Mob):
+    """(int) Returns the kind of batched behaviour of the mob, or None if the mob
+    has its own step behaviour and must be stepped individually."""
+    step = type(mob).step
+    if step is Mob.step:
+        return WALK
+    if step is CloudMob.step:
+        return CLOUD
+    return None
+
+
+class MobBatch:
+    """A batch of mobs stepped together using NumPy.
+
+    Keeps the tempo, position and velocity of each mob in contiguous arrays and
+    applies the Mob walking and CloudMob seek-and-fire behaviour to every mob in
+    a single pass, instead of calling each mob's step method.
+
+    Mobs are stored densely; removing a mob moves the last mob into its slot.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        """Construct an empty mob batch.
+
+        Parameters:
+            capacity (int): The initial number of mobs the batch has room for.
+        """
+        self._mobs = []
+        self._bodies = []
+        self._slots = {}
+
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._tempo = np.zeros(capacity)
+        self._steps = np.zeros(capacity, dtype=np.int64)
+        self._fire_range = np.zeros(capacity)
+        self._loaded = np.zeros(capacity, dtype=bool)
+        self._position = np.zeros((capacity, 2))
+        self._velocity = np.zeros((capacity, 2))
+
+    def __len__(self):
+        return len(self._mobs)
+
+    def __contains__(self, mob):
+        return mob in self._slots
+
+    def _grow(self):
+        """Double the capacity of each of the batch arrays."""
+        for name in ('_kind', '_tempo', '_steps', '_fire_range', '_loaded',
+                     '_position', '_velocity'):
+            array = getattr(self, name)
+            grown = np.zeros((len(array) * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, mob: Mob) -> bool:
+        """Add a mob to the batch if its behaviour can be batched.
+
+        The mob must already have a shape in the world.
+
+        Returns:
+            (bool): True iff the mob was added to the batch.
+        """
+        kind = get_batch_kind(mob)
+        if kind is None or mob in self._slots:
+            return False
+
+        slot = len(self._mobs)
+        if slot == len(self._kind):
+            self._grow()
+
+        self._mobs.append(mob)
+        self._bodies.append(mob.get_shape().body)
+        self._slots[mob] = slot
+
+        self._kind[slot] = kind
+        self._tempo[slot] = mob.get_tempo()
+        self._steps[slot] = mob._steps
+        if kind == CLOUD:
+            self._fire_range[slot] = mob._fire_range
+            self._loaded[slot] = mob.is_loaded()
+
+        mob._batch = self
+        return True
+
+    def remove(self, mob: Mob):
+        """Remove a mob from the batch, if it is in the batch."""
+        slot = self._slots.pop(mob, None)
+        if slot is None:
+            return
+
+        mob._batch = None
+        mob._steps = int(self._steps[slot])
+
+        last = len(self._mobs) - 1
+        if slot != last:
+            moved = self._mobs[last]
+            self._mobs[slot] = moved
+            self._bodies[slot] = self._bodies[last]
+            self._slots[moved] = slot
+            for array in (self._kind, self._tempo, self._steps,
+                          self._fire_range, self._loaded):
+                array[slot] = array[last]
+        self._mobs.pop()
+        self._bodies.pop()
+
+    def get_state(self):
+        """Returns a copy of the mobs and batched values of the batch, see set_state"""
+        count = len(self._mobs)
+        return (tuple(self._mobs),
+                tuple(array[:count].copy() for array in (self._kind, self._tempo, self._steps,
+                                                          self._fire_range, self._loaded)))
+
+    def set_state(self, state):
+        """Replaces the contents of the batch with a state returned by get_state
+
+        The mobs of the state must be in the world.
+        """
+        mobs, arrays = state
+        for mob in self._mobs:
+            mob._batch = None
+
+        count = len(mobs)
+        while len(self._kind) < count:
+            self._grow()
+
+        self._mobs = list(mobs)
+        self._bodies = [mob.get_shape().body for mob in mobs]
+        self._slots = {mob: slot for slot, mob in enumerate(mobs)}
+        for array, values in zip((self._kind, self._tempo, self._steps,
+                                  self._fire_range, self._loaded), arrays):
+            array[:count] = values
+        for mob in mobs:
+            mob._batch = self
+
+    def set_tempo(self, mob: Mob, tempo: float):
+        """Update the batched tempo of a mob, see Mob.set_tempo"""
+        self._tempo[self._slots[mob]] = tempo
+
+    def set_loaded(self, cloud: CloudMob, loaded: bool):
+        """Update whether a batched cloud can drop, see CloudMob.reload"""
+        self._loaded[self._slots[cloud]] = loaded
+
+    def step(self, time_delta: float, game_data):
+        """Advance every mob in the batch by one time step
+
+        Equivalent to calling Mob.step or CloudMob.step on each mob.
+
+        Parameters:
+            time_delta (float): The amount of time that has passed since the last step, in seconds
+            game_data (tuple<World, Player>): Arbitrary data supplied by the app class
+        """
+        count = len(self._mobs)
+        if not count:
+            return
+
+        bodies = self._bodies
+        kind = self._kind[:count]
+        tempo = self._tempo[:count]
+        self._steps[:count] += 1
+
+        # reading a vector from a pymunk body is expensive, so only the
+        # components used by each kind of behaviour are read
+        velocity = self._velocity[:count]
+        velocity[:, 1] = np.fromiter((body.velocity.y for body in bodies), float, count)
+
+        is_cloud = kind == CLOUD
+        clouds = np.flatnonzero(is_cloud)
+        position = self._position[:count]
+        position[clouds] = [bodies[slot].position for slot in clouds.tolist()] or np.empty((0, 2))
+
+        world, player = game_data
+        player_x = player.get_position()[0]
+
+        # clouds seek the player, stopping to fire when within range
+        distance = player_x - position[:, 0]
+        in_range = is_cloud & (np.abs(distance) < self._fire_range[:count])
+        velocity[:, 0] = np.where(is_cloud, np.sign(distance) * tempo, tempo)
+        velocity[in_range, 0] = 0
+        # a cloud directly above the player, but out of range, keeps its velocity
+        for slot in np.flatnonzero(is_cloud & ~in_range & (distance == 0)).tolist():
+            velocity[slot, 0] = bodies[slot].velocity.x
+        velocity[clouds, 1] = 0
+
+        for body, vx, vy in zip(bodies, velocity[:, 0].tolist(), velocity[:, 1].tolist()):
+            body.velocity = (vx, vy)
+
+        firing = np.flatnonzero(in_range & self._loaded[:count])
+        if not len(firing):
+            return
+
+        self._loaded[firing] = False
+        # dropping may add mobs to this batch, so only use the slots found above
+        drops = [(self._mobs[slot], *position[slot]) for slot in firing.tolist()]
+        for cloud, x, y in drops:
+            cloud._loaded = False
+            world.schedule(CloudMob.DROP_DELAY, cloud.reload)
+            # occasionally drop a coin instead
+            if random.randint(1, 10) == 1:
+                world.add_item(Coin(), x, y + 22)
+            else:
+                world.add_mob(Fireball(), x, y + 22)
@@ -6,13 +6,16 @@ import random
 from typing import Tuple
 
 from game.entity import Entity
-from game.item import Coin
+from game.item import ITEM_FACTORIES
+from game.registry import EntityRegistry
 from game.util import get_collision_direction
 
 
 class Block(Entity):
     """One of the blocks in the sandbox game"""
-    # The unique identifier for this block
+    __slots__ = ('_block_id',)
+
+    # The default identifier for this type of block
     _id = None
     _type = 2
     _cell_size = (1, 1)
@@ -25,12 +28,11 @@ class Block(Entity):
         """
         super().__init__()
 
-        if block_id is not None:
-            self._id = block_id
+        self._block_id = self._id if block_id is None else block_id
 
     def get_id(self) -> str:
         """(str) Returns the unique id of this block"""
-        return self._id
+        return self._block_id
 
     def get_position(self) -> Tuple[float, float]:
         """(float, float) Returns the (x, y) position of the block's centre"""
@@ -45,7 +47,7 @@ class Block(Entity):
         return self._cell_size
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._id})"
+        return f"{self.__class__.__name__}({self._block_id})"
 
 
 class MysteryBlock(Block):
@@ -53,6 +55,8 @@ class MysteryBlock(Block):
 
     The active state of a mystery block is whether it has dropped items or not.
     """
+    __slots__ = ('_drop', '_drop_range', '_active')
+
     _id = "mystery"
 
     def __init__(self, drop: str = None, drop_range: Tuple[int, int] = (1, 1)):
@@ -88,8 +92,8 @@ class MysteryBlock(Block):
         x, y = self.get_position()
         for drop in drops:
             if drop is not None:
-                # world.add_item(create_item(drop), TODO: Make this non-hardcoded
-                world.add_item(Coin(), x + random.randint(-10, 10), y - 25)
+                item = ITEM_FACTORIES.create(drop, world)
+                world.add_item(item, x + random.randint(-10, 10), y - 25)
 
     def on_hit(self, event, data):
         """Callback collision with player event handler."""
@@ -110,3 +114,6 @@ class MysteryBlock(Block):
         return self._active
 
 
+# The factories of blocks by block id; blocks of other ids are plain Blocks
+BLOCK_FACTORIES = EntityRegistry(default=Block)
+BLOCK_FACTORIES.register("mystery", MysteryBlock)
@@ -0,0 +1,94 @@
+"""
+Keyboard input state, sampled once per game tick
+"""
+
+import tkinter as tk
+from typing import FrozenSet, Set, Tuple
+
+
+class InputState:
+    """Tracks which keys are held down, from tkinter KeyPress and KeyRelease events
+
+    Rather than acting on every (repeated) key event, the game samples the input
+    state once per tick, so the cost of handling input does not depend on the
+    keyboard's repeat rate.
+
+    Keys are identified by their tkinter keysym, with letters in lower case,
+    e.g. 'a', 'Left' or 'space'.
+
+    On some platforms (e.g. X11) a held key auto-repeats as a release followed
+    by a press. Releases therefore only take effect at the second sample after
+    them, unless the key is pressed again first, so a sample taken between the
+    two events of an auto-repeat does not see the key let go and pressed anew.
+    """
+
+    def __init__(self, widget: tk.Misc = None):
+        """Construct a new input state, bound to the key events of widget if given"""
+        self._held = set()
+        self._pressed = set()
+        self._previous = frozenset()
+        # keys released since the last sample, and released before it, which are
+        # let go at the next sample unless they are pressed again first
+        self._released = set()
+        self._releasing = set()
+
+        if widget is not None:
+            self.bind(widget)
+
+    def bind(self, widget: tk.Misc):
+        """Track the key events of a tkinter widget"""
+        widget.bind('<KeyPress>', self._on_press)
+        widget.bind('<KeyRelease>', self._on_release)
+        widget.bind('<FocusOut>', lambda event: self.clear())
+
+    @staticmethod
+    def _get_key(event: tk.Event) -> str:
+        """(str) Returns the key of an event, ignoring the case of letters"""
+        key = event.keysym
+        return key.lower() if len(key) == 1 else key
+
+    def _on_press(self, event: tk.Event):
+        key = self._get_key(event)
+        if key in self._released or key in self._releasing:
+            # the release was an auto-repeat, so the key has been held all along
+            self._released.discard(key)
+            self._releasing.discard(key)
+            return
+        self._held.add(key)
+        self._pressed.add(key)
+
+    def _on_release(self, event: tk.Event):
+        key = self._get_key(event)
+        if key in self._held:
+            self._released.add(key)
+
+    def sample(self) -> Tuple[FrozenSet[str], Set[str]]:
+        """Samples the keys held now, and the keys newly pressed since the last sample
+
+        A key only counts as newly pressed if it was not held at the last sample,
+        so auto-repeated events of a held key (which may be reported as a release
+        followed by a press, see InputState) are not treated as new presses.
+
+        Returns:
+            (tuple<frozenset<str>, set<str>>): The held keys and the newly pressed keys
+        """
+        self._held -= self._releasing
+        self._releasing = self._released
+        self._released = set()
+
+        pressed = self._pressed - self._previous
+        self._pressed = set()
+        self._previous = frozenset(self._held)
+        return self._previous, pressed
+
+    def is_held(self, *keys: str) -> bool:
+        """(bool) Returns True iff any of the keys is currently held down"""
+        return any(key in self._held for key in keys)
+
+    def clear(self):
+        """Forgets every held and pressed key, e.g. when the window loses focus"""
+        self._held.clear()
+        self._pressed.clear()
+        self._previous = frozenset()
+        self._released.clear()
+        self._releasing.clear()
@@ -11,9 +11,21 @@ class Entity:
     """The highest-level abstract representation of an entity in the game world
 
     Should not be instantiated directly.
+
+    Entities declare their instance attributes in __slots__ so that a level,
+    which creates an entity for most grid cells, does not allocate a __dict__
+    per entity. Subclasses must declare __slots__ for any attributes they add.
     """
+    __slots__ = ('_shape',)
 
     _type = 0
+    # The names of the categories of things (see PHYSICAL_THING_CATEGORIES) that the
+    # entity never collides with; such collisions are filtered out by pymunk before
+    # any collision callback is called
+    _ignored_categories: Tuple[str, ...] = ()
+    # Whether the entity's shape is a sensor, which calls the collision callbacks of
+    # the things it touches without ever being pushed apart from them
+    _sensor = False
 
     def __init__(self):
         self._shape: pymunk.Shape = None
@@ -27,14 +39,36 @@ class Entity:
         """
         return 2 ** cls._type
 
-    def resolve_shape(self, shape: pymunk.Shape, friction: float = 1.):
+    @classmethod
+    def get_ignored_categories(cls) -> Tuple[str, ...]:
+        """(tuple<str, ...>) Returns the names of the categories of things that the
+        entity never collides with"""
+        return cls._ignored_categories
+
+    @classmethod
+    def is_sensor(cls) -> bool:
+        """(bool) Returns True iff the entity's shape only detects collisions"""
+        return cls._sensor
+
+    def resolve_shape(self, shape: pymunk.Shape, friction: float = 1., collision_type: int = None,
+                      shape_filter: pymunk.ShapeFilter = None):
         """Resolve the shape of a method by setting appropriate entity groups
 
         Assigns the shapes object to the current entity.
+
+        Parameters:
+            shape (pymunk.Shape): The physical shape of the entity
+            friction (float): The friction of the shape
+            collision_type (int): The collision type of the shape, defaults to the entity's type
+            shape_filter (pymunk.ShapeFilter): The categories of the shape and the mask of
+                                               categories it collides with, defaults to
+                                               only the entity's type, colliding with all
         """
         shape.friction = friction
-        shape.collision_type = self.get_type()
-        shape.filter = pymunk.ShapeFilter(categories=self.get_type())
+        shape.collision_type = self.get_type() if collision_type is None else collision_type
+        shape.filter = (pymunk.ShapeFilter(categories=self.get_type()) if shape_filter is None
+                        else shape_filter)
+        shape.sensor = self._sensor
         shape.object = self
 
     def set_shape(self, shape: pymunk.Shape):
@@ -80,6 +114,7 @@ class DynamicEntity(Entity):
 
     Should not be instantiated directly.
     """
+    __slots__ = ('_health', '_max_health', '_jumping')
 
     def __init__(self, max_health=20):
         super().__init__()
@@ -136,6 +171,7 @@ class DynamicEntity(Entity):
 
 class BoundaryWall(Entity):
     """A boundary wall to prevent movement off the edge of the game world"""
+    __slots__ = ('_id',)
 
     _type = 1
 
@@ -3,6 +3,7 @@ Classes to represent items dropped within the game world that players pickup.
 """
 
 from game.entity import DynamicEntity
+from game.registry import EntityRegistry
 
 from player import Player
 
@@ -13,6 +14,8 @@ class DroppedItem(DynamicEntity):
     Dropped items must implement the collect(Player) method to handle players
     picking up the items.
     """
+    __slots__ = ()
+
     _id = None
     _type = 4
 
@@ -35,6 +38,8 @@ class DroppedItem(DynamicEntity):
 class Coin(DroppedItem):
     """A dropped coin item that can be picked up to increment the players score.
     """
+    __slots__ = ('_value',)
+
     _id = "coin"
 
     def __init__(self, value: int = 1):
@@ -55,3 +60,6 @@ class Coin(DroppedItem):
         player.change_score(self._value)
 
 
+# The factories of dropped items by item id, e.g. for the drops of mystery blocks
+ITEM_FACTORIES = EntityRegistry()
+ITEM_FACTORIES.register("coin", Coin)
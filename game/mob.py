@@ -4,9 +4,9 @@ Classes to represent non-playable computer-controlled moving entity.
 
 import random
 import pymunk
-import time
 
 from game.entity import DynamicEntity
+from game.registry import EntityRegistry
 from game.util import get_collision_direction
 from game.item import Coin
 
@@ -20,6 +20,8 @@ class Mob(DynamicEntity):
     Can be friend, foe, or neither
 
     Should not be instantiated directly"""
+    __slots__ = ('_mob_id', '_size', '_weight', '_tempo', '_steps', '_batch')
+
     _type = 5
 
     def __init__(self, mob_id, size, weight=MOB_DEFAULT_TEMPO,
@@ -40,16 +42,18 @@ class Mob(DynamicEntity):
         """
         super().__init__(max_health=max_health)
 
-        self._id = mob_id
+        self._mob_id = mob_id
         self._size = size
         self._weight = weight
         self._tempo = tempo
 
         self._steps = 0
+        # the MobBatch stepping this mob, if any
+        self._batch = None
 
     def get_id(self):
         """(str) Returns the unique id for this type of mob"""
-        return self._id
+        return self._mob_id
 
     def get_size(self):
         """(str) Returns the physical (x, y) size of this mob"""
@@ -72,6 +76,8 @@ class Mob(DynamicEntity):
                          movement and negative for reversed.
         """
         self._tempo = tempo
+        if self._batch is not None:
+            self._batch.set_tempo(self, tempo)
 
     def get_weight(self):
         """(int): Return the weight of this mob."""
@@ -86,7 +92,7 @@ class Mob(DynamicEntity):
         self.set_velocity((vx, self.get_velocity()[1]))
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._id!r})"
+        return f"{self.__class__.__name__}({self._mob_id!r})"
 
 
 class Fireball(Mob):
@@ -94,6 +100,8 @@ class Fireball(Mob):
 
     When colliding with the player it will damage the player and explode.
     """
+    __slots__ = ()
+
     _id = "fireball"
 
     def __init__(self):
@@ -109,8 +117,12 @@ class CloudMob(Mob):
     """Flying cloud which seeks out the player and when above the player
     will fire a fireball at them.
     """
+    __slots__ = ('_loaded', '_fire_range')
+
     _id = "cloud"
     MAX_DISTANCE = 20
+    # The simulation time in seconds between drops
+    DROP_DELAY = 2
 
     def __init__(self, fire_range=10):
         """Construct a new cloud mob.
@@ -120,9 +132,20 @@ class CloudMob(Mob):
                               the cloud will start firing.
         """
         super().__init__(self._id, size=(16, 24), weight=0, tempo=80)
-        self._last_drop = time.time()
+        # whether the cloud can drop, which it cannot until DROP_DELAY after a drop
+        self._loaded = True
         self._fire_range = fire_range
 
+    def is_loaded(self) -> bool:
+        """(bool) Returns True iff the cloud can drop something"""
+        return self._loaded
+
+    def reload(self):
+        """Let the cloud drop again, called DROP_DELAY after its last drop"""
+        self._loaded = True
+        if self._batch is not None:
+            self._batch.set_loaded(self, True)
+
     def step(self, time_delta, game_data):
         """Move towards the player and fire when within range."""
         world, player = game_data
@@ -135,7 +158,7 @@ class CloudMob(Mob):
         if abs(player_x - mob_x) < self._fire_range:
             vx = 0
             # only fire after a delay
-            if time.time() - self._last_drop >= 2:
+            if self._loaded:
                 x, y = self.get_position()
 
                 rand_val = random.randint(1, 10)
@@ -146,7 +169,8 @@ class CloudMob(Mob):
                 else:
                     drop = Fireball()
                     world.add_mob(drop, x, y + 22)
-                self._last_drop = time.time()
+                self._loaded = False
+                world.schedule(self.DROP_DELAY, self.reload)
 
         # move towards the player
         elif player_x < mob_x:
@@ -155,3 +179,9 @@ class CloudMob(Mob):
             vx = self.get_tempo()
 
         self.set_velocity((vx, 0))
+
+
+# The factories of mobs by mob id; mobs of other ids are plain, block sized, Mobs
+MOB_FACTORIES = EntityRegistry(default=lambda mob_id: Mob(mob_id, size=(1, 1)))
+MOB_FACTORIES.register("fireball", Fireball)
+MOB_FACTORIES.register("cloud", CloudMob)
@@ -0,0 +1,135 @@
+"""
+Hooks for profiling the steps of a game world, see World.add_hook
+"""
+
+from collections import defaultdict
+from typing import List, Tuple
+
+
+class StepHook:
+    """Base class of hooks notified of the timing of each World.step
+
+    Override any of the methods; the defaults do nothing. Entity step and
+    collision callback timings are only reported for steps where the pre_step
+    method of some hook returns True.
+
+    All times are in seconds.
+    """
+
+    def pre_step(self, world, game_data) -> bool:
+        """Called before each step of a world
+
+        Parameters:
+            world (World): The world being stepped
+            game_data (tuple<World, Player>): The data the world is stepped with
+
+        Returns:
+            (bool): True iff entity steps and collision callbacks should be timed
+                    during this step
+        """
+        return False
+
+    def post_step(self, world, game_data, elapsed: float):
+        """Called after each step of a world, with the duration of the whole step"""
+
+    def on_entity_step(self, entity_type: type, elapsed: float):
+        """Called with the duration of the step method of a thing of entity_type
+
+        Mobs stepped together in a mob batch are reported as a single MobBatch.
+        """
+
+    def on_collision(self, collision_type_a: str, collision_type_b: str,
+                     event: str, elapsed: float):
+        """Called with the duration of a collision callback
+
+        Parameters:
+            collision_type_a (str): The first collision type of the callback's rule
+            collision_type_b (str): The second collision type of the callback's rule
+            event (str): One of 'begin', 'separate', 'pre_solve' or 'post_solve'
+            elapsed (float): The duration of the callback
+        """
+
+
+class SamplingProfiler(StepHook):
+    """A step hook that times one in every 'interval' steps, and aggregates the
+    time spent stepping each entity type and in each collision callback"""
+
+    def __init__(self, interval: int = 10):
+        """Construct a new profiler
+
+        Parameters:
+            interval (int): The number of steps between profiled steps
+        """
+        self._interval = interval
+        self._steps = 0
+        self._samples = 0
+        self._step_time = 0.
+        # the (total time, calls) of each entity type and each collision callback
+        self._entities = defaultdict(lambda: [0., 0])
+        self._collisions = defaultdict(lambda: [0., 0])
+
+    def pre_step(self, world, game_data) -> bool:
+        self._steps += 1
+        sampled = self._steps % self._interval == 0
+        if sampled:
+            self._samples += 1
+        return sampled
+
+    def post_step(self, world, game_data, elapsed: float):
+        if self._steps % self._interval == 0:
+            self._step_time += elapsed
+
+    def on_entity_step(self, entity_type: type, elapsed: float):
+        timing = self._entities[entity_type]
+        timing[0] += elapsed
+        timing[1] += 1
+
+    def on_collision(self, collision_type_a: str, collision_type_b: str,
+                     event: str, elapsed: float):
+        timing = self._collisions[collision_type_a, collision_type_b, event]
+        timing[0] += elapsed
+        timing[1] += 1
+
+    def get_samples(self) -> int:
+        """(int) Returns the number of steps that have been profiled"""
+        return self._samples
+
+    def get_slowest_entities(self, count: int = 5) -> List[Tuple[type, float, int]]:
+        """(list<tuple<type, float, int>>) Returns the entity types with the most total
+        step time, as (type, total time, calls), slowest first"""
+        return self._slowest(self._entities, count)
+
+    def get_slowest_collisions(self, count: int = 5) -> List[Tuple[Tuple[str, str, str], float, int]]:
+        """(list<tuple<tuple<str, str, str>, float, int>>) Returns the collision callbacks
+        with the most total time, as ((type a, type b, event), total time, calls),
+        slowest first"""
+        return self._slowest(self._collisions, count)
+
+    @staticmethod
+    def _slowest(timings, count):
+        ranked = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, total, calls) for key, (total, calls) in ranked[:count]]
+
+    def reset(self):
+        """Forgets every sample"""
+        self._samples = 0
+        self._step_time = 0.
+        self._entities.clear()
+        self._collisions.clear()
+
+    def report(self, count: int = 5) -> str:
+        """(str) Returns a table of the slowest entity types and collision callbacks,
+        with their time per profiled step"""
+        samples = max(self._samples, 1)
+        lines = [f"{self._samples} profiled steps, "
+                 f"{self._step_time / samples * 1e3:.3f} ms per step",
+                 f"{'entity type':<40}{'ms/step':>10}{'us/call':>10}{'calls':>10}"]
+        for entity_type, total, calls in self.get_slowest_entities(count):
+            lines.append(f"{entity_type.__name__:<40}{total / samples * 1e3:>10.3f}"
+                         f"{total / calls * 1e6:>10.2f}{calls:>10}")
+
+        lines.append(f"{'collision callback':<40}{'ms/step':>10}{'us/call':>10}{'calls':>10}")
+        for (type_a, type_b, event), total, calls in self.get_slowest_collisions(count):
+            lines.append(f"{f'{type_a}/{type_b} {event}':<40}{total / samples * 1e3:>10.3f}"
+                         f"{total / calls * 1e6:>10.2f}{calls:>10}")
+        return "\n".join(lines)
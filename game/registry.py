@@ -0,0 +1,108 @@
+"""
+Registries of the factories creating entities from their ids
+"""
+
+from typing import Callable, Dict, Iterable, Tuple
+
+from game.entity import Entity
+
+
+class _WorldArgument:
+    """The type of WORLD"""
+
+    def __repr__(self):
+        return "WORLD"
+
+
+# A placeholder for the world an entity is created for, in declared constructor arguments
+WORLD = _WorldArgument()
+
+
+class EntityRegistry:
+    """Maps entity ids to the factories creating their entities
+
+    The arguments each factory is called with are declared as data when it is
+    registered, and are resolved once, by get_factory, rather than each time an
+    entity is created. Arguments given as WORLD are replaced with the world the
+    entity is created for, e.g.
+
+        mobs = EntityRegistry()
+        mobs.register("cloud", CloudMob, fire_range=10)
+        mobs.register("mushroom", Mushroom, WORLD)
+
+        create_cloud = mobs.get_factory("cloud")
+        cloud = create_cloud(world)
+    """
+
+    def __init__(self, default: Callable[[str], Entity] = None):
+        """Construct a new, empty, registry
+
+        Parameters:
+            default (Callable<str> -> Entity): Creates the entity of an id without a
+                                               registered factory, given the id
+        """
+        self._factories = {}
+        self._default = default
+
+    def register(self, entity_id: str, factory: Callable[..., Entity], *args, **kwargs):
+        """Register the factory of an entity id, with the arguments to call it with
+
+        Parameters:
+            entity_id (str): The id of the entities created by the factory
+            factory (Callable -> Entity): The factory, usually an Entity class
+            *args, **kwargs: The arguments of the factory, where WORLD is replaced
+                             with the world the entity is created for
+        """
+        self._factories[entity_id] = (factory, args, kwargs)
+
+    def register_all(self, factories: Dict[str, Tuple]):
+        """Register many factories, see register
+
+        Parameters:
+            factories (dict<str: tuple>): The (factory, *args) of each entity id,
+                                          where the last of the args may be a dict
+                                          of keyword arguments
+        """
+        for entity_id, (factory, *args) in factories.items():
+            kwargs = args.pop() if args and isinstance(args[-1], dict) else {}
+            self.register(entity_id, factory, *args, **kwargs)
+
+    def get_ids(self) -> Iterable[str]:
+        """(iterable<str>) Returns the entity ids with a registered factory"""
+        return self._factories.keys()
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._factories
+
+    def get_factory(self, entity_id: str) -> Callable[..., Entity]:
+        """(Callable<World> -> Entity) Returns a function creating a new entity of the
+        entity id for a world
+
+        Raises:
+            KeyError: If no factory is registered for the id and there is no default
+        """
+        entry = self._factories.get(entity_id)
+        if entry is None:
+            if self._default is None:
+                raise KeyError(f"No factory is registered for the entity id {entity_id!r}")
+            default = self._default
+            return lambda world=None: default(entity_id)
+
+        factory, args, kwargs = entry
+        if not (any(arg is WORLD for arg in args) or any(arg is WORLD for arg in kwargs.values())):
+            return lambda world=None: factory(*args, **kwargs)
+
+        def create(world=None):
+            return factory(*(world if arg is WORLD else arg for arg in args),
+                           **{name: world if arg is WORLD else arg for name, arg in kwargs.items()})
+        return create
+
+    def create(self, entity_id: str, world=None) -> Entity:
+        """(Entity) Returns a new entity of the entity id, for a world
+
+        Prefer get_factory when creating many entities of the same id.
+
+        Raises:
+            KeyError: If no factory is registered for the id and there is no default
+        """
+        return self.get_factory(entity_id)(world)
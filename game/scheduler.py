@@ -0,0 +1,142 @@
+"""
+Timed events scheduled on the simulation time of a world
+"""
+
+import heapq
+from typing import Callable, Optional
+
+
+class Timer:
+    """A callback scheduled to be called at a simulation time, see Scheduler.schedule
+
+    A repeating timer is called again every interval after it is due, until
+    it is cancelled.
+    """
+    __slots__ = ('_callback', '_args', '_due', '_interval', '_active')
+
+    def __init__(self, callback: Callable, args: tuple, due: float, interval: Optional[float] = None):
+        """Constructor
+
+        Parameters:
+            callback (Callable): The function called when the timer is due
+            args (tuple): The arguments the callback is called with
+            due (float): The simulation time at which the timer is first due
+            interval (float): The time between calls of a repeating timer, or None
+        """
+        self._callback = callback
+        self._args = args
+        self._due = due
+        self._interval = interval
+        self._active = True
+
+    def get_due(self) -> float:
+        """(float) Returns the simulation time at which the timer is next due"""
+        return self._due
+
+    def get_interval(self) -> Optional[float]:
+        """(float) Returns the time between calls of a repeating timer, or None if it is one-shot"""
+        return self._interval
+
+    def is_active(self) -> bool:
+        """(bool) Returns True iff the timer will be called again"""
+        return self._active
+
+    def cancel(self):
+        """Stops the timer from being called again"""
+        self._active = False
+
+    def __repr__(self):
+        return f"Timer({self._callback!r}, due={self._due!r}, interval={self._interval!r})"
+
+
+class Scheduler:
+    """One-shot and repeating timers, called as simulation time advances
+
+    Timers are kept in a heap ordered by the time they are due, so advancing
+    the time only looks at the timers that have become due; a waiting timer
+    costs nothing per step. Cancelled timers are dropped from the heap when
+    they become due.
+    """
+
+    def __init__(self):
+        """Construct a scheduler without timers, at time zero"""
+        self._time = 0.
+        # a heap of the (due, order, timer) of each waiting timer, where the order
+        # in which timers were scheduled breaks ties between timers due together
+        self._timers = []
+        self._order = 0
+
+    def get_time(self) -> float:
+        """(float) Returns the current simulation time, in seconds"""
+        return self._time
+
+    def schedule(self, delay: float, callback: Callable, *args, interval: float = None) -> Timer:
+        """Schedules a callback to be called once, after a delay
+
+        Parameters:
+            delay (float): The simulation time until the callback is called, in seconds
+            callback (Callable): The function to call
+            *args: The arguments to call the callback with
+            interval (float): If given, the callback is called again every interval
+                              seconds after the first call, until cancelled
+
+        Returns:
+            (Timer): The timer of the callback, which can be cancelled
+
+        Raises:
+            ValueError: If the interval is not positive
+        """
+        if interval is not None and interval <= 0:
+            raise ValueError(f"The interval of a repeating timer must be positive, not {interval}")
+
+        timer = Timer(callback, args, self._time + delay, interval)
+        self._push(timer)
+        return timer
+
+    def _push(self, timer: Timer):
+        """Adds a timer to the heap of waiting timers, at its due time"""
+        heapq.heappush(self._timers, (timer._due, self._order, timer))
+        self._order += 1
+
+    def advance(self, time_delta: float):
+        """Advances the simulation time, calling each timer that becomes due in the
+        order of the times they are due
+
+        A timer scheduled by a callback for a time that has already passed is
+        called in the same advance.
+        """
+        self._time += time_delta
+        timers = self._timers
+        while timers and timers[0][0] <= self._time:
+            _, _, timer = heapq.heappop(timers)
+            if not timer._active:
+                continue
+
+            if timer._interval is None:
+                timer._active = False
+            else:
+                timer._due += timer._interval
+                self._push(timer)
+            timer._callback(*timer._args)
+
+    def get_state(self):
+        """Returns a copy of the time and waiting timers of the scheduler, see set_state"""
+        return (self._time, self._order, tuple(self._timers),
+                tuple((timer._due, timer._active) for _, _, timer in self._timers))
+
+    def set_state(self, state):
+        """Returns the scheduler to a state returned by get_state
+
+        Timers scheduled since the state was taken are cancelled, and timers
+        called or cancelled since are restored.
+        """
+        self._time, self._order, timers, values = state
+        saved = {timer for _, _, timer in timers}
+        for _, _, timer in self._timers:
+            if timer not in saved:
+                timer._active = False
+
+        self._timers = list(timers)
+        for (_, _, timer), (due, active) in zip(timers, values):
+            timer._due = due
+            timer._active = active
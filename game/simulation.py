@@ -0,0 +1,408 @@
+"""
+Stepping a world on its own thread, at a fixed rate, while another thread draws it
+
+The simulation thread publishes an immutable Frame of the world after each
+step, which the drawing thread reads without ever touching the live world:
+
+    simulation = SimulationThread(tick)
+    simulation.start()
+    ...
+    # from a tkinter after loop
+    simulation.submit(apply_input, held, pressed)
+    frame = simulation.get_frame()
+    view.draw_entities(frame.create_entities())
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pymunk
+
+from game.entity import Entity
+from game.world import World, STEP_SIZE, get_saved_slots, _copy_value
+
+# The most steps the simulation falls behind its rate before it stops catching up
+MAX_LAG = 5
+# The time in seconds between checks for being stopped, while paused
+IDLE_TIMEOUT = 0.1
+
+
+class FrameBody(NamedTuple):
+    """The motion of the body of a thing in a frame"""
+    position: pymunk.Vec2d
+    velocity: pymunk.Vec2d
+
+
+class FrameShape(NamedTuple):
+    """The shape of a thing in a frame, with the attributes of a pymunk shape that
+    renderers read"""
+    bb: pymunk.BB
+    body: FrameBody
+
+
+class EntityFrame(NamedTuple):
+    """The state of a thing at the end of a step, see Frame"""
+    # unique among the things of a frame, and the same for a thing in every frame
+    key: int
+    entity_type: type
+    entity_id: Optional[str]
+    shape: FrameShape
+    # the values of the entity's saved attributes (see get_saved_slots), which
+    # determine how it is drawn, e.g. whether a block is active
+    state: tuple
+
+    def get_position(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (x, y) position of the centre of the thing"""
+        x, y = self.shape.bb.center()
+        return x, y
+
+    def create_entity(self) -> Entity:
+        """(Entity) Returns a detached copy of the entity, for drawing
+
+        The copy's shape is the frame's shape, and it is in no world, so only
+        its queries (e.g. get_position, is_active) may be used.
+        """
+        entity = object.__new__(self.entity_type)
+        for slot, value in zip(get_saved_slots(self.entity_type), self.state):
+            setattr(entity, slot, _copy_value(value))
+        entity._shape = self.shape
+        return entity
+
+
+class Frame(NamedTuple):
+    """An immutable picture of a world at the end of a step"""
+    # the number of steps before the frame, and the world's simulation time
+    tick: int
+    time: float
+    # changes whenever the simulation steps a different world, e.g. a new level
+    generation: int
+    things: Tuple[EntityFrame, ...]
+    static_grid: 'StaticGrid'
+
+    def get_pixel_size(self) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (width, height) in pixels of the world of the frame"""
+        return self.static_grid.get_pixel_size()
+
+    def get_thing(self, thing: Entity) -> Optional[EntityFrame]:
+        """(EntityFrame) Returns the frame of a live thing, or None if it is not in the frame"""
+        key = id(thing)
+        for entity_frame in self.things:
+            if entity_frame.key == key:
+                return entity_frame
+        return None
+
+    def create_entities(self) -> List[Entity]:
+        """(list<Entity>) Returns detached copies of the entities of the frame, for drawing"""
+        return [entity_frame.create_entity() for entity_frame in self.things]
+
+
+class StaticGrid:
+    """An immutable copy of the static blocks of a world, see World.get_static_grid
+
+    Has the static block queries of a World used by a StaticLayer, so a
+    StaticLayer can draw the static blocks of frames instead of a live world.
+    """
+
+    def __init__(self, grid_size: Tuple[int, int], cell_expanse: int,
+                 cells: bytes, static_ids: Tuple[Optional[str], ...]):
+        """
+        Parameters:
+            grid_size (tuple<int, int>): The (column, row) size of the grid
+            cell_expanse (int): The size (i.e. width/height) of each grid cell
+            cells (bytes): The code of the static block in each cell, row by row
+            static_ids (tuple<str, ...>): The block id of each code
+        """
+        self._grid_size = grid_size
+        self._cell_expanse = cell_expanse
+        self._cells = cells
+        self._static_ids = static_ids
+
+    @classmethod
+    def from_world(cls, world: World) -> 'StaticGrid':
+        """(StaticGrid) Returns a copy of the static blocks of a world"""
+        return cls(world.get_grid_size(), world.get_cell_expanse(), *world.get_static_grid())
+
+    def get_grid_size(self) -> Tuple[int, int]:
+        return self._grid_size
+
+    def get_cell_expanse(self) -> int:
+        return self._cell_expanse
+
+    def get_pixel_size(self) -> Tuple[int, int]:
+        return tuple(grid * self._cell_expanse for grid in self._grid_size)
+
+    def get_static_block_id(self, column: int, row: int) -> Optional[str]:
+        """(str) Returns the id of the static block at ('column', 'row'), see World"""
+        columns, rows = self._grid_size
+        if 0 <= column < columns and 0 <= row < rows:
+            return self._static_ids[self._cells[row * columns + column]]
+        return None
+
+    def get_static_blocks(self, start_column: int = 0,
+                          stop_column: int = None) -> Iterable[Tuple[str, int, int]]:
+        """Yields the id, column and row of every static block, see World.get_static_blocks"""
+        columns, rows = self._grid_size
+        start_column = max(start_column, 0)
+        stop_column = columns if stop_column is None else min(stop_column, columns)
+        for row in range(rows):
+            start = row * columns
+            for column, code in enumerate(self._cells[start + start_column:start + stop_column],
+                                          start_column):
+                if code:
+                    yield self._static_ids[code], column, row
+
+    def get_changes(self, previous: 'StaticGrid') -> set:
+        """(set<tuple<int, int>>) Returns the (column, row) of each cell whose static
+        block differs from that of a previous grid of the same world
+
+        A world never changes the block id of a code, so only codes are compared.
+        """
+        if previous._cells is self._cells:
+            return set()
+
+        changed = np.flatnonzero(np.frombuffer(self._cells, dtype=np.uint8)
+                                 != np.frombuffer(previous._cells, dtype=np.uint8))
+        rows, columns = np.divmod(changed, self._grid_size[0])
+        return set(zip(columns.tolist(), rows.tolist()))
+
+
+class StaticGridView:
+    """The static blocks of the frames of one world generation, as drawn by a StaticLayer
+
+    Each frame's StaticGrid is shown with show, after which pop_static_changes
+    returns the cells changed since the previous grid shown, as for a World.
+    """
+
+    def __init__(self, grid: StaticGrid):
+        self._grid = grid
+        self._changes = set()
+
+    def show(self, grid: StaticGrid):
+        """Shows the static blocks of a later frame of the same world"""
+        if grid is not self._grid:
+            self._changes |= grid.get_changes(self._grid)
+            self._grid = grid
+
+    def pop_static_changes(self) -> set:
+        """(set<tuple<int, int>>) Returns the cells changed since the last call"""
+        changes = self._changes
+        self._changes = set()
+        return changes
+
+    def get_cell_expanse(self) -> int:
+        return self._grid.get_cell_expanse()
+
+    def get_pixel_size(self) -> Tuple[int, int]:
+        return self._grid.get_pixel_size()
+
+    def get_static_blocks(self, start_column: int = 0,
+                          stop_column: int = None) -> Iterable[Tuple[str, int, int]]:
+        return self._grid.get_static_blocks(start_column, stop_column)
+
+
+class FrameBuffer:
+    """A double buffer of frames, written by one thread and read by another
+
+    The writer fills the back buffer and then flips it to the front with a
+    single assignment, so the reader always sees a complete frame, without
+    either thread taking a lock. Frames which are not read before the next
+    is published are skipped.
+    """
+
+    def __init__(self):
+        self._frames = [None, None]
+        self._front = 0
+
+    def publish(self, frame: Frame):
+        """Makes a frame the one returned by get_frame"""
+        back = 1 - self._front
+        self._frames[back] = frame
+        self._front = back
+
+    def get_frame(self) -> Optional[Frame]:
+        """(Frame) Returns the latest published frame, or None if there is none"""
+        return self._frames[self._front]
+
+
+class SimulationThread:
+    """Steps a world on a dedicated thread, at a fixed rate, publishing a Frame after each step
+
+    Each step calls the tick function, which steps the world (and applies any
+    game logic around the step, e.g. player input) and returns the world
+    stepped, which may change, e.g. on a level change.
+
+    Other threads must not use the world while the simulation runs; they
+    either submit actions, which are called on the simulation thread before
+    the next tick, through a queue which never blocks either thread, or pause
+    the simulation (see paused) to use the world directly.
+    """
+
+    def __init__(self, tick: Callable[[], World], rate: float = 1 / STEP_SIZE):
+        """
+        Parameters:
+            tick (Callable -> World): Steps the world once and returns it
+            rate (float): The number of ticks per second
+        """
+        self._tick = tick
+        self._period = 1 / rate
+        # deque appends and pops are atomic, so are used without a lock
+        self._actions = deque()
+        self._frames = FrameBuffer()
+
+        # set while the simulation may tick, and held by each tick
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+        # the number of holds not yet released, see hold
+        self._holds = 0
+        self._hold_lock = threading.Lock()
+        self._stopping = False
+        self._error = None
+
+        self._ticks = 0
+        self._world = None
+        self._generation = 0
+        self._static_grid = None
+
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        """Starts ticking on the simulation thread"""
+        self._thread.start()
+
+    def stop(self):
+        """Stops the simulation, waiting for the tick in progress to finish
+
+        May be called while paused, but not from the tick function.
+        """
+        self._stopping = True
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def is_running(self) -> bool:
+        """(bool) Returns True iff the simulation thread has started and not stopped"""
+        return self._thread.is_alive()
+
+    def get_error(self) -> Optional[Exception]:
+        """(Exception) Returns the error which stopped the simulation, if any"""
+        return self._error
+
+    def submit(self, action: Callable, *args):
+        """Queues action(*args) to be called on the simulation thread before the next tick
+
+        Safe to call from any thread, and never waits for the simulation.
+        """
+        self._actions.append((action, args))
+
+    def get_frame(self) -> Optional[Frame]:
+        """(Frame) Returns the frame published after the latest tick, or None before the first"""
+        return self._frames.get_frame()
+
+    def hold(self):
+        """Stops the simulation from ticking after the tick in progress, until release
+
+        Holds are counted, so the simulation only ticks again once each hold
+        has been released, e.g. a dialog's hold outlasts a menu action's pause.
+        Unlike paused, may be called from the tick function, e.g. when the game
+        needs the drawing thread to show a dialog before stepping again.
+        """
+        with self._hold_lock:
+            self._holds += 1
+            self._running.clear()
+
+    def release(self):
+        """Releases a hold, letting the simulation tick again once no holds remain
+
+        Raises:
+            RuntimeError: If the simulation is not held
+        """
+        with self._hold_lock:
+            if not self._holds:
+                raise RuntimeError("Cannot release a simulation which is not held")
+            self._holds -= 1
+            if not self._holds:
+                self._running.set()
+
+    @contextmanager
+    def paused(self):
+        """Context manager within which the simulation does not tick, so the
+        world may be used directly, e.g. by a menu action
+
+        Holds made before or within it (see hold) still hold the simulation
+        after it. Must not be used from the tick function.
+        """
+        self.hold()
+        try:
+            with self._lock:
+                yield
+        finally:
+            self.release()
+
+    def _run(self):
+        """Ticks at the simulation's rate until stopped"""
+        perf_counter = time.perf_counter
+        deadline = perf_counter()
+        while not self._stopping:
+            if not self._running.wait(IDLE_TIMEOUT):
+                deadline = perf_counter()
+                continue
+
+            with self._lock:
+                # the simulation may have been paused while waiting for the lock
+                if not self._running.is_set():
+                    continue
+                try:
+                    self._step()
+                except Exception as error:
+                    self._error = error
+                    return
+
+            deadline += self._period
+            delay = deadline - perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -MAX_LAG * self._period:
+                deadline = perf_counter()
+
+    def _step(self):
+        """Calls the submitted actions and the tick function, then publishes a frame"""
+        actions = self._actions
+        while actions:
+            action, args = actions.popleft()
+            action(*args)
+
+        world = self._tick()
+        self._ticks += 1
+        self._frames.publish(self._capture(world))
+
+    def _capture(self, world: World) -> Frame:
+        """(Frame) Returns a frame of the world at the end of the latest tick"""
+        if world is not self._world:
+            self._world = world
+            self._generation += 1
+            world.pop_static_changes()
+            self._static_grid = StaticGrid.from_world(world)
+        elif world.pop_static_changes():
+            self._static_grid = StaticGrid.from_world(world)
+
+        static_body = world.get_space().static_body
+        things = []
+        for thing in world.get_all_things():
+            shape = thing.get_shape()
+            body = shape.body
+            if body is static_body:
+                velocity = pymunk.Vec2d(0, 0)
+            else:
+                velocity = body.velocity
+            get_id = getattr(thing, 'get_id', None)
+            things.append(EntityFrame(
+                id(thing), type(thing), get_id() if get_id is not None else None,
+                FrameShape(shape.bb, FrameBody(body.position, velocity)),
+                tuple(_copy_value(getattr(thing, slot)) for slot in get_saved_slots(type(thing)))))
+
+        return Frame(self._ticks, world.get_time(), self._generation, tuple(things),
+                     self._static_grid)
@@ -0,0 +1,247 @@
+"""
+Off-screen (software) rendering of game worlds into PIL images
+
+Worlds are drawn by the same ViewRenderer draw methods used by the GameView,
+but onto a FrameCanvas, which implements the canvas methods used by those draw
+methods on top of a single preallocated PIL image. No display is required.
+
+A renderer is made to load PIL images, rather than tkinter images, by mixing
+in SoftwareImages, e.g.
+
+    class HeadlessRenderer(SoftwareImages, MarioViewRenderer):
+        pass
+
+    frames = FrameRenderer(HeadlessRenderer(BLOCK_IMAGES, ITEM_IMAGES, MOB_IMAGES), (1080, 240))
+    with FrameWriter("frames") as writer:
+        for _ in range(100):
+            world.step(data)
+            writer.write(frames.render(world))
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+from PIL import Image, ImageDraw
+
+from game.view import ViewRenderer
+from game.world import World
+
+# The background colour of frames, the same as the GameView
+BACKGROUND = "#6080ff"
+
+
+class SoftwareImages:
+    """Mixin for a ViewRenderer to load and convert images as RGBA PIL images
+    instead of tkinter images"""
+
+    def load_image(self, file: str) -> Image.Image:
+        """Load an image in the file location of images/{file}.png or images/{file}.gif
+
+        Caches the image within the renderer.
+        """
+        if file in self._images:
+            return self._images[file]
+
+        try:
+            image = Image.open("images/" + file + ".png")
+        except FileNotFoundError:
+            image = Image.open("images/" + file + ".gif")
+        image = self._images[file] = image.convert("RGBA")
+
+        return image
+
+    def convert_image(self, image: Image.Image) -> Image.Image:
+        """(Image) Returns an RGBA copy of a sprite sheet image, cached by the image"""
+        key = ("converted", id(image))
+        cached = self._images.get(key)
+        if cached is None or cached[0] is not image:
+            # keep the source image, so its id cannot be reused while cached
+            cached = self._images[key] = (image, image.convert("RGBA"))
+        return cached[1]
+
+
+class FrameCanvas:
+    """A stand-in for a tk.Canvas that draws onto a preallocated PIL frame buffer
+
+    Only the canvas methods used by ViewRenderer draw methods are implemented.
+    Coordinates are world coordinates; the left edge of the frame is moved with
+    scroll_to.
+    """
+
+    def __init__(self, size: Tuple[int, int], background: str = BACKGROUND):
+        """Construct a new canvas with a frame buffer of the given (width, height) size"""
+        self._size = size
+        self._background = background
+        self._frame = Image.new("RGB", size, background)
+        self._draw = ImageDraw.Draw(self._frame)
+        self._left = 0
+        self._items = 0
+
+    def get_frame(self) -> Image.Image:
+        """(Image) Returns the frame buffer, which is reused by every frame"""
+        return self._frame
+
+    def scroll_to(self, x: float):
+        """Moves the left edge of the frame to the world x coordinate"""
+        self._left = int(x)
+
+    def get_view_left(self) -> int:
+        """(int) Returns the world x coordinate of the left edge of the frame"""
+        return self._left
+
+    def clear(self):
+        """Fills the frame buffer with the background colour"""
+        self._draw.rectangle((0, 0, *self._size), fill=self._background)
+        self._items = 0
+
+    def create_image(self, x: float, y: float, image: Image.Image = None,
+                     anchor: str = "center", **options) -> int:
+        """Draws an RGBA image onto the frame, centred at (x, y) or with its top left corner at (x, y)"""
+        width, height = image.size
+        left = x - self._left
+        if anchor == "center":
+            left -= width / 2
+            y -= height / 2
+        self._frame.paste(image, (int(left), int(y)), image)
+        self._items += 1
+        return self._items
+
+    def create_rectangle(self, x1: float, y1: float, x2: float, y2: float,
+                         fill: str = None, **options) -> int:
+        """Draws a filled rectangle onto the frame, between any two opposite corners"""
+        left, right = sorted((x1 - self._left, x2 - self._left))
+        top, bottom = sorted((y1, y2))
+        self._draw.rectangle((left, top, right, bottom), fill=fill)
+        self._items += 1
+        return self._items
+
+
+class FrameRenderer:
+    """Renders worlds into a single, reused, PIL frame buffer
+
+    Static blocks are composited once into a background image for each world,
+    and only the cells reported by World.pop_static_changes are redrawn.
+    """
+
+    def __init__(self, renderer: ViewRenderer, size: Tuple[int, int],
+                 background: str = BACKGROUND):
+        """Construct a new frame renderer
+
+        Parameters:
+            renderer (ViewRenderer): A renderer loading PIL images, see SoftwareImages
+            size (tuple<int, int>): The (width, height) of each frame, in pixels
+            background (str): The background colour of each frame
+        """
+        self._renderer = renderer
+        self._canvas = FrameCanvas(size, background)
+        self._world = None
+        self._static = None
+
+    def get_canvas(self) -> FrameCanvas:
+        """(FrameCanvas) Returns the canvas frames are drawn onto"""
+        return self._canvas
+
+    def _update_static(self, world: World):
+        """Composites the static blocks of a new world, or the changed cells of the current world"""
+        cell_expanse = world.get_cell_expanse()
+        if world is not self._world:
+            self._world = world
+            self._static = Image.new("RGBA", world.get_pixel_size())
+            world.pop_static_changes()
+            cells = world.get_static_blocks()
+        else:
+            changes = world.pop_static_changes()
+            if not changes:
+                return
+            for column, row in changes:
+                left, top = column * cell_expanse, row * cell_expanse
+                self._static.paste((0, 0, 0, 0), (left, top, left + cell_expanse, top + cell_expanse))
+            cells = ((world.get_static_block_id(column, row), column, row)
+                     for column, row in changes)
+
+        for block_id, column, row in cells:
+            if block_id is None:
+                continue
+            image = self._renderer.get_static_block_image(block_id)
+            x = column * cell_expanse + (cell_expanse - image.width) // 2
+            y = row * cell_expanse + (cell_expanse - image.height) // 2
+            self._static.alpha_composite(image, (x, y))
+
+    def render(self, world: World, left: float = None) -> Image.Image:
+        """Draws a world into the frame buffer
+
+        Parameters:
+            world (World): The world to draw
+            left (float): The world x coordinate of the left edge of the frame,
+                          defaults to the current scroll position
+
+        Returns:
+            (Image): The frame buffer; copy it to keep the frame beyond the next render
+        """
+        canvas = self._canvas
+        if left is not None:
+            canvas.scroll_to(left)
+
+        self._update_static(world)
+        canvas.clear()
+        canvas.get_frame().paste(self._static, (-canvas.get_view_left(), 0), self._static)
+
+        draw = self._renderer.draw
+        for thing in world.get_all_things():
+            draw(thing, thing.get_shape(), canvas, (0, 0))
+
+        return canvas.get_frame()
+
+
+class FrameWriter:
+    """Writes frames to numbered image files, saving in background threads"""
+
+    def __init__(self, directory: str, prefix: str = "frame", extension: str = "png",
+                 workers: int = 4, **save_options):
+        """Construct a new writer, creating the directory if necessary
+
+        Parameters:
+            directory (str): The directory to write frames into
+            prefix (str): The start of each frame's file name
+            extension (str): The image format extension, e.g. png, bmp or ppm
+            workers (int): The number of threads saving frames
+            **save_options: Options passed on to Image.save, by default PNGs are
+                            saved with the fastest compression
+        """
+        os.makedirs(directory, exist_ok=True)
+        if extension == "png":
+            save_options.setdefault("compress_level", 1)
+
+        self._path = os.path.join(directory, prefix + "{:05d}." + extension)
+        self._save_options = save_options
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = []
+        self._count = 0
+
+    def write(self, frame: Image.Image) -> str:
+        """Writes a copy of a frame to the next numbered file
+
+        Returns:
+            (str): The file the frame is written to
+        """
+        path = self._path.format(self._count)
+        self._count += 1
+        self._pending.append(self._executor.submit(frame.copy().save, path, **self._save_options))
+        # surface errors from completed saves early
+        while self._pending and self._pending[0].done():
+            self._pending.pop(0).result()
+        return path
+
+    def close(self):
+        """Waits for every frame to be written"""
+        for pending in self._pending:
+            pending.result()
+        self._pending.clear()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
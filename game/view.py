@@ -12,6 +12,12 @@ from game.entity import Entity
 from game.block import Block
 from game.item import DroppedItem
 from game.mob import Mob
+from game.world import World
+
+# The width in pixels of each pre-rendered tile of a StaticLayer
+STATIC_TILE_WIDTH = 1024
+# The canvas tag of the pre-rendered tiles of a StaticLayer
+STATIC_LAYER_TAG = "static_layer"
 
 
 # Warning: You do not need to understand how this function works
@@ -112,6 +118,10 @@ class ViewRenderer:
         return [view.create_image(shape.bb.center().x + offset[0], shape.bb.center().y,
                                   image=image, tags="block")]
 
+    def get_static_block_image(self, block_id: str) -> tk.PhotoImage:
+        """(tk.PhotoImage) Returns the image of a static block with the given id"""
+        return self.load_image(self._block_images[block_id])
+
     @draw.register(DroppedItem)
     def _draw_physical_item(self, instance: DroppedItem, shape: pymunk.Shape,
                             view: tk.Canvas, offset: Tuple[int, int]) -> List[int]:
@@ -127,6 +137,84 @@ class ViewRenderer:
                                   image=image, tags="mob")]
 
 
+class StaticLayer:
+    """Pre-rendered images of the static blocks of a world.
+
+    The world is split into tiles of STATIC_TILE_WIDTH pixels, and the static
+    blocks within each tile are composited into one image for the tile. A tile
+    is only composited again when one of its static blocks changes (see
+    World.pop_static_changes), so drawing the static blocks of a level takes a
+    handful of canvas items rather than one per block.
+    """
+
+    def __init__(self, world: World, renderer: ViewRenderer,
+                 tile_width: int = STATIC_TILE_WIDTH):
+        """Construct a new layer, initially with every tile needing to be composited.
+
+        Parameters:
+            world (World): The world whose static blocks are drawn
+            renderer (ViewRenderer): The renderer providing static block images
+            tile_width (int): The width in pixels of each tile, rounded down to
+                              a whole number of grid cells
+        """
+        self._world = world
+        self._renderer = renderer
+
+        cell_expanse = world.get_cell_expanse()
+        self._tile_columns = max(tile_width // cell_expanse, 1)
+        self._tile_width = self._tile_columns * cell_expanse
+
+        width, self._height = world.get_pixel_size()
+        count = -(-width // self._tile_width)
+        self._tiles = [None] * count
+        self._dirty = set(range(count))
+        world.pop_static_changes()
+
+    def get_world(self) -> World:
+        """(World) Returns the world whose static blocks are drawn"""
+        return self._world
+
+    def get_tile_width(self) -> int:
+        """(int) Returns the width in pixels of each tile"""
+        return self._tile_width
+
+    def update(self):
+        """Composites each tile containing a static block that has changed"""
+        for column, _ in self._world.pop_static_changes():
+            self._dirty.add(column // self._tile_columns)
+
+        for index in self._dirty:
+            self._composite(index)
+        self._dirty.clear()
+
+    def _composite(self, index: int):
+        """Draws the static blocks within a tile into the tile's image"""
+        tile = self._tiles[index]
+        if tile is None:
+            tile = self._tiles[index] = tk.PhotoImage(width=self._tile_width,
+                                                      height=self._height)
+        else:
+            tile.blank()
+
+        cell_expanse = self._world.get_cell_expanse()
+        start = index * self._tile_columns
+        for block_id, column, row in self._world.get_static_blocks(start, start + self._tile_columns):
+            image = self._renderer.get_static_block_image(block_id)
+            # centre the image within the block's grid cell
+            x = (column - start) * cell_expanse + (cell_expanse - image.width()) // 2
+            y = row * cell_expanse + (cell_expanse - image.height()) // 2
+            tile.tk.call(tile, 'copy', image, '-to', x, y)
+
+    def get_tiles(self) -> Iterable[Tuple[int, tk.PhotoImage]]:
+        """Yields the left edge and image of each tile, once every tile has been composited
+
+        Yield:
+            tuple<int, tk.PhotoImage>
+        """
+        for index, tile in enumerate(self._tiles):
+            yield index * self._tile_width, tile
+
+
 class GameView(tk.Canvas):
     """A view class for the sandbox game, with convenience methods to draw various parts of the UI"""
 
@@ -142,10 +230,13 @@ class GameView(tk.Canvas):
                         (entity, entities shape, self (canvas), offset)
         """
         width, height = size
-        super().__init__(master, width=width, height=height, bg="#6080ff")
+        super().__init__(master, width=width, height=height, bg="#6080ff",
+                         scrollregion=(0, 0, width, height))
 
         self._world_view_router = physical_view_router
         self._offset = (0, 0)
+        self._static_layer = None
+        self._region_size = size
 
     def shift(self, offset: Tuple[int, int]):
         """Shift the view offset by the given offset.
@@ -174,3 +265,51 @@ class GameView(tk.Canvas):
             shape = thing.get_shape()
 
             self._world_view_router.draw(thing, shape, self, self._offset)
+
+    def draw_static_layer(self, world: World):
+        """Draws the static blocks of a world from their pre-rendered tiles, see StaticLayer
+
+        The tiles are only added to the canvas when the world changes; after that,
+        changes to the static blocks are composited into the existing tiles.
+        The scroll region of the view is set to the size of the world.
+
+        Parameters:
+            world (World): The world whose static blocks are drawn, or a StaticGridView
+                           of the frames of a world stepped on another thread
+        """
+        layer = self._static_layer
+        if layer is not None and layer.get_world() is world:
+            layer.update()
+            return
+
+        layer = self._static_layer = StaticLayer(world, self._world_view_router)
+        layer.update()
+        self.set_scroll_region(world.get_pixel_size())
+
+        self.delete(STATIC_LAYER_TAG)
+        for x, tile in layer.get_tiles():
+            item = self.create_image(x, 0, image=tile, anchor=tk.NW, tags=STATIC_LAYER_TAG)
+            self.tag_lower(item)
+
+    def clear(self):
+        """Deletes every canvas item other than the pre-rendered static block tiles"""
+        self.delete('!' + STATIC_LAYER_TAG)
+
+    def set_scroll_region(self, size: Tuple[int, int]):
+        """Sets the (width, height) size of the scrollable region of the view.
+
+        Items are drawn in world coordinates, and the visible part of the region
+        is moved with scroll_to.
+        """
+        self._region_size = size
+        self.config(scrollregion=(0, 0, *size))
+
+    def scroll_to(self, x: float):
+        """Scrolls the view so that its left edge is at the x coordinate of the scroll region."""
+        width = self._region_size[0]
+        if width:
+            self.xview_moveto(x / width)
+
+    def get_view_left(self) -> float:
+        """(float) Returns the x coordinate of the scroll region at the left edge of the view"""
+        return self.canvasx(0)
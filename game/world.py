@@ -4,13 +4,19 @@ A class to represent a world made up of physical things
 
 import pymunk
 import time
-from typing import Tuple, Iterable
+from contextlib import contextmanager
+import numpy as np
+from array import array
+from typing import Tuple, Iterable, Optional, Callable, NamedTuple, Any
 
 from game.entity import BoundaryWall, Entity
 from player import Player
 from game.item import DroppedItem
 from game.block import Block
 from game.mob import Mob
+from game.batch import MobBatch
+from game.profiling import StepHook
+from game.scheduler import Scheduler, Timer
 
 # The intention with the following constants is to express a finite range of values that
 # can effectively be treated as their own type in this code. We have used collections of
@@ -39,12 +45,107 @@ PHYSICAL_THING_CATEGORIES = {
     "mob": 2 ** 5
 }
 
+# Pairs of categories of things whose shapes never collide, e.g. mobs walk through items
+#   - Their collisions are filtered out by the masks of the shapes' filters, in pymunk's
+#     broadphase, so no collision callback is called for them
+IGNORED_CATEGORY_PAIRS = {("mob", "item")}
+
+# Codes for the kind of thing in each grid cell, see World.get_cell_codes
+#   - Where several things share a cell, the highest code is used
+#   - Cells outside of the world are walls
+CELL_CODES = {
+    "empty": 0,
+    "block": 1,
+    "mob": 2,
+    "item": 3,
+    "player": 4,
+    "wall": 5
+}
+
 # Names for each collision event recognised by pymunk (can have a callback attached)
 COLLISION_HANDLER_CALLBACKS = {'begin', 'separate', 'pre_solve', 'post_solve'}
 
+class CollisionRule(NamedTuple):
+    """A declaration of the callbacks for collisions between two collision types
+
+    Each callback is called with the two colliding things (in the order of the
+    collision types), the rule's data and the pymunk arbiter, i.e.
+        callback(thing_a, thing_b, data, arbiter)
+    The begin and pre_solve callbacks return whether the collision should be
+    processed physically.
+    """
+    collision_type_a: str
+    collision_type_b: str
+    on_begin: Optional[Callable] = None
+    on_separate: Optional[Callable] = None
+    on_pre_solve: Optional[Callable] = None
+    on_post_solve: Optional[Callable] = None
+    data: Any = None
+
+
+# Entity attributes that are not part of a WorldSnapshot; shapes and mob batches are
+# restored by the world, and observers and worlds are references, not state
+UNSAVED_SLOTS = {'_shape', '_batch', '_observers', '_world'}
+
+# The names of the saved attributes of each entity class, see get_saved_slots
+_saved_slots = {}
+
+
+def get_saved_slots(cls) -> Tuple[str, ...]:
+    """(tuple<str, ...>) Returns the names of the __slots__ attributes of an entity
+    class that are saved by a WorldSnapshot"""
+    slots = _saved_slots.get(cls)
+    if slots is None:
+        slots = []
+        for base in reversed(cls.__mro__):
+            for slot in base.__dict__.get('__slots__', ()):
+                if slot not in UNSAVED_SLOTS and slot not in slots:
+                    slots.append(slot)
+        slots = _saved_slots[cls] = tuple(slots)
+    return slots
+
+
+def _copy_value(value):
+    """Returns a copy of a mutable container attribute, or the value itself"""
+    if type(value) in (list, dict, set):
+        return value.copy()
+    return value
+
+
+class WorldSnapshot:
+    """The state of a world's things at the end of a step, see World.snapshot
+
+    Holds references to the world's entities, and copies of their attributes,
+    body positions and velocities, the static block grid, the mob batch and
+    the scheduled timers.
+    """
+
+    __slots__ = ('things', 'static_grid', 'batch', 'timers')
+
+    def __init__(self, things, static_grid, batch, timers):
+        """
+        Parameters:
+            things (dict<Entity: tuple>): The shape, body motion and attributes of each
+                                          thing in the world
+            static_grid (bytes): The contents of the static block grid
+            batch: The state of the world's mob batch, or None
+            timers: The state of the world's scheduler
+        """
+        self.things = things
+        self.static_grid = static_grid
+        self.batch = batch
+        self.timers = timers
+
+
+# Each cell code, as a column for weighting the presence of each code in a cell
+_CELL_LEVELS = np.arange(max(CELL_CODES.values()) + 1, dtype=np.uint8)[:, None, None]
+
 # The size of a time delta between steps
 STEP_SIZE = 0.02
 
+# The fewest cells in a spatial hash broadphase, see World.use_spatial_hash
+MIN_SPATIAL_HASH_COUNT = 1000
+
 
 class World:
     """Game world that contains things in physical space.
@@ -61,10 +162,27 @@ class World:
         - position/point/coordinates
         - velocity/speed
         - acceleration/gravity
+
+    While the world is stepping, things added to or removed from the world are
+    queued, and the queue is applied in a batch after the physics step. This
+    means collision callbacks never modify the space mid-step, and a thing
+    removed more than once in a step is only removed once. Other actions, such
+    as changing level, can be queued with defer.
+
+    Static blocks (see add_static_block) are stored as a grid of block type codes
+    rather than as individual Block instances. Each horizontal run of identical
+    static blocks shares a single physical shape, and a Block instance is only
+    materialised for a cell when something (a query or a collision) needs one.
+
+    Timed events, such as a switch recovering its bricks, are scheduled with
+    schedule on the world's simulation time, rather than polled by each thing
+    on every step.
     """
 
     def __init__(self, grid_size, cell_expanse, gravity=(0, 300), boundary_thickness=50,
-                 collision_types=None, thing_categories=None):
+                 collision_types=None, thing_categories=None, batch_mobs=False,
+                 spatial_hash=False, iterations=10, collision_slop=0.1, collision_rules=(),
+                 ignored_pairs=None):
         """Creates a new world with four boundary walls
 
         Parameters:
@@ -78,6 +196,18 @@ class World:
             thing_categories (dict<str: int>):
                     Mapping of thing categories to unique powers of 2
                     Defaults to PHYSZICAL_THING_CATEGORIES constant
+            batch_mobs (bool): If True, mobs using the default Mob or CloudMob
+                               behaviour are stepped together in a MobBatch
+            spatial_hash (bool): If True, the space uses a spatial hash broadphase
+                                 with one grid cell per hash cell, instead of the
+                                 default bounding box tree (see use_spatial_hash)
+            iterations (int): The number of solver iterations per physics step
+            collision_slop (float): The amount of overlap allowed between shapes
+            collision_rules (iterable<CollisionRule>): The collision callbacks to install,
+                                                       see add_collision_rule
+            ignored_pairs (iterable<tuple<str, str>>):
+                    Pairs of thing categories whose shapes never collide
+                    Defaults to IGNORED_CATEGORY_PAIRS constant
 
         """
         if collision_types is None:
@@ -88,17 +218,85 @@ class World:
             thing_categories = PHYSICAL_THING_CATEGORIES
         self._thing_categories = thing_categories
 
+        if ignored_pairs is None:
+            ignored_pairs = IGNORED_CATEGORY_PAIRS
+        # the categories never colliding with each category
+        self._ignored_masks = {}
+        for category_a, category_b in ignored_pairs:
+            a, b = thing_categories[category_a], thing_categories[category_b]
+            self._ignored_masks[a] = self._ignored_masks.get(a, 0) | b
+            self._ignored_masks[b] = self._ignored_masks.get(b, 0) | a
+
         self._space = pymunk.Space()
 
         self._space.gravity = gravity
+        self._space.iterations = iterations
+        self._space.collision_slop = collision_slop
 
         self._grid_size = grid_size
         self._cell_expanse = cell_expanse
 
         self._pixel_size = tuple(grid * cell_expanse for grid in grid_size)
 
+        if spatial_hash:
+            self.use_spatial_hash()
+
         self._create_boundaries(boundary_thickness)
 
+        # static block storage, one unsigned byte per grid cell (0 is empty)
+        columns, rows = grid_size
+        self._static_grid = array('B', bytes(columns * rows))
+        self._static_ids = [None]
+        self._static_codes = {}
+        # physical shapes of each row of static blocks, and the (row, start, stop)
+        # cells covered by each of those shapes
+        self._static_rows = {}
+        self._static_runs = {}
+        self._retired_static_shapes = []
+        self._dirty_static_rows = set()
+        # cells changed since the last call to pop_static_changes, e.g. for redrawing
+        self._static_changes = set()
+        # blocks materialised for static grid cells, keyed by (column, row)
+        self._static_blocks = {}
+        # one shape filter per combination of categories and ignored categories, shared by every shape
+        self._filters = {}
+        self._static_filter = self._get_filter(self._thing_categories["block"])
+        # shapes and bodies waiting to be added to the space, see bulk_add
+        self._bulk_objects = None
+
+        self._mob_batch = MobBatch() if batch_mobs else None
+
+        # the cell code of each collision type, see get_cell_codes
+        self._cell_kinds = {collision_types[kind]: code for kind, code in CELL_CODES.items()
+                            if kind in collision_types and kind != "wall"}
+        # cell code grid and the number of things of each code in each cell,
+        # built on first use and then maintained incrementally
+        self._cell_codes = None
+        self._cell_counts = None
+        # the [code, column, row, width, height, body] covered by each thing, and
+        # those of things with non-static bodies, which are updated after each step
+        self._cell_things = {}
+        self._moving_cells = {}
+
+        # things and actions queued while the world is stepping
+        self._stepping = False
+        self._pending_removals = {}
+        self._pending_actions = []
+        # things whose queued addition has not been cancelled by their removal
+        self._pending_additions = {}
+
+        # timed events, on the simulation time advanced by each step
+        self._scheduler = Scheduler()
+
+        # step hooks, and whether the current step is being profiled by them
+        self._hooks = []
+        self._profiling = False
+
+        # the collision callback and data of each (collision type a, collision type b, event)
+        self._collision_callbacks = {}
+        for rule in collision_rules:
+            self.add_collision_rule(rule)
+
         self._last_time = time.time()
 
     def get_space(self) -> pymunk.Space:
@@ -131,6 +329,26 @@ class World:
         """
         self._space.gravity = (gravity_x, gravity_y)
 
+    def use_spatial_hash(self, dimension: float = None, count: int = None):
+        """Switches the physics space to a spatial hash broadphase
+
+        Levels are grid aligned and mostly made of equal sized blocks, which
+        suits a spatial hash better than the default bounding box tree.
+
+        Parameters:
+            dimension (float): The size of each hash cell
+                               Defaults to the cell expanse of the world grid
+            count (int): The minimum number of hash cells
+                         Defaults to the number of cells in the world grid
+        """
+        if dimension is None:
+            dimension = self._cell_expanse
+        if count is None:
+            columns, rows = self._grid_size
+            count = max(columns * rows, MIN_SPATIAL_HASH_COUNT)
+
+        self._space.use_spatial_hash(dimension, count)
+
     def get_pixel_size(self):
         """Returns the (width, height) size of the world"""
         return self._pixel_size
@@ -150,21 +368,290 @@ class World:
             step method is called on each thing, with:
                 - time_delta: the time (in seconds) since the last step
                 - game_data: the game_data parameter supplied to this method
+            Mobs in the world's mob batch are instead stepped together
         2. Applies/resolves physics
+        3. Applies the things and actions queued during steps 1 & 2
+
+        Parameters:
+            game_data (tuple<World, Player>): Arbitrary data to be passed on to all things
+        """
+        if self._hooks:
+            self._profile_step(game_data)
+        else:
+            self._step(game_data)
+
+    def _step(self, game_data, on_entity_step: Callable = None):
+        """Steps the game world forward by one time step, see step
 
         Parameters:
             game_data (tuple<World, Player>): Arbitrary data to be passed on to all things
+            on_entity_step (Callable): If given, each entity step and batched mob step is
+                                       timed, and reported with on_entity_step(type, seconds),
+                                       and collision callbacks are timed for the step hooks
         """
         now = time.time()
         time_delta = now - self._last_time
-        for shape in self._space.shapes:
-            thing = shape.object
-
-            if thing:
-                thing.step(time_delta, game_data)
+        self._update_static_shapes()
+
+        perf_counter = time.perf_counter
+        self._stepping = True
+        self._profiling = on_entity_step is not None
+        try:
+            batch = self._mob_batch if self._mob_batch is not None else ()
+            for shape in self._space.shapes:
+                thing = shape.object
+
+                if thing and thing not in batch:
+                    if on_entity_step is None:
+                        thing.step(time_delta, game_data)
+                    else:
+                        start = perf_counter()
+                        thing.step(time_delta, game_data)
+                        on_entity_step(type(thing), perf_counter() - start)
+
+            if batch:
+                if on_entity_step is None:
+                    batch.step(time_delta, game_data)
+                else:
+                    start = perf_counter()
+                    batch.step(time_delta, game_data)
+                    on_entity_step(type(batch), perf_counter() - start)
+
+            self._space.step(STEP_SIZE)
+            self._scheduler.advance(STEP_SIZE)
+        finally:
+            self._stepping = False
+            self._profiling = False
 
-        self._space.step(STEP_SIZE)
         self._last_time = now
+        self._apply_pending()
+        if self._cell_codes is not None:
+            self._update_cells()
+
+    def _profile_step(self, game_data):
+        """Steps the game world as step does, notifying the step hooks
+
+        Entity steps and collision callbacks are only timed if a hook's pre_step
+        asks for the step to be profiled.
+        """
+        hooks = self._hooks
+        perf_counter = time.perf_counter
+        start = perf_counter()
+        profiling = False
+        for hook in hooks:
+            if hook.pre_step(self, game_data):
+                profiling = True
+
+        if not profiling:
+            self._step(game_data)
+        else:
+            def on_entity_step(entity_type: type, elapsed: float):
+                for hook in hooks:
+                    hook.on_entity_step(entity_type, elapsed)
+
+            self._step(game_data, on_entity_step)
+
+        elapsed = perf_counter() - start
+        for hook in hooks:
+            hook.post_step(self, game_data, elapsed)
+
+    def is_stepping(self) -> bool:
+        """(bool) Returns True iff the world is currently stepping, in which case
+        additions, removals and deferred actions are queued"""
+        return self._stepping
+
+    def get_time(self) -> float:
+        """(float) Returns the simulation time of the world, in seconds
+
+        The simulation time advances by STEP_SIZE each step, however long the
+        step takes.
+        """
+        return self._scheduler.get_time()
+
+    def schedule(self, delay: float, callback: Callable, *args, interval: float = None) -> Timer:
+        """Schedules callback(*args) to be called at the end of the step in which
+        the simulation time reaches delay seconds from now
+
+        As with collision callbacks, things added or removed by the callback are
+        queued until the step has finished. Unlike polling the time in a thing's
+        step method, a waiting timer costs nothing per step.
+
+        Parameters:
+            delay (float): The simulation time until the callback is called, in seconds
+            callback (Callable): The function to call, e.g. a bound method of a thing
+            *args: Arguments to call the callback with
+            interval (float): If given, the callback is called again every interval
+                              seconds after the first call, until the timer is cancelled
+
+        Returns:
+            (Timer): The timer of the callback, which can be cancelled
+        """
+        return self._scheduler.schedule(delay, callback, *args, interval=interval)
+
+    def defer(self, action: Callable, *args):
+        """Calls action(*args) once the current step has finished
+
+        If the world is not stepping, the action is called immediately.
+
+        Parameters:
+            action (Callable): The action to call, e.g. a level transition
+            *args: Arguments to call the action with
+        """
+        if self._stepping:
+            self._pending_actions.append((action, args))
+        else:
+            action(*args)
+
+    def _queue_addition(self, thing: Entity, add: Callable, args: tuple):
+        """Queues the addition of a thing until the end of the step, unless the
+        thing is removed before then, see remove_thing
+
+        Parameters:
+            thing (Entity): The thing to add
+            add (Callable): The method adding the thing, e.g. add_mob
+            args (tuple): The arguments to call the method with
+        """
+        self._pending_additions[thing] = None
+        self._pending_actions.append((self._add_pending, (thing, add, args)))
+
+    def _add_pending(self, thing: Entity, add: Callable, args: tuple):
+        """Adds a thing whose addition was queued, unless it has since been removed"""
+        if thing in self._pending_additions:
+            del self._pending_additions[thing]
+            add(*args)
+
+    def _apply_pending(self):
+        """Applies the removals, then the additions and actions, queued during a step"""
+        if self._pending_removals:
+            things = list(self._pending_removals)
+            self._pending_removals.clear()
+            self._remove_things(things)
+
+        while self._pending_actions:
+            actions = self._pending_actions
+            self._pending_actions = []
+            for action, args in actions:
+                action(*args)
+
+    def _remove_things(self, things: Iterable[Entity]):
+        """Removes the shapes, and any non-static bodies, of things in a single space update"""
+        # things being removed may have been added in bulk, but not yet to the space
+        self._flush_bulk()
+        objects = []
+        for thing in things:
+            if self._mob_batch is not None:
+                self._mob_batch.remove(thing)
+            if self._cell_codes is not None:
+                self._untrack_cells(thing)
+
+            shape = thing.get_shape()
+            objects.append(shape)
+            if shape.body is not self._space.static_body:
+                objects.append(shape.body)
+
+        self._space.remove(*objects)
+
+    def snapshot(self) -> WorldSnapshot:
+        """(WorldSnapshot) Returns the current state of the world, for restore
+
+        The snapshot includes the position and velocity of each body, the
+        attributes of each entity (e.g. health, score and block states), which
+        things are in the world, the static block grid and the scheduled timers.
+
+        Raises:
+            RuntimeError: If the world is stepping
+        """
+        if self._stepping:
+            raise RuntimeError("Cannot snapshot a world while it is stepping")
+
+        static_body = self._space.static_body
+        things = {}
+        for shape in self._space.shapes:
+            thing = shape.object
+            if thing is None:
+                continue
+
+            body = shape.body
+            if body is static_body:
+                motion = None
+            else:
+                motion = (body.position, body.velocity, body.angle, body.angular_velocity)
+            things[thing] = (shape, motion, tuple(_copy_value(getattr(thing, slot))
+                                                  for slot in get_saved_slots(type(thing))))
+
+        batch = self._mob_batch.get_state() if self._mob_batch is not None else None
+        return WorldSnapshot(things, self._static_grid.tobytes(), batch,
+                             self._scheduler.get_state())
+
+    def restore(self, snapshot: WorldSnapshot):
+        """Returns the world to the state of a snapshot taken from it
+
+        Things added since the snapshot are removed, and things removed since the
+        snapshot are added back. The cost is proportional to the number of things
+        in the world, plus the number of grid rows whose static blocks changed.
+
+        Raises:
+            RuntimeError: If the world is stepping
+        """
+        if self._stepping:
+            raise RuntimeError("Cannot restore a world while it is stepping")
+
+        # the cell codes are rebuilt on next use, rather than updated thing by thing
+        self._forget_cells()
+
+        saved = snapshot.things
+        current = {shape.object for shape in self._space.shapes if shape.object is not None}
+        removed = [thing for thing in current if thing not in saved]
+        if removed:
+            self._remove_things(removed)
+
+        static_body = self._space.static_body
+        objects = []
+        for thing, (shape, motion, values) in saved.items():
+            if thing not in current:
+                objects.append(shape)
+                if shape.body is not static_body:
+                    objects.append(shape.body)
+            # the thing may have been added to another world since, e.g. the player
+            thing._shape = shape
+
+            if motion is not None:
+                body = shape.body
+                body.position, body.velocity, body.angle, body.angular_velocity = motion
+            for slot, value in zip(get_saved_slots(type(thing)), values):
+                setattr(thing, slot, _copy_value(value))
+
+            if isinstance(thing, Player):
+                thing._notify_observers()
+        if objects:
+            self._space.add(*objects)
+
+        if self._mob_batch is not None:
+            self._mob_batch.set_state(snapshot.batch)
+        self._scheduler.set_state(snapshot.timers)
+
+        self._restore_static_grid(snapshot.static_grid)
+
+    def _restore_static_grid(self, grid: bytes):
+        """Restores the static block grid to a copy taken by snapshot, row by row"""
+        if self._static_grid.tobytes() == grid:
+            return
+
+        columns, rows = self._grid_size
+        static_ids = self._static_ids
+        for row in range(rows):
+            start = row * columns
+            saved = grid[start:start + columns]
+            if self._static_grid[start:start + columns].tobytes() == saved:
+                continue
+
+            for column, code in enumerate(saved):
+                if self._static_grid[start + column] == code:
+                    continue
+                if code:
+                    self.add_static_block_to_grid(static_ids[code], column, row)
+                else:
+                    self.remove_static_block_from_grid(column, row)
 
     def xy_to_grid(self, x: float, y: float) -> Tuple[int, int]:
         """Converts pixel position (xy) to grid position"""
@@ -178,33 +665,103 @@ class World:
         """Converts grid position to pixel position of its centre"""
         return int((x + .5) * self._cell_expanse), int((y + .5) * self._cell_expanse)
 
-    def _wrap_callback(self, callback):
-        """Wraps a pymunk collision callback into a more OOP form"""
+    def _wrap_callback(self, callback, data=None):
+        """Wraps a pymunk collision callback into a more OOP form
 
-        def wrapped_callback(arbiter, space, data):
-            thing_a, thing_b = [s.object for s in arbiter.shapes]
-            return callback(thing_a, thing_b, data['data'], arbiter)
+        The wrapped callback is called with the two colliding things, data and the arbiter.
+        """
+        resolve = self._resolve_static_shape
+
+        def wrapped_callback(arbiter, space, _):
+            shape_a, shape_b = arbiter.shapes
+            thing_a = shape_a.object
+            thing_b = shape_b.object
+            # static blocks are resolved to the cell nearest the other thing
+            if thing_a is None:
+                thing_a = resolve(shape_a, shape_b.body.position.x)
+            elif thing_b is None:
+                thing_b = resolve(shape_b, shape_a.body.position.x)
+            return callback(thing_a, thing_b, data, arbiter)
 
         return wrapped_callback
 
-    def add_collision_handler(self, collision_type_a, collision_type_b, data=None,
-                              on_begin=None, on_separate=None, on_pre_solve=None, on_post_solve=None):
-        """Adds a collision handler to the game world
-
-        Parameters:
-            collision_type_a (str): A collision type in
-        """
+    def _time_callback(self, wrapped_callback, collision_type_a: str, collision_type_b: str, key: str):
+        """Wraps a wrapped collision callback to report its duration to the step hooks,
+        during steps that are being profiled"""
+        hooks = self._hooks
+        perf_counter = time.perf_counter
+
+        def timed_callback(arbiter, space, data):
+            if not self._profiling:
+                return wrapped_callback(arbiter, space, data)
+
+            start = perf_counter()
+            result = wrapped_callback(arbiter, space, data)
+            elapsed = perf_counter() - start
+            for hook in hooks:
+                hook.on_collision(collision_type_a, collision_type_b, key, elapsed)
+            return result
+
+        return timed_callback
+
+    def _install_callback(self, collision_type_a: str, collision_type_b: str, key: str):
+        """Sets a collision callback on the pymunk handler for a pair of collision types,
+        timed only if there are step hooks"""
+        callback, data = self._collision_callbacks[collision_type_a, collision_type_b, key]
         handler = self._space.add_collision_handler(self._collision_types[collision_type_a],
                                                     self._collision_types[collision_type_b])
 
-        handler.data['data'] = data
+        wrapped_callback = self._wrap_callback(callback, data)
+        if self._hooks:
+            wrapped_callback = self._time_callback(wrapped_callback, collision_type_a,
+                                                   collision_type_b, key)
+        setattr(handler, key, wrapped_callback)
 
-        local_variables = locals()
+    def add_collision_rule(self, rule: CollisionRule):
+        """Installs the callbacks of a collision rule in the game world
 
+        Only one rule can be installed for each pair of collision types; a later
+        rule for the same pair replaces any callbacks it defines. The callbacks are
+        never called for things whose categories are ignored pairs, see IGNORED_CATEGORY_PAIRS.
+        """
         for key in COLLISION_HANDLER_CALLBACKS:
-            callback = local_variables[f"on_{key}"]
+            callback = getattr(rule, f"on_{key}")
             if callback:
-                setattr(handler, key, self._wrap_callback(callback))
+                self._collision_callbacks[rule.collision_type_a, rule.collision_type_b, key] = \
+                    (callback, rule.data)
+                self._install_callback(rule.collision_type_a, rule.collision_type_b, key)
+
+    def add_hook(self, hook: StepHook):
+        """Adds a hook notified of the timing of each step, see StepHook
+
+        While no hooks are added, steps and collision callbacks are not timed.
+        """
+        was_hooked = bool(self._hooks)
+        self._hooks.append(hook)
+        if not was_hooked:
+            self._reinstall_callbacks()
+
+    def remove_hook(self, hook: StepHook):
+        """Removes a hook added by add_hook"""
+        self._hooks.remove(hook)
+        if not self._hooks:
+            self._reinstall_callbacks()
+
+    def _reinstall_callbacks(self):
+        """Reinstalls every collision callback, after hooks have been added or all removed"""
+        for collision_type_a, collision_type_b, key in self._collision_callbacks:
+            self._install_callback(collision_type_a, collision_type_b, key)
+
+    def add_collision_handler(self, collision_type_a, collision_type_b, data=None,
+                              on_begin=None, on_separate=None, on_pre_solve=None, on_post_solve=None):
+        """Adds a collision handler to the game world
+
+        Equivalent to add_collision_rule, see CollisionRule for the parameters.
+        """
+        self.add_collision_rule(CollisionRule(collision_type_a, collision_type_b, data=data,
+                                              on_begin=on_begin, on_separate=on_separate,
+                                              on_pre_solve=on_pre_solve,
+                                              on_post_solve=on_post_solve))
 
     def get_all_things(self) -> Iterable[Entity]:
         """Yields all physical things in this world, including boundary walls
@@ -230,9 +787,15 @@ class World:
             collision_type (int): The collision type of the thing; should be a value of self._collision_types
             categories (int): The query categories of the thing; should be a bitwise combination of the
                               value of self._physical_thing_categories
-            mass (float): The mass of the thing
+            mass (float): The mass of the thing; a thing without mass is kinematic, i.e. moved
+                          only by its velocity, and pushes, but is not pushed by, other things
             friction (float): The friction of the thing
         """
+        if self._stepping:
+            self._queue_addition(thing, self.add_thing, (thing, x, y, size, collision_type,
+                                                         categories, mass, friction))
+            return
+
         width, height = size
 
         left = -width // 2
@@ -240,46 +803,135 @@ class World:
         top = -height // 2
         bottom = top + height
 
-        body = pymunk.Body(mass, pymunk.inf)
+        # a dynamic body without mass has an infinite inverse mass, so the first
+        # contact with it (e.g. the player landing on a cloud) makes its position NaN
+        if mass:
+            body = pymunk.Body(mass, pymunk.inf)
+        else:
+            body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
         body.position = x, y
         shape = pymunk.Poly(body, [(left, top), (left, bottom), (right, bottom), (right, top)])
 
-        shape.object = thing
-        if collision_type is not None:
-            shape.collision_type = collision_type
+        # things without a collision type or categories keep those of a new shape
+        if collision_type is None:
+            collision_type = shape.collision_type
+        if categories is None:
+            shape_filter = shape.filter
+        else:
+            shape_filter = self._get_filter(categories, thing.get_ignored_categories())
+        thing.resolve_shape(shape, friction, collision_type, shape_filter)
 
-        if categories is not None:
-            shape.filter = pymunk.ShapeFilter(categories=categories)
+        thing.set_shape(shape)
+        self._add_objects(thing, body, shape)
 
-        shape.friction = friction
+    def _get_filter(self, categories: int, ignored: Tuple[str, ...] = ()) -> pymunk.ShapeFilter:
+        """(pymunk.ShapeFilter) Returns the shared shape filter of shapes in the given categories
 
-        thing.set_shape(shape)
-        self._space.add(body, shape)
+        The filter's mask excludes the categories which never collide with any of
+        the given categories (see IGNORED_CATEGORY_PAIRS), and the ignored categories.
+
+        Parameters:
+            categories (int): A bitwise combination of the values of self._thing_categories
+            ignored (tuple<str, ...>): The names of further categories never collided with
+        """
+        key = categories, ignored
+        shape_filter = self._filters.get(key)
+        if shape_filter is None:
+            mask = pymunk.ShapeFilter.ALL_MASKS
+            for category, ignored_mask in self._ignored_masks.items():
+                if categories & category:
+                    mask &= ~ignored_mask
+            for category in ignored:
+                mask &= ~self._thing_categories[category]
+            shape_filter = self._filters[key] = pymunk.ShapeFilter(categories=categories, mask=mask)
+        return shape_filter
+
+    def _add_objects(self, thing: Entity, *objects):
+        """Adds the shape, and any body, of a thing to the space, or to the bulk
+        addition in progress"""
+        if self._bulk_objects is not None:
+            self._bulk_objects.append((thing, objects))
+            return
+
+        self._space.add(*objects)
+        if self._cell_codes is not None:
+            self._track_cells(thing)
+
+    @contextmanager
+    def bulk_add(self):
+        """Context manager adding every thing added within it to the space at once
+
+        The shapes and bodies of things added in the context, and the shapes of
+        any new static blocks, are inserted with a single pymunk Space.add when
+        the context exits. Until then, those things are not found by queries
+        of the space, e.g. get_things.
+
+            with world.bulk_add():
+                for x, y in positions:
+                    world.add_mob(Mob("mushroom", size=(1, 1)), x, y)
+        """
+        if self._bulk_objects is not None:
+            yield
+            return
+
+        self._bulk_objects = []
+        try:
+            yield
+        finally:
+            self._flush_bulk()
+
+    def _flush_bulk(self):
+        """Adds every shape and body of the bulk addition in progress to the space, and ends it"""
+        pending = self._bulk_objects
+        self._bulk_objects = None
+        if pending is None:
+            return
+
+        objects = [obj for _, thing_objects in pending for obj in thing_objects]
+        # the shapes of static blocks are added here too, rather than on the next step
+        self._update_static_shapes(objects)
+        if objects:
+            self._space.add(*objects)
+
+        if self._cell_codes is not None:
+            for thing, _ in pending:
+                self._track_cells(thing)
 
     def remove_thing(self, thing: Entity):
-        """Removes a thing from the world"""
-        self._space.remove(thing.get_shape())
+        """Removes a thing from the world
+
+        A thing added during the current step is not added at all.
+        """
+        if self._stepping:
+            if thing in self._pending_additions:
+                del self._pending_additions[thing]
+            else:
+                self._pending_removals[thing] = None
+        else:
+            self._remove_things((thing,))
 
     def add_player(self, player: Player, x: float, y: float, mass: float = 100, friction: float = .5):
         """Adds a player to game world at the position ('x', 'y')"""
+        if self._stepping:
+            self._queue_addition(player, self.add_player, (player, x, y, mass, friction))
+            return
+
         dx = dy = int(self._cell_expanse * .4 - 2)
 
         body = pymunk.Body(mass, pymunk.inf)
         body.position = x, y
 
         shape = pymunk.Poly(body, [(-dx, -dy), (dx, -dy), (dx, dy), (-dx, dy)], radius=3)
-        shape.friction = friction
-        shape.collision_type = self._collision_types['player']
-        shape.object = player
-        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["player"])
+        player.resolve_shape(shape, friction, self._collision_types['player'],
+                             self._get_filter(self._thing_categories["player"],
+                                              player.get_ignored_categories()))
 
         player.set_shape(shape)
-
-        self._space.add(body, shape)
+        self._add_objects(player, body, shape)
 
     def remove_player(self, player: Player):
         """Removes the player from the game world"""
-        self._space.remove(player.get_shape())
+        self.remove_thing(player)
 
     def add_block_to_grid(self, entity, column: int, row: int,
                          width: int, height: int, friction: float = 1.):
@@ -293,6 +945,10 @@ class World:
             height (int): The height in cells of this entity
             friction (float): The friction on the surface of the block
         """
+        if self._stepping:
+            self._queue_addition(entity, self.add_block_to_grid, (entity, column, row,
+                                                                 width, height, friction))
+            return
 
         left = column * self._cell_expanse
         right = (column + width) * self._cell_expanse
@@ -305,10 +961,10 @@ class World:
 
         shape.friction = friction
         shape.collision_type = self._collision_types["block"]
-        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["block"])
+        shape.filter = self._static_filter
 
         entity.set_shape(shape)
-        self._space.add(shape)
+        self._add_objects(entity, shape)
 
     def add_block(self, block: Block, x: float, y: float, *args, **kwargs):
         """Adds a block to the game world at the grid cell that contains ('x', 'y')
@@ -331,15 +987,410 @@ class World:
         Note: It is technically possible for multiple blocks to overlap, in which case
               this method will return one of those. This should never happen, though.
         """
+        column, row = self.xy_to_grid(x, y)
+        if self.get_static_block_id(column, row) is not None:
+            return self._materialise_static_block(column, row)
+
         blocks = self._space.point_query((x, y), 0, pymunk.ShapeFilter(mask=self._thing_categories["block"]))
 
-        if blocks:
-            return blocks[0].shape.object
+        for query in blocks:
+            if query.shape.object is not None:
+                return query.shape.object
 
     def remove_block(self, block: Block):
         """Removes a block from the game world"""
+        # materialised static blocks have a shape which is not in the space, while
+        # blocks added during the current step have no shape yet
+        shape = block.get_shape()
+        if shape is not None and shape.space is None:
+            self.remove_static_block_from_grid(*self.xy_to_grid(*block.get_position()))
+            return
         self.remove_thing(block)
 
+    def add_static_block(self, block_id: str, x: float, y: float):
+        """Adds a static block to the grid cell that contains ('x', 'y')
+
+        A static block has no state beyond its id and cell, so it is stored as a
+        type code in the static block grid instead of as a Block instance.
+
+        Parameters:
+            block_id (str): The unique id of the block
+            x (float): The x-coordinate of the position contained by the cell
+            y (float): The y-coordinate of the position contained by the cell
+        """
+        self.add_static_block_to_grid(block_id, *self.xy_to_grid(x, y))
+
+    def add_static_block_to_grid(self, block_id: str, column: int, row: int):
+        """Adds a static block to the grid cell at ('column', 'row')
+
+        Parameters:
+            block_id (str): The unique id of the block
+            column (int): The column of the grid cell at which to place the block
+            row (int): The row of the grid cell at which to place the block
+        """
+        code = self._get_static_code(block_id)
+        index = self._static_index(column, row)
+        if self._static_grid[index] == code:
+            return
+        if not self._static_grid[index] and self._cell_codes is not None:
+            self._count_cells(CELL_CODES["block"], column, row, 1, 1, 1)
+
+        self._static_grid[index] = code
+        self._static_blocks.pop((column, row), None)
+        self._dirty_static_rows.add(row)
+        self._static_changes.add((column, row))
+
+    def add_static_blocks_to_grid(self, block_id: str, columns: np.ndarray, rows: np.ndarray):
+        """Adds static blocks with the same id to many grid cells at once
+
+        Parameters:
+            block_id (str): The unique id of the blocks
+            columns (np.ndarray): The column of the grid cell of each block
+            rows (np.ndarray): The row of the grid cell of each block
+        """
+        code = self._get_static_code(block_id)
+        columns, rows = np.asarray(columns), np.asarray(rows)
+        grid_columns, grid_rows = self._grid_size
+        outside = (columns < 0) | (columns >= grid_columns) | (rows < 0) | (rows >= grid_rows)
+        if outside.any():
+            index = np.argmax(outside)
+            raise IndexError(f"Grid cell ({columns[index]}, {rows[index]}) is outside of the world")
+
+        grid = np.frombuffer(self._static_grid, dtype=np.uint8)
+        indices = np.unique(rows * grid_columns + columns)
+        indices = indices[grid[indices] != code]
+        if not len(indices):
+            return
+
+        emptied = indices[grid[indices] == 0]
+        grid[indices] = code
+        del grid
+
+        rows, columns = np.divmod(indices, grid_columns)
+        cells = list(zip(columns.tolist(), rows.tolist()))
+        if self._static_blocks:
+            for cell in cells:
+                self._static_blocks.pop(cell, None)
+        self._dirty_static_rows.update(np.unique(rows).tolist())
+        self._static_changes.update(cells)
+
+        if self._cell_codes is not None and len(emptied):
+            empty_rows, empty_columns = np.divmod(emptied, grid_columns)
+            np.add.at(self._cell_counts[CELL_CODES["block"]], (empty_rows, empty_columns), 1)
+            self._update_codes(int(empty_columns.min()), int(empty_rows.min()),
+                               int(empty_columns.max()) + 1, int(empty_rows.max()) + 1)
+
+    def remove_static_block_from_grid(self, column: int, row: int):
+        """Removes the static block in the grid cell at ('column', 'row'), if any"""
+        index = self._static_index(column, row)
+        if self._static_grid[index]:
+            if self._cell_codes is not None:
+                self._count_cells(CELL_CODES["block"], column, row, 1, 1, -1)
+            self._static_grid[index] = 0
+            self._static_blocks.pop((column, row), None)
+            self._dirty_static_rows.add(row)
+            self._static_changes.add((column, row))
+
+    def get_static_block_id(self, column: int, row: int) -> Optional[str]:
+        """(str) Returns the id of the static block at ('column', 'row'), or None if
+        there is no static block in that cell"""
+        columns, rows = self._grid_size
+        if 0 <= column < columns and 0 <= row < rows:
+            return self._static_ids[self._static_grid[row * columns + column]]
+        return None
+
+    def get_static_blocks(self, start_column: int = 0,
+                          stop_column: int = None) -> Iterable[Tuple[str, int, int]]:
+        """Yields the id, column and row of every static block in the world
+
+        Parameters:
+            start_column (int): The first column to yield blocks from
+            stop_column (int): The column to stop before, defaults to every column
+
+        Yield:
+            tuple<str, int, int>
+        """
+        columns, rows = self._grid_size
+        start_column = max(start_column, 0)
+        stop_column = columns if stop_column is None else min(stop_column, columns)
+        static_ids = self._static_ids
+        if start_column == 0 and stop_column == columns:
+            for index, code in enumerate(self._static_grid):
+                if code:
+                    row, column = divmod(index, columns)
+                    yield static_ids[code], column, row
+            return
+
+        for row in range(rows):
+            start = row * columns
+            cells = self._static_grid[start + start_column:start + stop_column]
+            for column, code in enumerate(cells, start_column):
+                if code:
+                    yield static_ids[code], column, row
+
+    def get_static_grid(self) -> Tuple[bytes, Tuple[Optional[str], ...]]:
+        """Returns a copy of the static block grid, e.g. for drawing it on another thread
+
+        Returns:
+            (tuple<bytes, tuple<str, ...>>): The code of the static block in each cell,
+                row by row, and the block id of each code, where code 0 (None) is empty
+        """
+        return self._static_grid.tobytes(), tuple(self._static_ids)
+
+    def pop_static_changes(self) -> set:
+        """(set<tuple<int, int>>) Returns the (column, row) of each grid cell whose
+        static block has been added, changed or removed since the last call"""
+        changes = self._static_changes
+        self._static_changes = set()
+        return changes
+
+    def get_cell_codes(self, column: int = 0, row: int = 0, columns: int = None,
+                       rows: int = None, outside: int = CELL_CODES["wall"]) -> np.ndarray:
+        """(np.ndarray) Returns the CELL_CODES of a rectangle of grid cells, as a
+        (rows, columns) array of unsigned bytes
+
+        The codes of every cell are kept up to date as things are added, removed
+        or move into another cell, so this is a single slice of that grid. A thing
+        with a non-static body is in the cell of its centre; a block covers each of
+        its cells. The grid is built on the first call, after which the world
+        updates the cells of moving things at the end of each step.
+
+        Parameters:
+            column (int): The column of the top left cell of the rectangle
+            row (int): The row of the top left cell of the rectangle
+            columns (int): The width of the rectangle, defaults to the rest of the grid
+            rows (int): The height of the rectangle, defaults to the rest of the grid
+            outside (int): The code of cells in the rectangle outside of the world
+        """
+        codes = self._cell_codes
+        if codes is None:
+            codes = self._build_cell_codes()
+
+        grid_columns, grid_rows = self._grid_size
+        if columns is None:
+            columns = grid_columns - column
+        if rows is None:
+            rows = grid_rows - row
+
+        if column >= 0 and row >= 0 and column + columns <= grid_columns and row + rows <= grid_rows:
+            return codes[row:row + rows, column:column + columns].copy()
+
+        view = np.full((rows, columns), outside, dtype=np.uint8)
+        left, top = max(column, 0), max(row, 0)
+        right, bottom = min(column + columns, grid_columns), min(row + rows, grid_rows)
+        if left < right and top < bottom:
+            view[top - row:bottom - row, left - column:right - column] = codes[top:bottom, left:right]
+        return view
+
+    def _build_cell_codes(self) -> np.ndarray:
+        """(np.ndarray) Counts the things in each grid cell, and returns the new cell code grid"""
+        columns, rows = self._grid_size
+        self._cell_counts = np.zeros((len(_CELL_LEVELS), rows, columns), dtype=np.int16)
+        self._cell_codes = np.zeros((rows, columns), dtype=np.uint8)
+        self._cell_things.clear()
+        self._moving_cells.clear()
+
+        static = np.frombuffer(self._static_grid.tobytes(), dtype=np.uint8)
+        self._cell_counts[CELL_CODES["block"]] = static.reshape(rows, columns) != 0
+        for thing in self.get_all_things():
+            self._track_cells(thing, update=False)
+
+        self._update_codes(0, 0, columns, rows)
+        return self._cell_codes
+
+    def _forget_cells(self):
+        """Discards the cell code grid, to be built again on the next call to get_cell_codes"""
+        self._cell_codes = None
+        self._cell_counts = None
+        self._cell_things.clear()
+        self._moving_cells.clear()
+
+    def _track_cells(self, thing: Entity, update: bool = True):
+        """Counts a thing in the cells it covers, if it has a cell code"""
+        shape = thing.get_shape()
+        code = self._cell_kinds.get(shape.collision_type)
+        if code is None:
+            return
+
+        body = shape.body
+        if body is self._space.static_body:
+            bb = shape.bb
+            expanse = self._cell_expanse
+            column, row = self.xy_to_grid(bb.left, bb.bottom)
+            width = max(round((bb.right - bb.left) / expanse), 1)
+            height = max(round((bb.top - bb.bottom) / expanse), 1)
+            cells = [code, column, row, width, height, None]
+        else:
+            cells = [code, *self.xy_to_grid(*body.position), 1, 1, body]
+            self._moving_cells[thing] = cells
+
+        self._cell_things[thing] = cells
+        self._count_cells(*cells[:5], 1, update=update)
+
+    def _untrack_cells(self, thing: Entity):
+        """Removes a thing from the counts of the cells it covers"""
+        cells = self._cell_things.pop(thing, None)
+        if cells is not None:
+            self._moving_cells.pop(thing, None)
+            self._count_cells(*cells[:5], -1)
+
+    def _update_cells(self):
+        """Moves each thing with a non-static body whose centre has crossed into another cell"""
+        expanse = self._cell_expanse
+        for cells in self._moving_cells.values():
+            x, y = cells[5].position
+            column, row = int(x // expanse), int(y // expanse)
+            if column != cells[1] or row != cells[2]:
+                code = cells[0]
+                self._count_cells(code, cells[1], cells[2], 1, 1, -1)
+                self._count_cells(code, column, row, 1, 1, 1)
+                cells[1], cells[2] = column, row
+
+    def _count_cells(self, code: int, column: int, row: int, width: int, height: int,
+                     change: int, update: bool = True):
+        """Changes the count of things of a cell code in a rectangle of cells,
+        clipped to the world, and updates the codes of those cells"""
+        columns, rows = self._grid_size
+        left, top = max(column, 0), max(row, 0)
+        right, bottom = min(column + width, columns), min(row + height, rows)
+        if left < right and top < bottom:
+            self._cell_counts[code, top:bottom, left:right] += change
+            if update:
+                self._update_codes(left, top, right, bottom)
+
+    def _update_codes(self, left: int, top: int, right: int, bottom: int):
+        """Sets the code of each cell in a rectangle to the highest code of the things in it"""
+        present = self._cell_counts[:, top:bottom, left:right] > 0
+        self._cell_codes[top:bottom, left:right] = (present * _CELL_LEVELS).max(axis=0)
+
+    def _get_static_code(self, block_id: str) -> int:
+        """(int) Returns the code of a static block id in the static block grid"""
+        code = self._static_codes.get(block_id)
+        if code is None:
+            code = self._static_codes[block_id] = len(self._static_ids)
+            self._static_ids.append(block_id)
+        return code
+
+    def _static_index(self, column: int, row: int) -> int:
+        """(int) Returns the index of the cell ('column', 'row') in the static block grid"""
+        columns, rows = self._grid_size
+        if not (0 <= column < columns and 0 <= row < rows):
+            raise IndexError(f"Grid cell ({column}, {row}) is outside of the world")
+        return row * columns + column
+
+    def _update_static_shapes(self, added: list = None):
+        """Rebuilds the physical shapes of each row of static blocks that has changed
+
+        Each horizontal run of identical static blocks is covered by one shape.
+
+        Parameters:
+            added (list<pymunk.Shape>): If given, new shapes are appended to this
+                                        list rather than added to the space
+        """
+        # shapes removed by the previous update may still have collided during that step
+        for shape in self._retired_static_shapes:
+            del self._static_runs[shape]
+        self._retired_static_shapes.clear()
+
+        if not self._dirty_static_rows:
+            return
+
+        columns = self._grid_size[0]
+        expanse = self._cell_expanse
+        for row in self._dirty_static_rows:
+            old_shapes = self._static_rows.pop(row, ())
+            if old_shapes:
+                self._space.remove(*old_shapes)
+                self._retired_static_shapes.extend(old_shapes)
+
+            cells = self._static_grid[row * columns:(row + 1) * columns]
+            shapes = []
+            start = 0
+            while start < columns:
+                code = cells[start]
+                stop = start + 1
+                while stop < columns and cells[stop] == code:
+                    stop += 1
+
+                if code:
+                    left, right = start * expanse, stop * expanse
+                    top, bottom = row * expanse, (row + 1) * expanse
+                    shape = pymunk.Poly(self._space.static_body,
+                                        [(left, top), (left, bottom), (right, bottom), (right, top)])
+                    shape.object = None
+                    shape.friction = 1.
+                    shape.collision_type = self._collision_types["block"]
+                    shape.filter = self._static_filter
+                    self._static_runs[shape] = (row, start, stop, code)
+                    shapes.append(shape)
+                start = stop
+
+            if shapes:
+                self._static_rows[row] = shapes
+                if added is not None:
+                    added.extend(shapes)
+                else:
+                    self._space.add(*shapes)
+
+        self._dirty_static_rows.clear()
+
+    def _materialise_static_block(self, column: int, row: int, block_id: str = None) -> Block:
+        """(Block) Returns a Block instance representing the static block at ('column', 'row')
+
+        The block is given its own cell sized shape, which is not added to the space,
+        so that its position and collision directions can be determined.
+
+        Parameters:
+            block_id (str): The id of the block, defaults to the id stored in the grid
+        """
+        block = self._static_blocks.get((column, row))
+        if block is None:
+            if block_id is None:
+                block_id = self.get_static_block_id(column, row)
+            block = Block(block_id)
+
+            left, top = self.grid_to_xy(column, row)
+            right, bottom = self.grid_to_xy(column + 1, row + 1)
+            shape = pymunk.Poly(self._space.static_body,
+                                [(left, top), (left, bottom), (right, bottom), (right, top)])
+            shape.object = block
+            shape.collision_type = self._collision_types["block"]
+            shape.filter = self._static_filter
+            shape.cache_bb()
+
+            block.set_shape(shape)
+            self._static_blocks[column, row] = block
+
+        return block
+
+    def _resolve_static_shape(self, shape: pymunk.Shape, x: float) -> Optional[Block]:
+        """(Block) Returns the static block of a run 'shape' in the column closest to 'x'"""
+        run = self._static_runs.get(shape)
+        if run is None:
+            return None
+
+        row, start, stop, code = run
+        column = min(max(int(x // self._cell_expanse), start), stop - 1)
+        return self._materialise_static_block(column, row, self._static_ids[code])
+
+    def _get_static_blocks_in_range(self, x: float, y: float, distance: float) -> [Block]:
+        """(list<Block>) Returns the static blocks whose cells are within 'distance' of ('x', 'y')"""
+        expanse = self._cell_expanse
+        left, top = self.xy_to_grid(x - distance, y - distance)
+        right, bottom = self.xy_to_grid(x + distance, y + distance)
+
+        blocks = []
+        for row in range(top, bottom + 1):
+            dy = max(row * expanse - y, 0, y - (row + 1) * expanse)
+            for column in range(left, right + 1):
+                if self.get_static_block_id(column, row) is None:
+                    continue
+
+                dx = max(column * expanse - x, 0, x - (column + 1) * expanse)
+                if dx * dx + dy * dy <= distance * distance:
+                    blocks.append(self._materialise_static_block(column, row))
+        return blocks
+
     def add_item(self, item: DroppedItem, x: float, y: float, size: Tuple[float, float] = (8, 8),
                  mass: float = 2, friction: float = 1.):
         """Adds an item to the game world centred at the position ('x', 'y')
@@ -366,10 +1417,16 @@ class World:
 
             - See add_thing for other parameters
         """
+        if self._stepping:
+            self._queue_addition(mob, self.add_mob, (mob, x, y, friction))
+            return
 
         self.add_thing(mob, x, y, mob.get_size(), collision_type=self._collision_types['mob'],
                        categories=self._thing_categories["mob"], mass=mob.get_weight(), friction=friction)
 
+        if self._mob_batch is not None:
+            self._mob_batch.add(mob)
+
     def remove_mob(self, mob: Mob):
         """Removes a mob from the world"""
         self.remove_thing(mob)
@@ -379,7 +1436,8 @@ class World:
         queries = self._space.point_query((x, y), distance, pymunk.ShapeFilter(
             mask=pymunk.ShapeFilter.ALL_MASKS ^ self._thing_categories["wall"]))
 
-        return [q.shape.object for q in queries]
+        things = [q.shape.object for q in queries if q.shape.object is not None]
+        return things + self._get_static_blocks_in_range(x, y, distance)
 
     def get_things(self, x: float, y: float) -> [Entity]:
         """(list<Entity>) Returns all things on the point ('x', 'y')"""
@@ -0,0 +1,215 @@
+"""Seeded procedural generation of levels, for stress testing and benchmarks.
+
+Levels are generated in the same ASCII format as the bundled levels, using the
+BLOCKS, ITEMS and MOBS symbol tables of app.py, so they can be loaded with
+load_world or played with MarioApp.
+
+    level = generate_level(width=2000, mob_density=0.05, seed=1)
+    write_level("stress.txt", level)
+
+or from the command line
+
+    python generator.py stress.txt --width 2000 --mob-density 0.05 --seed 1
+
+Every generated level can be completed: the ground is continuous apart from
+gaps of at most MAX_GAP columns, neighbouring ground differs in height by at
+most one block, blocks above the ground leave room to walk underneath, and the
+flag (I) stands on flat ground at the end of the level, with nothing between
+it and the ground before it.
+"""
+
+__version__ = "1.1.0"
+
+import argparse
+import random
+from typing import List
+
+import app
+
+# The widest gap in the ground, in columns; the player can jump further
+MAX_GAP = 3
+# The fewest columns of ground between gaps
+MIN_GROUND = 3
+# The columns of flat, empty ground at the start and at the end of a level
+START_COLUMNS = 6
+END_COLUMNS = 10
+# The number of rows the ground rises above and falls back towards its base height
+MAX_HILL = 2
+# The rows between the ground and blocks above it, leaving room to walk underneath
+BLOCK_CLEARANCE = 4
+# The fewest rows in a level, enough for the flag above the ground
+MIN_HEIGHT = app.GOAL_SIZES["flag"][1] + 3
+
+
+def _symbol(table: dict, entity_id: str) -> str:
+    """(str) Returns the level symbol of an entity id in a symbol table, e.g. BLOCKS"""
+    for symbol, symbol_id in table.items():
+        if symbol_id == entity_id:
+            return symbol
+    raise KeyError(entity_id)
+
+
+BRICK = _symbol(app.BLOCKS, "brick")
+BASE = _symbol(app.BLOCKS, "brick_base")
+MYSTERY_BLOCKS = (_symbol(app.BLOCKS, "mystery_empty"), _symbol(app.BLOCKS, "mystery_coin"))
+BOUNCE = _symbol(app.BLOCKS, "bounce_block")
+SWITCH = _symbol(app.BLOCKS, "switch")
+FLAG = _symbol(app.BLOCKS, "flag")
+COIN = _symbol(app.ITEMS, "coin")
+POWER_UPS = (_symbol(app.ITEMS, "star"), _symbol(app.ITEMS, "flower"))
+MUSHROOM = _symbol(app.MOBS, "mushroom")
+CLOUD = _symbol(app.MOBS, "cloud")
+
+
+def generate_level(width: int = 500, height: int = 14, mob_density: float = 0.02,
+                   cloud_share: float = 0.2, coin_density: float = 0.05,
+                   mystery_frequency: float = 0.03, switch_frequency: float = 0.005,
+                   bounce_frequency: float = 0.01, power_up_frequency: float = 0.005,
+                   gap_frequency: float = 0.03, hill_frequency: float = 0.05,
+                   seed: int = None) -> str:
+    """Generate a random level, which is the same for the same arguments and seed.
+
+    Frequencies and densities are the chance of each column containing the
+    entity, outside of the flat columns at the start and end of the level.
+
+    Parameters:
+        width (int): The number of columns in the level.
+        height (int): The number of rows in the level.
+        mob_density (float): The chance of a column containing a mob.
+        cloud_share (float): The share of mobs which are clouds, rather than mushrooms.
+        coin_density (float): The chance of a column containing a coin.
+        mystery_frequency (float): The chance of a column containing a mystery block.
+        switch_frequency (float): The chance of a column containing a switch.
+        bounce_frequency (float): The chance of a column's ground being a bounce block.
+        power_up_frequency (float): The chance of a column containing a star or flower.
+        gap_frequency (float): The chance of a gap in the ground starting at a column.
+        hill_frequency (float): The chance of the ground changing height at a column.
+        seed (int): The seed of the random number generator.
+
+    Returns:
+        (str): The level string, with one line per row.
+
+    Raises:
+        ValueError: If the level is too narrow or too short to fit the start,
+                    the flag and the end of the level.
+    """
+    if width < START_COLUMNS + END_COLUMNS:
+        raise ValueError(f"A level must be at least {START_COLUMNS + END_COLUMNS} columns wide")
+    if height < MIN_HEIGHT:
+        raise ValueError(f"A level must be at least {MIN_HEIGHT} rows high")
+
+    rng = random.Random(seed)
+    grid = [[" "] * width for _ in range(height)]
+    base = height - 2
+    surfaces = _generate_ground(rng, width, base, gap_frequency, hill_frequency)
+
+    for column, surface in enumerate(surfaces):
+        if surface is None:
+            continue
+        for row in range(surface, height - 1):
+            grid[row][column] = BRICK
+        grid[height - 1][column] = BASE
+
+    def place(row, column, symbol):
+        if 0 <= row < height and grid[row][column] == " ":
+            grid[row][column] = symbol
+
+    for column in range(START_COLUMNS, width - END_COLUMNS):
+        surface = surfaces[column]
+        if surface is None:
+            continue
+
+        if rng.random() < bounce_frequency:
+            grid[surface][column] = BOUNCE
+        if rng.random() < mystery_frequency:
+            place(surface - BLOCK_CLEARANCE, column, rng.choice(MYSTERY_BLOCKS))
+        if rng.random() < coin_density:
+            place(surface - 2, column, COIN)
+        if rng.random() < power_up_frequency:
+            place(surface - 1, column, rng.choice(POWER_UPS))
+        # switches are kept away from gaps, so the bricks they remove cannot widen a gap
+        if (rng.random() < switch_frequency
+                and None not in surfaces[column - MAX_GAP:column + MAX_GAP + 1]):
+            place(surface - 1, column, SWITCH)
+        if rng.random() < mob_density:
+            if rng.random() < cloud_share:
+                place(1, column, CLOUD)
+            else:
+                place(surface - 1, column, MUSHROOM)
+
+    place(base - 1, width - END_COLUMNS // 2, FLAG)
+
+    return "\n".join("".join(row).rstrip() for row in grid)
+
+
+def _generate_ground(rng: random.Random, width: int, base: int,
+                     gap_frequency: float, hill_frequency: float) -> List[int]:
+    """Generate the row of the top of the ground in each column, or None for a gap
+
+    The ground is at the base row at the start and end of the level, changes
+    height by at most one row between columns, and is level on both sides of
+    each gap.
+    """
+    surfaces = [base] * width
+    surface = base
+    column = START_COLUMNS
+    ground = 0
+    # the ground returns to its base height, without gaps, before the end of the level
+    ramp = width - END_COLUMNS - MAX_HILL
+    while column < width - END_COLUMNS:
+        if ground >= MIN_GROUND and column + MAX_GAP < ramp and rng.random() < gap_frequency:
+            gap = rng.randint(1, MAX_GAP)
+            surfaces[column:column + gap] = [None] * gap
+            column += gap
+            ground = 0
+            continue
+
+        if column >= ramp:
+            surface = min(surface + 1, base)
+        elif ground >= MIN_GROUND and rng.random() < hill_frequency:
+            surface = min(max(surface + rng.choice((-1, 1)), base - MAX_HILL), base)
+            ground = 0
+        surfaces[column] = surface
+        column += 1
+        ground += 1
+
+    return surfaces
+
+
+def write_level(filename: str, level: str):
+    """Write a level string to a level file, see load_level."""
+    with open(filename, 'w') as file:
+        file.write(level + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a random level')
+    parser.add_argument('filename', help='the level file to write')
+    parser.add_argument('--width', type=int, default=500, help='the number of columns')
+    parser.add_argument('--height', type=int, default=14, help='the number of rows')
+    parser.add_argument('--mob-density', type=float, default=0.02,
+                        help='the chance of a column containing a mob')
+    parser.add_argument('--coin-density', type=float, default=0.05,
+                        help='the chance of a column containing a coin')
+    parser.add_argument('--mystery-frequency', type=float, default=0.03,
+                        help='the chance of a column containing a mystery block')
+    parser.add_argument('--switch-frequency', type=float, default=0.005,
+                        help='the chance of a column containing a switch')
+    parser.add_argument('--bounce-frequency', type=float, default=0.01,
+                        help='the chance of a column containing a bounce block')
+    parser.add_argument('--gap-frequency', type=float, default=0.03,
+                        help='the chance of a gap in the ground starting at a column')
+    parser.add_argument('--seed', type=int, help='the seed of the random number generator')
+    args = parser.parse_args()
+
+    level = generate_level(width=args.width, height=args.height, mob_density=args.mob_density,
+                           coin_density=args.coin_density,
+                           mystery_frequency=args.mystery_frequency,
+                           switch_frequency=args.switch_frequency,
+                           bounce_frequency=args.bounce_frequency,
+                           gap_frequency=args.gap_frequency, seed=args.seed)
+    write_level(args.filename, level)
+
+
+if __name__ == "__main__":
+    main()
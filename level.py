@@ -4,17 +4,28 @@ tokens of entities.
 
 __version__ = "1.1.0"
 
-from typing import Tuple, Callable, Iterable
+import gc
+import os
+import re
+from collections import deque
+from contextlib import contextmanager
+from typing import Tuple, Callable, Iterable, Dict, Optional
 
+import numpy as np
+
+from config import Config
 from game.world import World
 
+# The level name used to signify that there are no more levels
+END_LEVEL = "END"
+
 
 class WorldBuilder:
     """World builder class that can be used to construct a world from
     entity ids by dynamically assigning processors to ids.
     """
     def __init__(self, block_size: int, gravity: Tuple[int, int] = (0, 300),
-                 fallback: Callable = None):
+                 fallback: Callable = None, **world_options):
         """Construct a new world builder with a specific block size.
 
         The args passed to the fallback callback is determined by what is given
@@ -26,14 +37,18 @@ class WorldBuilder:
             gravity (tuple<int, int>): The gravity of the world.
             fallback (Callable<World, str, int, int, *> -> None): The builder
                 callback to add an entity to the world for an unknown id.
+            **world_options: Additional keyword arguments for the constructed
+                             worlds, see World.__init__
         """
         # the builders dictionary contains mappings on how to
         # process ids of entities
         self._builders = {}
+        self._batch_builders = {}
         self._entities = []
         self._fallback = fallback
         self._block_size = block_size
         self._gravity = gravity
+        self._world_options = world_options
         self._width = 0
         self._height = 0
 
@@ -72,6 +87,33 @@ class WorldBuilder:
         for entity_id in entity_ids:
             self._builders[entity_id] = builder
 
+    def register_batch_builder(self, entity_id: str, builder: Callable):
+        """Register a builder process for many entities of an entity id at once.
+
+        The given builder is called with every entity of the entity id added by
+        add_entities, instead of calling the entity id's builder once per entity.
+
+        The signature of the builder method should be as follows:
+            builder(world: World, entity_id: str, xs: np.ndarray, ys: np.ndarray, *args) -> None
+        where xs and ys are integer arrays of the coordinates of each entity.
+
+        Parameters:
+            entity_id (str): String identifier for an entity.
+            builder (Callable): The builder callback to add entities to the world.
+        """
+        self._batch_builders[entity_id] = builder
+
+    def register_batch_builders(self, entity_ids: Iterable[str], builder: Callable):
+        """Registers a builder process for many entities at once for each given entity id
+
+        Parameters:
+            entity_ids (<str, ...>): Iterable of string identifiers for an entity.
+            builder (Callable): The builder callback to add entities to the world,
+                                see register_batch_builder.
+        """
+        for entity_id in entity_ids:
+            self._batch_builders[entity_id] = builder
+
     def add_entity(self, entity_id: str, x: int, y: int, *args):
         """Add an entity to the world based on the entity id.
 
@@ -94,32 +136,129 @@ class WorldBuilder:
 
         return self
 
-    def build(self) -> World:
+    def add_entities(self, entity_id: str, xs: np.ndarray, ys: np.ndarray, *args):
+        """Add many entities with the same entity id, built together by the entity
+        id's batch builder if it has one, see register_batch_builder.
+
+        Parameters:
+            entity_id (str): The id of the entities used when processing them.
+            xs (np.ndarray): The x coordinate of each entity.
+            ys (np.ndarray): The y coordinate of each entity.
+            *args: Any additional arguments, passed to the builder for these entities.
+
+        Returns:
+            (WorldBuilder): self, allows for chained method calls.
+        """
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        self.fit(xs, ys)
+        self._entities.append((entity_id, xs, ys, args))
+
+        return self
+
+    def fit(self, xs: np.ndarray, ys: np.ndarray):
+        """Resize the world to fit entities at the given coordinates, exactly as
+        adding each of them in turn with add_entity would.
+
+        Parameters:
+            xs (np.ndarray): The x coordinate of each entity, in the order they are added.
+            ys (np.ndarray): The y coordinate of each entity, in the order they are added.
+        """
+        if not len(xs):
+            return
+
+        # add_entity only resizes for a coordinate greater than every earlier one,
+        # so only the increasing running maximums need to be visited
+        for x in np.unique(np.maximum.accumulate(xs)).tolist():
+            if x >= self._width:
+                self._width = x + self._block_size // 2
+        for y in np.unique(np.maximum.accumulate(ys)).tolist():
+            if y >= self._height:
+                self._height = y + self._block_size // 2
+
+    def build(self, bulk: bool = True) -> World:
         """Construct a new world containing all the added entities.
 
         The size of the world is determined by the maximum entity space occupied.
 
         Each entity builder is called during this construction.
 
+        Parameters:
+            bulk (bool): If True, the shapes of every entity are inserted into the
+                         world's physics space at once, see World.bulk_add, and
+                         the cyclic garbage collector is paused while building
+
         Raises:
             KeyError: If there is no associated builder for an entity id and no
                       fallback builder has been set.
         """
-        world = World((self._width, self._height), self._block_size, gravity=self._gravity)
-        for entity in self._entities:
-            entity_id, x, y, args = entity
+        world = World((self._width, self._height), self._block_size, gravity=self._gravity,
+                      **self._world_options)
+        if not bulk:
+            self._build_all(world)
+            return world
+
+        # building allocates many objects at once, which would otherwise trigger
+        # repeated, fruitless collections of the cyclic garbage collector
+        with _paused_gc(), world.bulk_add():
+            self._build_all(world)
+        return world
 
-            if entity_id not in self._builders:
-                if self._fallback is None:
-                    raise KeyError(f"Unable to build world,"
-                                   f"no matching processor for entity id of {entity_id}")
-                self._fallback(world, *entity)
-                continue
+    def _build_all(self, world: World):
+        """Add every added entity to a world"""
+        for entity_id, x, y, args in self._entities:
+            if isinstance(x, np.ndarray):
+                self.build_entities(world, entity_id, x, y, *args)
+            else:
+                self.build_entity(world, entity_id, x, y, *args)
 
-            processor = self._builders[entity_id]
-            processor(world, entity_id, x, y, *args)
+    def build_entity(self, world: World, entity_id: str, x: int, y: int, *args):
+        """Add a single entity directly to an existing world.
 
-        return world
+        Parameters:
+            world (World): The world to add the entity to.
+            entity_id (str): The id of the entity used when processing the entity.
+            x (int): The x coordinate of the entity.
+            y (int): The y coordinate of the entity.
+            *args: Any additional arguments, passed to the builder for this entity.
+
+        Raises:
+            KeyError: If there is no associated builder for the entity id and no
+                      fallback builder has been set.
+        """
+        if entity_id not in self._builders:
+            if self._fallback is None:
+                raise KeyError(f"Unable to build world,"
+                               f"no matching processor for entity id of {entity_id}")
+            self._fallback(world, entity_id, x, y, *args)
+            return
+
+        processor = self._builders[entity_id]
+        processor(world, entity_id, x, y, *args)
+
+    def build_entities(self, world: World, entity_id: str, xs: np.ndarray, ys: np.ndarray, *args):
+        """Add many entities with the same entity id directly to an existing world.
+
+        The entities are built by the entity id's batch builder if it has one,
+        otherwise one at a time, see build_entity.
+
+        Parameters:
+            world (World): The world to add the entities to.
+            entity_id (str): The id of the entities used when processing them.
+            xs (np.ndarray): The x coordinate of each entity.
+            ys (np.ndarray): The y coordinate of each entity.
+            *args: Any additional arguments, passed to the builder for these entities.
+
+        Raises:
+            KeyError: If there is no associated builder for the entity id and no
+                      fallback builder has been set.
+        """
+        batch_builder = self._batch_builders.get(entity_id)
+        if batch_builder is not None:
+            batch_builder(world, entity_id, xs, ys, *args)
+            return
+
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.build_entity(world, entity_id, x, y, *args)
 
     def clear(self):
         """
@@ -130,6 +269,18 @@ class WorldBuilder:
         self._height = 0
 
 
+@contextmanager
+def _paused_gc():
+    """Context manager disabling the cyclic garbage collector, if it is enabled, within it"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 def level_size(level: str) -> Tuple[int, int]:
     """Calculate the rows, columns dimensions of a level from the level string.
 
@@ -169,9 +320,41 @@ def load_level(filename: str) -> str:
     return "\n".join(level)
 
 
+def parse_level(filename: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find every entity in a level file, without scanning it character by
+    character in Python.
+
+    The file is read as text and each line is stripped of trailing whitespace,
+    as in load_level, then every character other than a space is an entity.
+
+    Parameters:
+        filename (str): The name of the level file to parse.
+
+    Returns:
+        (tuple<np.ndarray, np.ndarray, np.ndarray>): The x and y coordinates, and
+            the symbol code point, of each entity, in the order they appear in the file.
+    """
+    with open(filename, 'r') as file:
+        lines = [line.rstrip() for line in file]
+
+    # one code point per character, so each column of a line is one array element
+    data = np.frombuffer('\n'.join(lines).encode('utf-32-le'), dtype=np.uint32)
+
+    newlines = np.flatnonzero(data == ord('\n'))
+    indices = np.flatnonzero((data != ord(' ')) & (data != ord('\n')))
+
+    ys = np.searchsorted(newlines, indices)
+    line_starts = np.concatenate(([0], newlines + 1))
+    xs = indices - line_starts[ys]
+    return xs, ys, data[indices]
+
+
 def load_world(builder: WorldBuilder, filename: str, *args):
     """Loads entities within a file into a world builder.
 
+    The entities of each symbol are added to the builder together, see
+    WorldBuilder.add_entities.
+
     Parameters:
         builder (WorldBuilder): The builder to append found entities to.
         filename (str): The game world file to load with blocks.
@@ -179,12 +362,123 @@ def load_world(builder: WorldBuilder, filename: str, *args):
     Returns:
         (World): The world produced by adding the found entities.
     """
-    level = load_level(filename)
-    for y, line in enumerate(level.split('\n')):
-        for x, character in enumerate(line):
-            if character in ('\n', ' '):
-                continue
-
-            builder.add_entity(character, x, y, *args)
+    xs, ys, symbols = parse_level(filename)
+    # size the world by the entities in the order of the file, as add_entity would
+    builder.fit(xs, ys)
+
+    order = np.argsort(symbols, kind='stable')
+    symbols = symbols[order]
+    codes, starts = np.unique(symbols, return_index=True)
+    stops = np.append(starts[1:], len(symbols))
+    for code, start, stop in zip(codes.tolist(), starts.tolist(), stops.tolist()):
+        entities = order[start:stop]
+        builder.add_entities(chr(code), xs[entities], ys[entities], *args)
 
     return builder.build()
+
+
+class LevelGraph:
+    """The transitions between levels, through their goals (flags) and tunnels.
+
+    The graph is built once from a configuration. Levels without a configured
+    goal lead to the next numbered level file (e.g. level9.txt to level10.txt)
+    if that file exists, otherwise they end the game. Levels without a
+    configured tunnel lead to their goal.
+    """
+
+    def __init__(self, start: str, goals: Dict[str, str], tunnels: Dict[str, str],
+                 directory: str = "."):
+        """Construct a new level graph.
+
+        Parameters:
+            start (str): The first level.
+            goals (dict<str: str>): The level reached through each level's goal.
+            tunnels (dict<str: str>): The level reached through each level's tunnel.
+            directory (str): The directory containing the level files.
+        """
+        self._start = start
+        self._goals = dict(goals)
+        self._tunnels = dict(tunnels)
+        self._directory = directory
+
+        # precompile the destinations of every level reachable from the start
+        for _ in self.walk():
+            pass
+
+    @classmethod
+    def from_config(cls, config: Config, directory: str = ".") -> 'LevelGraph':
+        """Construct the level graph described by a configuration.
+
+        Parameters:
+            config (Config): The game configuration.
+            directory (str): The directory containing the level files.
+        """
+        goals = {}
+        tunnels = {}
+        for level, level_config in config.levels.items():
+            if level_config.goal is not None:
+                goals[level] = level_config.goal
+            if level_config.tunnel is not None:
+                tunnels[level] = level_config.tunnel
+        return cls(config.world.start, goals, tunnels, directory)
+
+    def get_start(self) -> str:
+        """(str) Returns the first level."""
+        return self._start
+
+    def _next_numbered_level(self, level: str) -> str:
+        """(str) Returns the level file numbered one after 'level' if it exists,
+        otherwise END_LEVEL."""
+        match = re.search(r'(\d+)(\D*)$', level)
+        if match is not None:
+            number, suffix = match.groups()
+            successor = f"{level[:match.start()]}{int(number) + 1}{suffix}"
+            if os.path.isfile(os.path.join(self._directory, successor)):
+                return successor
+        return END_LEVEL
+
+    def get_goal(self, level: str) -> str:
+        """(str) Returns the level reached through the goal of 'level', or END_LEVEL."""
+        goal = self._goals.get(level)
+        if goal is None:
+            goal = self._goals[level] = self._next_numbered_level(level)
+        return goal
+
+    def get_tunnel(self, level: str) -> str:
+        """(str) Returns the level reached through the tunnel of 'level', or END_LEVEL."""
+        tunnel = self._tunnels.get(level)
+        if tunnel is None:
+            tunnel = self._tunnels[level] = self.get_goal(level)
+        return tunnel
+
+    def get_destinations(self, level: str) -> Tuple[str, str]:
+        """(tuple<str, str>) Returns the levels reached through the goal and tunnel of 'level'."""
+        return self.get_goal(level), self.get_tunnel(level)
+
+    def walk(self, start: Optional[str] = None) -> Iterable[str]:
+        """Yields each level reachable from 'start', in breadth first order.
+
+        Parameters:
+            start (str): The level to walk from, defaults to the first level.
+        """
+        start = self._start if start is None else start
+        seen = {start, END_LEVEL}
+        queue = deque([start])
+        while queue:
+            level = queue.popleft()
+            yield level
+            for destination in self.get_destinations(level):
+                if destination not in seen:
+                    seen.add(destination)
+                    queue.append(destination)
+
+    def validate(self):
+        """Check that the file of every level reachable from the first level exists.
+
+        Raises:
+            FileNotFoundError: If any level file does not exist.
+        """
+        missing = [level for level in self.walk()
+                   if not os.path.isfile(os.path.join(self._directory, level))]
+        if missing:
+            raise FileNotFoundError(f"Missing level files: {', '.join(missing)}")
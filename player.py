@@ -2,11 +2,15 @@
 
 __version__ = "1.1.0"
 
+from typing import Callable
+
 from game.entity import DynamicEntity
 
 
 class Player(DynamicEntity):
     """A player in the game"""
+    __slots__ = ('_name', '_score', '_observers')
+
     _type = 3
 
     def __init__(self, name: str = "Mario", max_health: float = 20):
@@ -20,6 +24,29 @@ class Player(DynamicEntity):
 
         self._name = name
         self._score = 0
+        self._observers = []
+
+    def add_observer(self, observer: Callable[['Player'], None]):
+        """Add an observer which is called whenever the player's health or score changes.
+
+        Parameters:
+            observer (Callable<Player> -> None): Called with the changed player.
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[['Player'], None]):
+        """Remove an observer added with add_observer."""
+        self._observers.remove(observer)
+
+    def _notify_observers(self):
+        """Call each observer with this player."""
+        for observer in self._observers:
+            observer(self)
+
+    def change_health(self, change):
+        """Increases the player's health by 'change (float)'"""
+        super().change_health(change)
+        self._notify_observers()
 
     def get_name(self) -> str:
         """(str): Returns the name of the player."""
@@ -27,6 +54,7 @@ class Player(DynamicEntity):
 
     def reset_score(self):
         self._score=0
+        self._notify_observers()
         return self._score
 
     def get_score(self) -> int:
@@ -36,6 +64,7 @@ class Player(DynamicEntity):
     def change_score(self, change: float = 1):
         """Increase the players score by the given change value."""
         self._score += change
+        self._notify_observers()
 
     def get_id(self):
         pass
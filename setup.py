@@ -42,3 +42,5 @@ def execute(cmd):
 
 if __name__ == '__main__':
     execute([sys.executable, "-m", "pip", "install", "pymunk"])
+    execute([sys.executable, "-m", "pip", "install", "numpy"])
+    execute([sys.executable, "-m", "pip", "install", "pillow"])
@@ -0,0 +1,45 @@
+"""
+Tests of parsing level files, against the character by character loader.
+"""
+
+import pytest
+
+from level import load_level, parse_level
+
+LEVELS = {
+    "crlf": "  #  C\r\n###  ^\r\n",
+    "lone_cr": "#\r  C\r%%",
+    "tabs": "#\t#\n\t C\n",
+    "trailing_whitespace": "##  \t \n  C\t\n  \n^ \x0c\n",
+    "non_ascii": "#é #\n  ✓ C  \n",
+    "no_final_newline": "#\n  @",
+}
+
+
+def parse_level_by_character(filename):
+    """Returns the (x, y, symbol) of each entity found as load_world did before parse_level"""
+    entities = []
+    for y, line in enumerate(load_level(filename).split('\n')):
+        for x, character in enumerate(line):
+            if character not in ('\n', ' '):
+                entities.append((x, y, character))
+    return entities
+
+
+def parse(filename):
+    xs, ys, symbols = parse_level(filename)
+    return [(x, y, chr(symbol)) for x, y, symbol in zip(xs.tolist(), ys.tolist(), symbols.tolist())]
+
+
+@pytest.mark.parametrize("name", sorted(LEVELS))
+def test_parse_level_matches_loader(tmp_path, name):
+    filename = tmp_path / f"{name}.txt"
+    with open(filename, 'w', newline='') as file:
+        file.write(LEVELS[name])
+
+    assert parse(filename) == parse_level_by_character(filename)
+
+
+@pytest.mark.parametrize("filename", ["level1.txt", "level2.txt"])
+def test_parse_bundled_levels(filename):
+    assert parse(filename) == parse_level_by_character(filename)
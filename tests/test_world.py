@@ -0,0 +1,53 @@
+"""
+Regression tests for stepping game worlds.
+"""
+
+import math
+
+from game.mob import CloudMob
+from game.world import World
+from player import Player
+
+BLOCK_SIZE = 16
+
+
+def test_player_landing_on_cloud():
+    """A cloud has no mass, which used to make its position NaN when the player
+    landed on it, and crashed stepping while the cell code grid was active."""
+    world = World((20, 10), BLOCK_SIZE, gravity=(0, 300))
+    cloud = CloudMob()
+    world.add_mob(cloud, 80, 64)
+    player = Player("mario")
+    world.add_player(player, 80, 34)
+    world.get_cell_codes()
+
+    for _ in range(200):
+        world.step((world, player))
+
+    cloud_x, cloud_y = cloud.get_position()
+    player_x, player_y = player.get_position()
+    assert all(math.isfinite(value) for value in (cloud_x, cloud_y, player_x, player_y))
+    # the cloud holds its height, and the player stands on top of it
+    assert cloud_y == 64
+    assert player_y < cloud_y
+
+
+def test_remove_thing_added_in_same_step():
+    """A thing added and then removed during one step is never added"""
+    world = World((20, 10), BLOCK_SIZE, gravity=(0, 300))
+    player = Player("mario")
+    world.add_player(player, 80, 34)
+    spawned = CloudMob()
+
+    class Spawner(CloudMob):
+        __slots__ = ()
+
+        def step(self, time_delta, game_data):
+            world.add_mob(spawned, 120, 64)
+            world.remove_mob(spawned)
+
+    world.add_mob(Spawner(), 40, 64)
+    world.step((world, player))
+
+    assert spawned not in set(world.get_all_things())
+    assert spawned.get_shape() is None